@@ -0,0 +1,247 @@
+"""
+Микробенчмарки domain-слоя: генерация ходов, проверка победителя, ход машины
+на полях разного размера и в разных фазах игры, перевод игры в формат БД и обратно.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_domain.py                        # вывести результаты
+    python benchmarks/bench_domain.py --output results.json  # сохранить результаты в JSON
+    python benchmarks/bench_domain.py --check                # сравнить с benchmarks/baseline.json
+    python benchmarks/bench_domain.py --update-baseline      # перезаписать базовые результаты
+
+Абсолютное время зависит от машины, поэтому сравниваются не секунды, а величины, измеренные в том же запуске:
+- normalized — время бенчмарка в долях времени калибровочного цикла на чистом Python (calibration_loop);
+- ratios — отношения времени связанных бенчмарков (например, инкрементальной проверки победителя к полной).
+С --check скрипт завершается с кодом 1, если какая-либо из этих величин больше базовой
+больше, чем на --tolerance (доля, по умолчанию 0.5), и с кодом 2, если базовые результаты
+получены на другой машине (meta.host): их нужно перезаписать на этой машине через --update-baseline.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+import uuid
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from datasource.mapper.game_data_mapper import GameDataMapper  # noqa: E402
+from domain.model.game_server import GameServer  # noqa: E402
+from domain.service.game_service import TicTakToeGameService, IncrementalTicTakToeGameService  # noqa: E402
+from domain.service.opening_book import default_opening_book  # noqa: E402
+from domain.service.search_engine import MinimaxEngine, TranspositionTable, AlphaBetaEngine  # noqa: E402
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+
+# Размеры полей и доля занятых клеток для фаз игры
+BOARD_SIZES = ((3, 3), (5, 5), (7, 7))
+PHASES = {'opening': 0.0, 'middlegame': 0.4, 'endgame': 0.75}
+
+
+def make_position(rows, cols, fill, seed=0):
+    """
+    Игра с заданной долей занятых клеток: ходы игроков по очереди в случайные клетки,
+    ход, который собирает линию, пропускается, чтобы позиция оставалась незавершенной.
+    Следующий ход всегда за машиной (второй игрок).
+    """
+    rng = random.Random(seed)
+    game_server = GameServer(rows=rows, cols=cols, current_player1=str(uuid.uuid4()), status=202)
+    board = game_server.board
+    target = int(rows * cols * fill)
+    if target and target % 2 == 0:
+        target -= 1  # Нечетное число ходов: следующий ход за машиной
+    marker = game_server.PLAYER_ONE_MARKER
+    cells = [(row, col) for row in range(rows) for col in range(cols)]
+    rng.shuffle(cells)
+    placed = 0
+    for row, col in cells:
+        if placed >= target:
+            break
+        board.set_cell(row, col, marker)
+        if board.winner():
+            board.set_cell(row, col, 0)
+            continue
+        placed += 1
+        marker = game_server.PLAYER_TWO_MARKER if marker == game_server.PLAYER_ONE_MARKER \
+            else game_server.PLAYER_ONE_MARKER
+    return game_server
+
+
+def measure(func, repeat=5, min_time=0.2):
+    """Время одного вызова в секундах: минимум по repeat замерам, в каждом не меньше min_time."""
+    timer = timeit.Timer(func)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / elapsed)) if elapsed else number
+    return min(timer.repeat(repeat=repeat, number=number)) / number
+
+
+def calibration_loop():
+    """Калибровочная нагрузка: цикл интерпретатора с арифметикой, индексацией и вызовом метода."""
+    cells = list(range(64))
+    total = 0
+    for index in range(2000):
+        total += cells[index & 63] * index % 7
+        cells.append(total)
+        cells.pop()
+    return total
+
+
+def bench_move_generation():
+    """Список свободных клеток поля."""
+    for rows, cols in BOARD_SIZES:
+        for phase, fill in PHASES.items():
+            board = make_position(rows, cols, fill).board
+            yield f'move_generation/{rows}x{cols}/{phase}', board.empty_cells
+
+
+def bench_winner_detection():
+    """Проверка победителя полным просмотром линий и инкрементально по последнему ходу."""
+    for rows, cols in BOARD_SIZES:
+        for phase, fill in PHASES.items():
+            game_server = make_position(rows, cols, fill)
+            yield f'winner_detection/full/{rows}x{cols}/{phase}', TicTakToeGameService(game_server).check_winner
+
+            service = IncrementalTicTakToeGameService(make_position(rows, cols, fill))
+            row, col = service.game_server.board.empty_cells()[0]
+            service.place_machine_move(row, col)
+            yield f'winner_detection/incremental/{rows}x{cols}/{phase}', service.check_winner
+
+
+def bench_machine_move():
+    """Ход машины: полный перебор 3x3 с пустой таблицей, ответ книги дебютов, alpha-beta на больших полях."""
+    for phase, fill in PHASES.items():
+        service = TicTakToeGameService(make_position(3, 3, fill))
+        yield (f'machine_move/minimax_cold/3x3/{phase}',
+               lambda service=service: MinimaxEngine(TranspositionTable()).find_best_move(service))
+
+    default_opening_book()  # Книга загружается один раз при старте приложения
+    service = TicTakToeGameService(make_position(3, 3, 0.0))
+    yield 'machine_move/choose/3x3/opening', service.choose_machine_move
+
+    for rows, cols in BOARD_SIZES[1:]:
+        for phase, fill in PHASES.items():
+            service = TicTakToeGameService(make_position(rows, cols, fill))
+            # Фиксированная глубина вместо ограничения времени, чтобы замер не зависел от бюджета на ход
+            yield (f'machine_move/alphabeta_depth3/{rows}x{cols}/{phase}',
+                   lambda service=service: AlphaBetaEngine(time_budget=60, max_depth=3).find_best_move(service))
+
+
+def bench_mapper():
+    """Перевод игры в запись БД и обратно в текущем (упакованном) и старом (JSON) формате поля."""
+    for rows, cols in BOARD_SIZES:
+        game_server = make_position(rows, cols, PHASES['middlegame'])
+
+        def packed_round_trip(game_server=game_server):
+            row = GameDataMapper.game_to_row(game_server)
+            return GameDataMapper.game_from_row(SimpleNamespace(**row))
+
+        json_row = SimpleNamespace(**{**GameDataMapper.game_to_row(game_server),
+                                      'board_format': GameDataMapper.BOARD_FORMAT_JSON,
+                                      'board': json.dumps(game_server.board.game_matrix)})
+        yield f'mapper/round_trip_packed/{rows}x{cols}', packed_round_trip
+        yield f'mapper/from_row_json/{rows}x{cols}', lambda json_row=json_row: GameDataMapper.game_from_row(json_row)
+
+
+BENCHMARKS = (bench_move_generation, bench_winner_detection, bench_machine_move, bench_mapper)
+
+# Пары префиксов имен бенчмарков, отношение времени которых проверяется: числитель, знаменатель
+RATIOS = (
+    ('winner_detection/incremental/', 'winner_detection/full/'),
+    ('machine_move/choose/', 'machine_move/minimax_cold/'),
+)
+
+
+def run(selected=None):
+    """Выполнить бенчмарки, имя которых начинается с одного из префиксов selected (None — все)."""
+    results = {}
+    for group in BENCHMARKS:
+        for name, func in group():
+            if selected and not any(name.startswith(prefix) for prefix in selected):
+                continue
+            seconds = measure(func)
+            # Калибровочный цикл замеряется рядом с каждым бенчмарком: скорость машины меняется и во время запуска
+            calibration = measure(calibration_loop, repeat=3, min_time=0.05)
+            results[name] = {'seconds': seconds, 'calibration_seconds': calibration,
+                             'normalized': seconds / calibration}
+            print(f'{name:55s} {seconds * 1e6:12.2f} us {seconds / calibration:10.4f}', file=sys.stderr)
+    return {
+        'meta': {'host': platform.node(), 'python': platform.python_version(),
+                 'implementation': platform.python_implementation(), 'machine': platform.machine()},
+        'results': results,
+        'ratios': ratios(results),
+    }
+
+
+def ratios(results):
+    """Отношения времени связанных бенчмарков (пары из RATIOS с одинаковым окончанием имени)."""
+    values = {}
+    for numerator, denominator in RATIOS:
+        for name, result in results.items():
+            other = denominator + name[len(numerator):]
+            if name.startswith(numerator) and other in results:
+                values[f'{name} / {other}'] = result['normalized'] / results[other]['normalized']
+    return values
+
+
+def compare(report, baseline, tolerance):
+    """
+    Список регрессий (имя, базовое значение, текущее значение) относительно baseline:
+    по времени в долях калибровочного цикла и по отношениям времени связанных бенчмарков.
+
+    :raises ValueError: Если базовые результаты получены на другой машине.
+    """
+    host, base_host = report['meta'].get('host'), baseline['meta'].get('host')
+    if host != base_host:
+        raise ValueError(f'Базовые результаты получены на другой машине ({base_host}, сейчас {host})')
+    current = {name: result['normalized'] for name, result in report['results'].items()}
+    current.update(report.get('ratios', {}))
+    base = {name: result.get('normalized') for name, result in baseline['results'].items()}
+    base.update(baseline.get('ratios', {}))
+    regressions = []
+    for name, value in current.items():
+        if base.get(name) is not None and value > base[name] * (1 + tolerance):
+            regressions.append((name, base[name], value))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Микробенчмарки domain-слоя крестиков-ноликов')
+    parser.add_argument('--output', help='Файл для результатов в JSON (по умолчанию — stdout)')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='Файл базовых результатов')
+    parser.add_argument('--check', action='store_true', help='Сравнить с базовыми результатами')
+    parser.add_argument('--update-baseline', action='store_true', help='Сохранить результаты как базовые')
+    parser.add_argument('--tolerance', type=float, default=0.5,
+                        help='Допустимое замедление относительно базового результата (доля)')
+    parser.add_argument('--only', nargs='*', help='Префиксы имен бенчмарков, которые нужно выполнить')
+    args = parser.parse_args(argv)
+
+    report = run(args.only)
+    text = json.dumps(report, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            output.write(text + '\n')
+    else:
+        print(text)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as output:
+            output.write(text + '\n')
+
+    if args.check:
+        with open(args.baseline, encoding='utf-8') as baseline_file:
+            baseline = json.load(baseline_file)
+        try:
+            regressions = compare(report, baseline, args.tolerance)
+        except ValueError as e:
+            print(f'{e}: сравнение невозможно, обновите базовые результаты (--update-baseline)', file=sys.stderr)
+            return 2
+        for name, base, current in regressions:
+            print(f'REGRESSION {name}: {base:.4g} -> {current:.4g} ({current / base - 1:+.0%})', file=sys.stderr)
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,152 @@
+"""
+Бенчмарк хэширования паролей: стоимость методов формирования ключа и волна входов.
+
+Для каждого метода (формат werkzeug, как в настройке password_hashing.method) замеряется время
+хэширования и проверки одного пароля. Затем моделируется волна входов: --storm одновременных
+проверок пароля, пока отдельный поток обрабатывает «события игры» (проверка победителя на поле 7x7).
+Волна выполняется дважды — каждый вход в своем потоке (как было до пула) и через PasswordHasher
+с --workers потоками и очередью --max-pending — и для обоих случаев выводятся задержки событий игры,
+количество отклоненных входов и общее время.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_password_hash.py
+    python benchmarks/bench_password_hash.py --methods scrypt:16384:8:1 pbkdf2:sha256:600000 --storm 64
+    python benchmarks/bench_password_hash.py --output hashing.json
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from werkzeug.security import generate_password_hash, check_password_hash  # noqa: E402
+
+from domain.model.game_server import GameServer  # noqa: E402
+from domain.service.game_service import TicTakToeGameService  # noqa: E402
+from web.authentication.password_hasher import PasswordHasher, PasswordHasherBusy  # noqa: E402
+
+DEFAULT_METHODS = ('scrypt:32768:8:1', 'scrypt:16384:8:1', 'pbkdf2:sha256:600000', 'pbkdf2:sha256:200000')
+PASSWORD = 'benchmark-password'
+
+
+def percentile(values, fraction):
+    """Перцентиль отсортированного списка (ближайший ранг)."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def measure_method(method, repeat):
+    """Медианное время хэширования и проверки пароля методом method в миллисекундах."""
+    hash_times, verify_times = [], []
+    password_hash = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        password_hash = generate_password_hash(PASSWORD, method=method)
+        hash_times.append(time.perf_counter() - started)
+        started = time.perf_counter()
+        check_password_hash(password_hash, PASSWORD)
+        verify_times.append(time.perf_counter() - started)
+    return {'hash_ms': statistics.median(hash_times) * 1000, 'verify_ms': statistics.median(verify_times) * 1000}
+
+
+class GameEventProbe:
+    """Поток, который обрабатывает «события игры» и записывает время обработки каждого."""
+
+    def __init__(self, interval=0.002):
+        self.interval = interval
+        self.latencies = []
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        game_server = GameServer(rows=7, cols=7, current_player1='player', status=201)
+        self._service = TicTakToeGameService(game_server)
+
+    def _run(self):
+        while not self._stop.is_set():
+            started = time.perf_counter()
+            for _ in range(20):
+                self._service.check_winner()
+            self.latencies.append(time.perf_counter() - started)
+            time.sleep(self.interval)
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._stop.set()
+        self._thread.join()
+
+    def summary(self):
+        values = sorted(self.latencies)
+        return {'events': len(values), 'p50_ms': percentile(values, 0.50) * 1000,
+                'p99_ms': percentile(values, 0.99) * 1000, 'max_ms': values[-1] * 1000} if values else {}
+
+
+def run_storm(storm, verify):
+    """Выполнить storm одновременных проверок пароля функцией verify, вернуть отчет."""
+    results = {'ok': 0, 'rejected': 0}
+    lock = threading.Lock()
+
+    def login():
+        try:
+            verify()
+            outcome = 'ok'
+        except PasswordHasherBusy:
+            outcome = 'rejected'
+        with lock:
+            results[outcome] += 1
+
+    threads = [threading.Thread(target=login) for _ in range(storm)]
+    with GameEventProbe() as probe:
+        time.sleep(0.05)  # Задержки событий игры без нагрузки попадают в начало замера
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+    return {**results, 'elapsed_s': elapsed, 'game_events': probe.summary()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Бенчмарк хэширования паролей')
+    parser.add_argument('--methods', nargs='*', default=DEFAULT_METHODS, help='Методы хэширования (формат werkzeug)')
+    parser.add_argument('--repeat', type=int, default=5, help='Замеров на каждый метод')
+    parser.add_argument('--storm', type=int, default=32, help='Количество одновременных входов')
+    parser.add_argument('--workers', type=int, default=2, help='Потоков в пуле хэширования')
+    parser.add_argument('--max-pending', type=int, default=32, help='Размер очереди пула хэширования')
+    parser.add_argument('--output', help='Файл для результатов в JSON (по умолчанию — stdout)')
+    args = parser.parse_args(argv)
+
+    report = {'methods': {}, 'storm': {}}
+    for method in args.methods:
+        report['methods'][method] = measure_method(method, args.repeat)
+        print(f'{method:30s} hash {report["methods"][method]["hash_ms"]:8.1f} ms  '
+              f'verify {report["methods"][method]["verify_ms"]:8.1f} ms', file=sys.stderr)
+
+    method = args.methods[0]
+    password_hash = generate_password_hash(PASSWORD, method=method)
+    report['storm']['method'] = method
+    report['storm']['inline'] = run_storm(args.storm, lambda: check_password_hash(password_hash, PASSWORD))
+    hasher = PasswordHasher(method=method, max_workers=args.workers, max_pending=args.max_pending)
+    try:
+        report['storm']['pool'] = run_storm(args.storm, lambda: hasher.verify(password_hash, PASSWORD))
+    finally:
+        hasher.shutdown()
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            output.write(text + '\n')
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
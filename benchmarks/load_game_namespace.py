@@ -0,0 +1,274 @@
+"""
+Нагрузочный тест пространства имен Socket.IO /game.
+
+Запускает приложение в этом же процессе на SQLite (вместо PostgreSQL) и ведет тысячи игр
+одновременно через настоящие обработчики событий join_game, make_move, restart_game и save_game
+(клиенты — тестовые клиенты Flask-SocketIO, сеть не используется, поэтому замеряется сам сервер).
+Игры создаются через HTTP-маршрут /game/start-game, половина игр — против машины, половина — PvP.
+
+Запуск из корня репозитория:
+    python benchmarks/load_game_namespace.py --games 2000 --concurrency 32
+    python benchmarks/load_game_namespace.py --games 500 --output load.json
+
+Отчет: пропускная способность (событий в секунду), p50/p95/p99 задержки каждого события
+(для игры с машиной — и время до ответа машины), количество активных игр в реестре
+и прирост памяти процесса и выделенной Python памяти за время теста.
+"""
+import argparse
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+from itertools import count
+
+SRC_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+
+def percentile(values, fraction):
+    """Перцентиль отсортированного списка (ближайший ранг)."""
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def received_events(client):
+    """Имена событий, полученных клиентом (события из пакетов 'batch' разворачиваются)."""
+    names = []
+    for packet in client.get_received('/game'):
+        if packet['name'] == 'batch':
+            names.extend(event for event, _ in packet['args'][0]['events'])
+        else:
+            names.append(packet['name'])
+    return names
+
+
+class LatencyRecorder:
+    """Задержки по видам событий (потокобезопасно)."""
+
+    def __init__(self):
+        self._latencies = {}
+        self._lock = threading.Lock()
+
+    def add(self, name, seconds):
+        with self._lock:
+            self._latencies.setdefault(name, []).append(seconds)
+
+    def summary(self):
+        """Количество и p50/p95/p99/max в миллисекундах по каждому виду событий."""
+        result = {}
+        with self._lock:
+            for name, values in sorted(self._latencies.items()):
+                values = sorted(values)
+                result[name] = {
+                    'count': len(values),
+                    'p50_ms': percentile(values, 0.50) * 1000,
+                    'p95_ms': percentile(values, 0.95) * 1000,
+                    'p99_ms': percentile(values, 0.99) * 1000,
+                    'max_ms': values[-1] * 1000,
+                }
+        return result
+
+    def total(self):
+        with self._lock:
+            return sum(len(values) for name, values in self._latencies.items() if name != 'machine_reply')
+
+
+class SimulatedGame:
+    """Игра, которую ведут один (против машины) или два (PvP) тестовых клиента."""
+
+    def __init__(self, harness, game_id, game_type, owner, guest=None):
+        self.harness = harness
+        self.game_id = game_id
+        self.game_type = game_type
+        self.owner = owner  # (uuid игрока, клиент Socket.IO)
+        self.guest = guest
+        self.rng = random.Random(game_id)
+
+    def emit(self, client, event, data):
+        """Отправить событие и записать время его обработки сервером."""
+        started = time.perf_counter()
+        client.emit(event, data, namespace='/game')
+        self.harness.latencies.add(event, time.perf_counter() - started)
+
+    def wait_machine(self, client, started, timeout):
+        """
+        Дождаться ответа машины, если ход машины поставлен в очередь (событие block_input).
+        Время ответа отсчитывается от started — момента отправки хода игрока.
+
+        :return: False, если машина не ответила за timeout.
+        """
+        names = received_events(client)
+        if 'block_input' not in names:
+            return True  # Ход игрока закончил партию или ход не принят
+        deadline = started + timeout
+        while 'unblock_input' not in names:
+            if time.perf_counter() > deadline:
+                self.harness.timeouts += 1
+                return False
+            time.sleep(0.001)
+            names = received_events(client)
+        self.harness.latencies.add('machine_reply', time.perf_counter() - started)
+        return True
+
+    def play(self, rounds, save_every):
+        """Сыграть rounds партий: подключение, ходы до конца партии, сохранение, перезапуск."""
+        owner_id, owner_client = self.owner
+        self.emit(owner_client, 'join_game', {'game_id': self.game_id})
+        if self.guest:
+            self.emit(self.guest[1], 'join_game', {'game_id': self.game_id, 'guest': self.guest[0]})
+
+        for round_number in range(rounds):
+            moves = 0
+            while True:
+                # Состояние берется из реестра только чтобы выбрать допустимый ход, это время не замеряется
+                game_server = self.harness.registry.get(self.game_id)
+                if game_server is None or game_server.status not in (201, 202):
+                    break
+                player_id, client = self.owner if game_server.status == 201 or not self.guest else self.guest
+                row, col = self.rng.choice(game_server.board.empty_cells())
+                client.get_received('/game')  # События, накопившиеся до хода, не нужны
+                started = time.perf_counter()
+                self.emit(client, 'make_move', {'game_id': self.game_id, 'player_id': player_id,
+                                                'row': row, 'col': col})
+                moves += 1
+                if self.game_type == 1 and not self.wait_machine(client, started, self.harness.machine_timeout):
+                    break
+                if save_every and moves % save_every == 0:
+                    self.emit(client, 'save_game', {'game_id': self.game_id})
+            if round_number + 1 < rounds:
+                self.emit(owner_client, 'restart_game', {'game_id': self.game_id})
+
+
+class LoadHarness:
+    """Приложение в этом процессе, игроки и клиенты для нагрузочного теста."""
+
+    def __init__(self, machine_timeout):
+        import tictaktoe  # Импорт запускает приложение: создает таблицы, реестр, пул процессов
+        from werkzeug.security import generate_password_hash
+
+        self.tictaktoe = tictaktoe
+        self.app = tictaktoe.app
+        self.socketio = tictaktoe.socketio
+        self.container = tictaktoe.container
+        self.registry = self.container.game_registry()
+        self.latencies = LatencyRecorder()
+        self.machine_timeout = machine_timeout
+        self.timeouts = 0
+        self._password_hash = generate_password_hash('load-test')  # Один хэш на всех игроков
+        self._user_numbers = count()
+        self._http_clients = {}
+
+    def new_player(self):
+        """Создать игрока в БД и подключить его клиент Socket.IO, вернуть (uuid игрока, клиент)."""
+        login = f'load-{os.getpid()}-{next(self._user_numbers)}'
+        with self.app.app_context():
+            service = self.container.data_service()
+            service.save_user(login, self._password_hash)
+            user_uuid = str(service.get_user(login).uuid)
+        http_client = self.app.test_client()
+        with http_client.session_transaction() as session:
+            session['user_uuid'] = user_uuid  # Вход без проверки пароля: хэширование здесь не замеряется
+        self._http_clients[user_uuid] = http_client
+        return user_uuid, self.socketio.test_client(self.app, namespace='/game', flask_test_client=http_client)
+
+    def start_game(self, user_uuid, game_type):
+        """Создать игру через HTTP-маршрут и вернуть ее UUID."""
+        http_client = self._http_clients[user_uuid]
+        started = time.perf_counter()
+        response = http_client.get(f'/game/start-game?game_type={game_type}')
+        self.latencies.add('http_start_game', time.perf_counter() - started)
+        return response.headers['Location'].rsplit('/', 1)[1]
+
+    def create_players(self, games, machine_share):
+        """Игроки для игр: (тип игры, хозяин, гость или None), доля игр с машиной — machine_share."""
+        players = []
+        for index in range(games):
+            game_type = 1 if index < games * machine_share else 2
+            players.append((game_type, self.new_player(), self.new_player() if game_type == 2 else None))
+        return players
+
+    def create_games(self, players):
+        """Создать игры для игроков из create_players."""
+        return [SimulatedGame(self, self.start_game(owner[0], game_type), game_type, owner, guest)
+                for game_type, owner, guest in players]
+
+
+def rss_kib():
+    """Максимальный размер резидентной памяти процесса в КиБ."""
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return usage // 1024 if sys.platform == 'darwin' else usage
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Нагрузочный тест пространства имен Socket.IO /game')
+    parser.add_argument('--games', type=int, default=1000, help='Количество одновременных игр')
+    parser.add_argument('--concurrency', type=int, default=32, help='Количество потоков-клиентов')
+    parser.add_argument('--rounds', type=int, default=2, help='Партий в каждой игре (между ними restart_game)')
+    parser.add_argument('--save-every', type=int, default=4, help='Сохранять игру каждые N ходов (0 — не сохранять)')
+    parser.add_argument('--machine-share', type=float, default=0.5, help='Доля игр против машины')
+    parser.add_argument('--machine-timeout', type=float, default=10.0, help='Сколько секунд ждать ход машины')
+    parser.add_argument('--database-url', help='Адрес БД (по умолчанию — файл SQLite во временном каталоге)')
+    parser.add_argument('--output', help='Файл для отчета в JSON (по умолчанию — stdout)')
+    args = parser.parse_args(argv)
+    output_path = os.path.abspath(args.output) if args.output else None
+
+    # Файлы приложения (БД, журнал ходов, хранилище игр) создаются во временном каталоге
+    workdir = tempfile.mkdtemp(prefix='tictaktoe-load-')
+    os.chdir(workdir)
+    os.environ.setdefault('DATABASE_URL', args.database_url or f'sqlite:///{os.path.join(workdir, "games.sqlite3")}')
+    sys.path.insert(0, os.path.abspath(SRC_PATH))
+
+    harness = LoadHarness(args.machine_timeout)
+    players = harness.create_players(args.games, args.machine_share)
+    tracemalloc.start()
+    rss_before = rss_kib()
+    # Прирост памяти при создании игр (клиенты уже созданы) — память, которую занимают активные игры
+    simulated = harness.create_games(players)
+    games_created = len(harness.registry)
+    traced_games = tracemalloc.get_traced_memory()[0]
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for future in [pool.submit(game.play, args.rounds, args.save_every) for game in simulated]:
+            future.result()
+    elapsed = time.perf_counter() - started
+    harness.container.game_save_queue().flush()
+
+    events = harness.latencies.total()
+    report = {
+        'config': {key: value for key, value in vars(args).items() if key != 'output'},
+        'database_url': os.environ['DATABASE_URL'],
+        'elapsed_s': elapsed,
+        'events': events,
+        'throughput_events_per_s': events / elapsed if elapsed else None,
+        'machine_timeouts': harness.timeouts,
+        'latency': harness.latencies.summary(),
+        'active_games': {
+            'after_create': games_created,
+            'after_run': len(harness.registry),
+            'traced_bytes_per_game': traced_games / games_created if games_created else None,
+        },
+        'memory': {
+            'max_rss_growth_kib': rss_kib() - rss_before,
+            'traced_growth_bytes': tracemalloc.get_traced_memory()[0],
+        },
+    }
+    tracemalloc.stop()
+
+    text = json.dumps(report, indent=2)
+    if output_path:
+        with open(output_path, 'w', encoding='utf-8') as output:
+            output.write(text + '\n')
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,66 @@
+import heapq
+import time
+from threading import Lock
+
+
+class ExpiringSetFull(Exception):
+    """Во множестве нет места: записи до истечения срока не вытесняются."""
+
+
+class ExpiringSet:
+    """
+    Множество ключей, у каждого из которых свой срок (например, jti отозванных токенов до конца срока жизни токена).
+    В отличие от LruTtlCache записи не вытесняются при переполнении: сначала удаляются истекшие записи,
+    и если места все равно нет, новая запись отклоняется (ExpiringSetFull). Потокобезопасно.
+
+    Атрибуты:
+        max_size: Максимальное количество записей.
+    """
+
+    def __init__(self, max_size=100000, clock=time.time):
+        """
+        Инициализация множества.
+
+        :param max_size: Максимальное количество записей.
+        :param clock: Источник времени (сроки записей задаются в тех же единицах).
+        """
+        self.max_size = max_size or 100000
+        self._clock = clock
+        self._entries = {}  # key -> expires_at
+        self._expirations = []  # Куча (expires_at, key) для удаления истекших записей
+        self._lock = Lock()
+
+    def add(self, key, expires_at):
+        """
+        Добавить ключ до момента expires_at.
+
+        :return: False, если ключ уже есть (и еще не истек).
+        :raises ExpiringSetFull: Если все места заняты неистекшими записями.
+        """
+        with self._lock:
+            now = self._clock()
+            current = self._entries.get(key)
+            if current is not None and current > now:
+                return False
+            if key not in self._entries and len(self._entries) >= self.max_size:
+                self._purge(now)
+                if len(self._entries) >= self.max_size:
+                    raise ExpiringSetFull("Нет места для новой записи")
+            self._entries[key] = expires_at
+            heapq.heappush(self._expirations, (expires_at, key))
+            return True
+
+    def _purge(self, now):
+        """Удалить истекшие записи (вызывается под блокировкой)."""
+        while self._expirations and self._expirations[0][0] <= now:
+            expires_at, key = heapq.heappop(self._expirations)
+            if self._entries.get(key) == expires_at:
+                del self._entries[key]
+
+    def __contains__(self, key):
+        with self._lock:
+            expires_at = self._entries.get(key)
+            return expires_at is not None and expires_at > self._clock()
+
+    def __len__(self):
+        return len(self._entries)
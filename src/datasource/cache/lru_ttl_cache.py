@@ -0,0 +1,84 @@
+import time
+from collections import OrderedDict
+from threading import Lock
+
+
+class LruTtlCache:
+    """
+    Кэш ограниченного размера: при переполнении вытесняется запись, к которой дольше всего не обращались,
+    запись старше ttl считается отсутствующей. Потокобезопасен.
+
+    Атрибуты:
+        max_size: Максимальное количество записей.
+        ttl: Время жизни записи в секундах (None — не ограничено).
+        hits: Количество обращений, для которых запись нашлась.
+        misses: Количество обращений, для которых записи не было или она устарела.
+        evictions: Количество записей, вытесненных при переполнении.
+    """
+
+    def __init__(self, max_size=1024, ttl=60, clock=time.monotonic):
+        """
+        Инициализация кэша.
+
+        :param max_size: Максимальное количество записей.
+        :param ttl: Время жизни записи в секундах (None — не ограничено).
+        :param clock: Источник времени.
+        """
+        self.max_size = max_size or 1024
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (value, expires_at)
+        self._lock = Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Значение по ключу или default, если записи нет или она устарела."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[1] is None or entry[1] > self._clock()):
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return default
+
+    def put(self, key, value):
+        """Добавить или заменить запись."""
+        expires_at = self._clock() + self.ttl if self.ttl is not None else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, *keys):
+        """Удалить записи по ключам (отсутствующие ключи пропускаются)."""
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def clear(self):
+        """Удалить все записи."""
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """Счетчики кэша и доля попаданий (hit_rate от 0 до 1)."""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / requests if requests else 0.0,
+            }
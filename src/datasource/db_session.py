@@ -0,0 +1,90 @@
+from contextlib import contextmanager
+
+from sqlalchemy.engine import make_url
+
+
+# Параметры, которые есть только у пула QueuePool
+QUEUE_POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout')
+
+
+def engine_options(url=None, pool_size=None, max_overflow=None, pool_timeout=None, pool_recycle=None,
+                   pool_pre_ping=None):
+    """
+    Параметры движка SQLAlchemy и пула соединений.
+    Незаданные (None) параметры не передаются, и для них действуют значения по умолчанию СУБД.
+    Для SQLite параметры QueuePool не передаются: SQLAlchemy выбирает для нее другой пул
+    (например, SingletonThreadPool для 'sqlite://'), который их не принимает.
+
+    :param url: Адрес БД (по нему определяется СУБД; None — параметры передаются все).
+    :param pool_size: Количество постоянно открытых соединений пула.
+    :param max_overflow: Сколько соединений можно открыть сверх pool_size при пиковой нагрузке.
+    :param pool_timeout: Сколько секунд ждать свободное соединение, прежде чем вернуть ошибку.
+    :param pool_recycle: Через сколько секунд соединение пересоздается (до таймаута простоя на стороне СУБД).
+    :param pool_pre_ping: Проверять соединение перед выдачей из пула (разорванные соединения пересоздаются).
+    :return: Словарь engine_options для Flask-SQLAlchemy.
+    """
+    options = {
+        'pool_size': pool_size,
+        'max_overflow': max_overflow,
+        'pool_timeout': pool_timeout,
+        'pool_recycle': pool_recycle,
+        'pool_pre_ping': pool_pre_ping,
+    }
+    if url is not None and make_url(url).get_backend_name() == 'sqlite':
+        options = {name: value for name, value in options.items() if name not in QUEUE_POOL_OPTIONS}
+    return {name: value for name, value in options.items() if value is not None}
+
+
+@contextmanager
+def session_scope(db):
+    """
+    Область жизни сессии БД для кода вне HTTP-запроса (обработчики Socket.IO, фоновые задачи).
+    При выходе незавершенная транзакция откатывается, сессия закрывается и соединение возвращается в пул.
+
+    :param db: Объект SQLAlchemy (Flask-SQLAlchemy).
+    """
+    try:
+        yield db.session
+    finally:
+        db.session.remove()
+
+
+# Асинхронные драйверы для адресов БД приложения (режим tictaktoe_async)
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+
+def async_database_url(url):
+    """
+    Адрес БД с асинхронным драйвером: 'postgresql://...' -> 'postgresql+asyncpg://...'.
+    Адрес, в котором драйвер уже указан, не меняется.
+    """
+    scheme, separator, rest = url.partition('://')
+    return f'{ASYNC_DRIVERS.get(scheme, scheme)}{separator}{rest}'
+
+
+def create_async_session_factory(url, **options):
+    """
+    Фабрика асинхронных сессий БД (SQLAlchemy asyncio) со своим пулом соединений.
+    Драйвер (asyncpg, aiosqlite) нужен только в асинхронном режиме и загружается при первом подключении.
+
+    :param url: Адрес БД с асинхронным драйвером.
+    :param options: Параметры пула, как у engine_options (None не передаются, для SQLite — только общие для всех пулов).
+    :return: async_sessionmaker; объекты после commit не сбрасываются, их можно читать вне сессии.
+    """
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    engine = create_async_engine(url, **engine_options(url, **options))
+    return async_sessionmaker(engine, expire_on_commit=False)
+
+
+async def dispose_async_session_factory(session_factory):
+    """
+    Закрыть соединения пула асинхронной фабрики сессий (при остановке сервера).
+    Драйвер aiosqlite держит для каждого соединения свой поток, и пока соединения открыты, процесс не завершается.
+
+    :param session_factory: Фабрика, созданная create_async_session_factory.
+    """
+    await session_factory.kw['bind'].dispose()
@@ -0,0 +1,231 @@
+import base64
+import fcntl
+import itertools
+import json
+import os
+import queue
+import threading
+
+from datasource.mapper.game_data_mapper import GameDataMapper
+from domain.model.game_server import GameServer
+
+
+class MoveJournal:
+    """
+    Журнал ходов активных игр: файл, в который только дописываются короткие записи.
+    Ход игры — одна запись (клетка, маркер, статус после хода); создание, загрузка, перезапуск
+    игры и подключение гостя — снимок игры (поле в формате GameDataMapper.pack_board);
+    вытеснение игры из реестра — запись об удалении. Записи пишет служебный поток,
+    обработчики только ставят их в очередь.
+    После compact_every записей журнал сжимается: переписывается снимками оставшихся игр.
+    При старте recover() восстанавливает игры, которые были активны, когда воркер остановился.
+    Если в пути есть {slot}, каждый процесс занимает свой номер журнала (см. path),
+    поэтому воркеры не пишут в один файл и не восстанавливают игры друг друга.
+
+    Атрибуты:
+        path_template: Путь к файлу журнала, может содержать {slot} — номер журнала процесса.
+        compact_every: Через сколько записей журнал сжимается (None — не сжимается автоматически).
+        fsync: Сбрасывать записанное на диск после каждой пачки записей (переживет и сбой ОС).
+    """
+
+    # Виды записей журнала
+    SNAPSHOT = 's'
+    MOVE = 'm'
+    DROP = 'd'
+
+    # Максимальное количество номеров журнала (процессов, одновременно работающих с журналами в одном каталоге)
+    MAX_SLOTS = 1024
+
+    def __init__(self, path, compact_every=10000, fsync=False):
+        """
+        Инициализация журнала.
+
+        :param path: Путь к файлу журнала ({slot} заменяется номером журнала процесса).
+        :param compact_every: Через сколько записей журнал сжимается.
+        :param fsync: Сбрасывать записанное на диск после каждой пачки записей.
+        """
+        self.path_template = path
+        self.compact_every = compact_every
+        self.fsync = fsync
+        self._queue = queue.SimpleQueue()
+        self._file_lock = threading.Lock()
+        self._worker = None
+        self._worker_lock = threading.Lock()
+        self._closed = False  # После shutdown записи пишутся сразу, без служебного потока
+        self._since_compaction = 0
+        self._path = None
+        self._slot_pid = None  # Процесс, который занял номер журнала
+        self._slot_fd = None
+
+    @property
+    def path(self):
+        """
+        Путь к файлу журнала этого процесса.
+        Номер журнала ({slot}) занимается при первом обращении: процесс держит блокировку flock на файле
+        <журнал>.lock, пока не завершится. Два работающих процесса не получают один номер,
+        а перезапущенный воркер занимает освободившийся номер и восстанавливает игры упавшего.
+        """
+        if self._slot_pid != os.getpid():  # Первое обращение или процесс создан fork после него
+            self._path = self._claim_slot()
+            self._slot_pid = os.getpid()
+        return self._path
+
+    def _claim_slot(self):
+        """Занять первый свободный номер журнала и вернуть путь к его файлу."""
+        if self._slot_fd is not None:
+            os.close(self._slot_fd)  # Копия дескриптора родителя, блокировка остается у родителя
+            self._slot_fd = None
+        if '{slot}' not in self.path_template:
+            return self.path_template
+        for slot in itertools.islice(itertools.count(), self.MAX_SLOTS):
+            path = self.path_template.format(slot=slot)
+            fd = os.open(f'{path}.lock', os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                os.close(fd)
+                continue
+            self._slot_fd = fd
+            return path
+        raise RuntimeError(f"Все номера журнала ходов заняты: {self.path_template}")
+
+    def record_snapshot(self, game_server):
+        """Записать полное состояние игры (создание, загрузка, перезапуск, смена игроков)."""
+        self._append(self.snapshot_record(game_server))
+
+    def record_move(self, game_server, row, col):
+        """Записать ход, уже поставленный на поле игры (после проверки состояния игры)."""
+        self._append({'t': self.MOVE, 'g': game_server.UUID, 'r': row, 'c': col,
+                      'm': game_server.board.get_cell(row, col), 'st': game_server.status})
+
+    def record_drop(self, game_id):
+        """Записать, что игра больше не активна (вытеснена или удалена из реестра)."""
+        self._append({'t': self.DROP, 'g': game_id})
+
+    @staticmethod
+    def snapshot_record(game_server):
+        """Запись-снимок игры."""
+        board = game_server.board
+        return {'t': MoveJournal.SNAPSHOT, 'g': game_server.UUID, 'rows': board.rows, 'cols': board.cols,
+                'b': base64.b64encode(GameDataMapper.pack_board(board)).decode(),
+                'gt': game_server.game_type, 'st': game_server.status,
+                'p1': game_server.current_player1, 'p2': game_server.current_player2, 'q': game_server.board_seq}
+
+    @staticmethod
+    def game_from_snapshot(record):
+        """Игра из записи-снимка."""
+        game_server = GameServer(rows=record['rows'], cols=record['cols'], game_uuid=record['g'],
+                                 game_type=record['gt'], current_player1=record['p1'],
+                                 current_player2=record['p2'], status=record['st'])
+        game_server.board = GameDataMapper.unpack_board(record['rows'], record['cols'],
+                                                        base64.b64decode(record['b']))
+        game_server.board_seq = record.get('q', 0)
+        return game_server
+
+    def recover(self):
+        """
+        Восстановить активные игры по журналу (снимок игры и ходы после него).
+
+        :return: Словарь game_id -> GameServer.
+        """
+        with self._file_lock:
+            return self._replay()
+
+    def compact(self):
+        """Переписать журнал снимками активных игр (замена файла атомарна)."""
+        with self._file_lock:
+            games = self._replay()
+            temp_path = f'{self.path}.compact'
+            with open(temp_path, 'w', encoding='utf-8') as journal:
+                for game_server in games.values():
+                    journal.write(json.dumps(self.snapshot_record(game_server)) + '\n')
+                journal.flush()
+                os.fsync(journal.fileno())
+            os.replace(temp_path, self.path)
+            self._since_compaction = 0
+
+    def flush(self):
+        """Дождаться записи всех поставленных в очередь записей."""
+        if self._worker is None:
+            return
+        done = threading.Event()
+        self._queue.put(done)
+        done.wait()
+
+    def shutdown(self):
+        """
+        Записать оставшиеся записи и остановить служебный поток.
+        Записи, поступившие после остановки (например, из других обработчиков atexit), пишутся в файл сразу.
+        """
+        with self._worker_lock:
+            worker, self._worker = self._worker, None
+            self._closed = True
+        if worker is not None:
+            self._queue.put(None)
+            worker.join()
+
+    def _append(self, record):
+        """Поставить запись в очередь служебного потока (после shutdown — записать в вызывающем потоке)."""
+        with self._worker_lock:
+            if not self._closed:
+                if self._worker is None:
+                    # Служебный поток запускается при первой записи
+                    self._worker = threading.Thread(target=self._run, name='move-journal', daemon=True)
+                    self._worker.start()
+                # Под блокировкой: запись не может попасть в очередь после признака остановки
+                self._queue.put(record)
+                return
+        self._write([record])
+
+    def _run(self):
+        """Цикл служебного потока: дописать в файл все накопившиеся записи одной пачкой."""
+        while True:
+            items = [self._queue.get()]
+            while True:
+                try:
+                    items.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            records = [item for item in items if isinstance(item, dict)]
+            if records:
+                self._write(records)
+            for item in items:
+                if isinstance(item, threading.Event):
+                    item.set()
+            if None in items:
+                return
+            if self.compact_every and self._since_compaction >= self.compact_every:
+                self.compact()
+
+    def _write(self, records):
+        """Дописать записи в конец файла."""
+        with self._file_lock:
+            with open(self.path, 'a', encoding='utf-8') as journal:
+                journal.write(''.join(json.dumps(record) + '\n' for record in records))
+                journal.flush()
+                if self.fsync:
+                    os.fsync(journal.fileno())
+            self._since_compaction += len(records)
+
+    def _replay(self):
+        """Прочитать журнал и собрать состояние активных игр (вызывается под блокировкой файла)."""
+        games = {}
+        if not os.path.exists(self.path):
+            return games
+        with open(self.path, encoding='utf-8') as journal:
+            for line in journal:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue  # Запись, оборванная при сбое
+                game_id = record.get('g')
+                if record.get('t') == self.SNAPSHOT:
+                    games[game_id] = self.game_from_snapshot(record)
+                elif record.get('t') == self.DROP:
+                    games.pop(game_id, None)
+                elif record.get('t') == self.MOVE and game_id in games:
+                    game_server = games[game_id]
+                    game_server.board.set_cell(record['r'], record['c'], record['m'])
+                    game_server.status = record['st']
+                    game_server.board_seq += 1
+        return games
@@ -1,61 +1,124 @@
 import json
+import uuid
+from domain.model.board_symmetry import canonical_signature
+from domain.model.game_matrix import GameMatrix
 from domain.model.game_server import GameServer
 
 
 class GameDataMapper:
     """Переносит данные из БД в модель игры и обратно"""
+
+    # Форматы хранения поля в БД (столбец board_format)
+    BOARD_FORMAT_JSON = 1  # Матрица в JSON в столбце board (старые записи)
+    BOARD_FORMAT_PACKED = 2  # Маски игроков в байтах в столбце board_data, размеры в board_rows и board_cols
+    CURRENT_BOARD_FORMAT = BOARD_FORMAT_PACKED
+
     @staticmethod
     def game_from_database(db, game_uuid, saved_games):
         """Возвращает игру из БД по uuid и переводит в формат модели бизнес-логики"""
         game_data = db.session.execute(db.select(saved_games).filter_by(game_uuid=game_uuid)).scalar_one_or_none()
         if not game_data:
             return None
+        return GameDataMapper.game_from_row(game_data)
 
-            # Преобразуем строковое представление доски в матрицу
-        board_matrix = json.loads(game_data.board)  # Десериализация JSON
+    @staticmethod
+    def game_from_row(game_data):
+        """Переводит уже полученную из БД запись игры (модель или строку результата) в формат модели бизнес-логики"""
+        board = GameDataMapper.board_from_row(game_data)
         # Создаем объект GameServer
         game_server = GameServer(
-            rows=len(board_matrix),
-            cols=len(board_matrix[0]),
+            rows=board.rows,
+            cols=board.cols,
             game_uuid=str(game_data.game_uuid),
             game_type=game_data.game_type,
-            current_player1=str(game_data.player_owner_uuid),
-            current_player2=str(game_data.player_guest_uuid),
-            status=int(game_data.game_status),
+            current_player1=GameDataMapper.uuid_to_str(game_data.player_owner_uuid),
+            current_player2=GameDataMapper.uuid_to_str(game_data.player_guest_uuid),
+            status=int(game_data.game_status) if game_data.game_status is not None else None,
         )
 
         # Устанавливаем дополнительные атрибуты
-        game_server.board.game_matrix = board_matrix
+        game_server.board = board
 
         return game_server
 
+    @staticmethod
+    def board_from_row(game_data):
+        """Восстанавливает поле из записи игры в любом из форматов хранения"""
+        if game_data.board_format == GameDataMapper.BOARD_FORMAT_PACKED:
+            return GameDataMapper.unpack_board(game_data.board_rows, game_data.board_cols, game_data.board_data)
+        # Старый формат: строковое представление доски в JSON
+        board_matrix = json.loads(game_data.board)  # Десериализация JSON
+        board = GameMatrix(len(board_matrix), len(board_matrix[0]))
+        board.game_matrix = board_matrix
+        return board
+
+    @staticmethod
+    def pack_board(board):
+        """Упаковывает поле в байты: маска первого игрока, затем маска второго, по ceil(клеток / 8) байт каждая"""
+        size = (board.rows * board.cols + 7) // 8
+        return board.player_one_mask.to_bytes(size, 'little') + board.player_two_mask.to_bytes(size, 'little')
+
+    @staticmethod
+    def unpack_board(rows, cols, data):
+        """Восстанавливает поле из байтов pack_board"""
+        size = (rows * cols + 7) // 8
+        board = GameMatrix(rows, cols)
+        board.player_one_mask = int.from_bytes(data[:size], 'little')
+        board.player_two_mask = int.from_bytes(data[size:2 * size], 'little')
+        return board
+
+    @staticmethod
+    def board_to_row(board):
+        """Значения столбцов поля в текущем формате хранения"""
+        return {
+            'board': None,
+            'board_format': GameDataMapper.CURRENT_BOARD_FORMAT,
+            'board_rows': board.rows,
+            'board_cols': board.cols,
+            'board_data': GameDataMapper.pack_board(board),
+        }
+
+    @staticmethod
+    def uuid_to_str(value):
+        """UUID из БД в строку (None остается None, а не строкой 'None')."""
+        return str(value) if value is not None else None
+
+    @staticmethod
+    def str_to_uuid(value):
+        """Строку UUID в UUID для столбцов UUID(as_uuid=True) (None остается None)."""
+        if value is None or isinstance(value, uuid.UUID):
+            return value
+        return uuid.UUID(str(value))
+
+    @staticmethod
+    def game_to_row(game_server):
+        """Значения столбцов записи игры в БД (для вставки или обновления одним запросом)."""
+        return {
+            'game_uuid': game_server.UUID,
+            **GameDataMapper.board_to_row(game_server.board),
+            'player_owner_uuid': GameDataMapper.str_to_uuid(game_server.current_player1),
+            'player_guest_uuid': GameDataMapper.str_to_uuid(game_server.current_player2),
+            'game_status': game_server.status,
+            'game_type': game_server.game_type,
+            'board_signature': GameDataMapper.board_signature(game_server),
+        }
 
     @staticmethod
     def game_to_database(game_server, saved_games):
         """Сохранят текущую игру из БД, переводит формат модели бизнес-логики в формат БД"""
-        board_json = json.dumps(game_server.board.game_matrix) # Сериализация JSON
-
-        return saved_games(
-            game_uuid=game_server.UUID,
-            board=board_json,
-            player_owner_uuid=game_server.current_player1,
-            player_guest_uuid=game_server.current_player2,
-            game_status=game_server.status if game_server.status is not None else None,
-            game_type=game_server.game_type,
-        )
+        return saved_games(**GameDataMapper.game_to_row(game_server))
+
+    @staticmethod
+    def board_signature(game_server):
+        """Ключ позиции игры, одинаковый для всех поворотов и отражений поля."""
+        return canonical_signature(game_server.board)
 
     @staticmethod
     def update_game_in_database(game_server, saved_games):
         """Обновляет существующую запись игры в формате БД."""
-        print("Starting update...")
-        board_json = json.dumps(game_server.board.game_matrix)
-
         # Обновление полей записи
-        saved_games.board = board_json
-        saved_games.player_owner_uuid = game_server.current_player1
-        saved_games.player_guest_uuid = game_server.current_player2
-        saved_games.game_status = game_server.status if game_server.status is not None else None
-        saved_games.game_type = game_server.game_type
+        for column, value in GameDataMapper.game_to_row(game_server).items():
+            setattr(saved_games, column, value)
 
         return saved_games  # Возвращаем обновленный объект (опционально)
 
@@ -1,4 +1,6 @@
-from sqlalchemy import ForeignKey
+import uuid
+from datetime import datetime, timezone
+from sqlalchemy import DateTime, ForeignKey, Index, LargeBinary
 from sqlalchemy.orm import Mapped, mapped_column
 from sqlalchemy.orm import DeclarativeBase
 from sqlalchemy.orm import relationship
@@ -6,13 +8,20 @@ from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 
 
+def utc_now():
+    """Текущее время в UTC (время сохранения задается приложением, чтобы формат был одинаков во всех СУБД)."""
+    return datetime.now(timezone.utc)
+
+
 def define_models(db):
     """Создание классов, представляющих таблицы в БД"""
     class Players(db.Model):
         id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
         login: Mapped[str] = mapped_column(unique=True, nullable=False)
         password: Mapped[str] = mapped_column(nullable=False)
-        uuid: Mapped[str] = mapped_column(UUID(as_uuid=True), unique=True, nullable=False, server_default=func.gen_random_uuid())
+        # UUID задается приложением (gen_random_uuid() остается значением по умолчанию для вставок в обход модели)
+        uuid: Mapped[str] = mapped_column(UUID(as_uuid=True), unique=True, nullable=False,
+                                          default=uuid.uuid4, server_default=func.gen_random_uuid())
 
     class Profiles(db.Model):
         id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
@@ -24,14 +33,38 @@ def define_models(db):
     class SavedGames(db.Model):
         id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
         game_uuid: Mapped[str] = mapped_column(unique=True, nullable=False)
-        board: Mapped[str] = mapped_column(nullable=False)
+        # Поле в JSON (формат 1, старые записи); в формате 2 поле хранится в board_data
+        board: Mapped[str] = mapped_column(nullable=True)
+        board_format: Mapped[int] = mapped_column(nullable=False, default=1, server_default='1')
+        board_rows: Mapped[int] = mapped_column(nullable=True)
+        board_cols: Mapped[int] = mapped_column(nullable=True)
+        board_data: Mapped[bytes] = mapped_column(LargeBinary, nullable=True)
         game_status: Mapped[int] = mapped_column(nullable=True)
         player_owner_uuid: Mapped[str] = mapped_column(ForeignKey("players.uuid"), nullable=True)
         player_owner: Mapped["Players"] = relationship("Players", foreign_keys=[player_owner_uuid])
         player_guest_uuid: Mapped[str] = mapped_column(ForeignKey("players.uuid"), nullable=True)
         player_guest: Mapped["Players"] = relationship("Players", foreign_keys=[player_guest_uuid])
         game_type: Mapped[int] = mapped_column(nullable=True)
+        # Ключ позиции с точностью до поворотов и отражений поля
+        board_signature: Mapped[str] = mapped_column(nullable=True, index=True)
+        created_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False,
+                                                     default=utc_now, server_default=func.now())
+        # Время последнего сохранения, по нему (и id) упорядочен список сохраненных игр
+        updated_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False,
+                                                     default=utc_now, server_default=func.now(), onupdate=utc_now)
+
+        # Индексы для постраничного списка игр игрока (хозяина или гостя) от новых к старым
+        __table_args__ = (
+            Index('ix_saved_games_owner_updated', 'player_owner_uuid', 'updated_at', 'id'),
+            Index('ix_saved_games_guest_updated', 'player_guest_uuid', 'updated_at', 'id'),
+        )
+
+    class RevokedTokens(db.Model):
+        """Отозванные токены обновления (общие для всех воркеров), запись нужна до истечения срока токена."""
+        id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+        jti: Mapped[str] = mapped_column(unique=True, nullable=False)
+        expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True), nullable=False, index=True)
 
-    return Players, Profiles, SavedGames
+    return Players, Profiles, SavedGames, RevokedTokens
 
 
@@ -0,0 +1,158 @@
+import time
+import zlib
+from contextlib import contextmanager
+from threading import Lock
+
+from datasource.registry.game_state_store import InMemoryGameStateStore
+
+
+class _Shard:
+    """Часть реестра со своей блокировкой и блокировками игр этого шарда."""
+
+    def __init__(self):
+        self.lock = Lock()
+        self.game_locks = {}  # game_id -> Lock
+
+
+class GameRegistry:
+    """
+    Реестр активных игр поверх хранилища состояния (GameStateStore).
+    Хранилище в памяти подходит для одного воркера, общее хранилище (например, SQLite)
+    позволяет запускать несколько воркеров: игра, созданная одним воркером, видна остальным.
+    Обработчики, которые меняют игру, работают с ней через checkout(): игра блокируется
+    в процессе и в хранилище, а изменения записываются обратно при выходе.
+    Игры, к которым долго не обращались, и самые старые игры при превышении
+    размера вытесняются; при вытеснении вызывается on_evict (например, сохранение в БД).
+
+    Атрибуты:
+        store: Хранилище состояния игр.
+        idle_ttl: Время в секундах, после которого неактивная игра вытесняется (None — не ограничено).
+        max_size: Максимальное количество игр в реестре (None — не ограничено).
+        on_evict: Функция on_evict(game_server), вызывается для каждой вытесненной игры.
+    """
+
+    def __init__(self, store=None, shards=16, idle_ttl=3600, max_size=10000, on_evict=None, clock=time.time):
+        """
+        Инициализация реестра.
+
+        :param store: Хранилище состояния игр (по умолчанию — в памяти процесса).
+        :param shards: Количество шардов блокировок.
+        :param idle_ttl: Время в секундах, после которого неактивная игра вытесняется.
+        :param max_size: Максимальное количество игр в реестре.
+        :param on_evict: Функция, вызываемая для каждой вытесненной игры.
+        :param clock: Источник времени (общий для всех воркеров, если хранилище общее).
+        """
+        self.store = store if store is not None else InMemoryGameStateStore(shards)
+        self._shards = [_Shard() for _ in range(shards or 16)]
+        self.idle_ttl = idle_ttl
+        self.max_size = max_size
+        self.on_evict = on_evict
+        self._clock = clock
+
+    def _shard(self, game_id):
+        """Шард, в котором хранится блокировка игры."""
+        return self._shards[zlib.crc32(str(game_id).encode()) % len(self._shards)]
+
+    def get(self, game_id):
+        """
+        Получить игру по UUID (или None) и отметить обращение к ней.
+        В общем хранилище это копия: изменения нужно делать через checkout().
+        """
+        if not game_id:
+            return None
+        return self.store.get(game_id, last_access=self._clock())
+
+    def put(self, game_server):
+        """Добавить или заменить игру."""
+        self.store.put(game_server, self._clock())
+        if self.max_size is not None:
+            self._notify(self._evict(self.store.oldest_games(self.max_size)))
+
+    def remove(self, game_id):
+        """Удалить игру из реестра без вызова on_evict."""
+        shard = self._shard(game_id)
+        with shard.lock:
+            shard.game_locks.pop(game_id, None)
+        return self.store.remove(game_id)
+
+    @contextmanager
+    def checkout(self, game_id):
+        """
+        Захватить игру для изменения.
+        Внутри блока другие обработчики этой игры (в том числе в других воркерах) ждут,
+        после блока игра записывается обратно в хранилище.
+
+        :param game_id: UUID игры.
+        :return: Контекстный менеджер, отдающий игру или None, если игры нет.
+        """
+        if not game_id:
+            yield None
+            return
+
+        shard = self._shard(game_id)
+        with shard.lock:
+            game_lock = shard.game_locks.setdefault(game_id, Lock())
+        with game_lock, self.store.lock(game_id):
+            game_server = self.store.get(game_id, last_access=self._clock())
+            if game_server is None:
+                with shard.lock:
+                    shard.game_locks.pop(game_id, None)  # Игры нет: блокировка не хранится
+                yield None
+                return
+            yield game_server
+            self.store.put(game_server, self._clock())
+
+    def evict_expired(self):
+        """
+        Вытеснить игры, к которым не обращались дольше idle_ttl.
+
+        :return: Количество вытесненных игр.
+        """
+        if self.idle_ttl is None:
+            return 0
+        evicted = self._evict(self.store.idle_games(self._clock() - self.idle_ttl))
+        self._notify(evicted)
+        return len(evicted)
+
+    def _evict(self, game_ids):
+        """Удалить игры, которые сейчас никто не обрабатывает."""
+        evicted = []
+        for game_id in game_ids:
+            game_server = self._try_evict(game_id)
+            if game_server is not None:
+                evicted.append(game_server)
+        return evicted
+
+    def _try_evict(self, game_id):
+        """Удалить игру, если ее блокировки никто не держит; вернуть удаленную игру или None."""
+        shard = self._shard(game_id)
+        with shard.lock:
+            game_lock = shard.game_locks.get(game_id)
+            if game_lock is not None and not game_lock.acquire(blocking=False):
+                return None  # Игра сейчас обрабатывается в этом процессе
+        try:
+            store_lock = self.store.lock(game_id)
+            if not store_lock.acquire(blocking=False):
+                return None  # Игра сейчас обрабатывается в другом воркере
+            try:
+                return self.store.remove(game_id)
+            finally:
+                store_lock.release()
+        finally:
+            if game_lock is not None:
+                with shard.lock:
+                    shard.game_locks.pop(game_id, None)
+                game_lock.release()
+
+    def _notify(self, evicted):
+        """Вызвать on_evict для вытесненных игр (вне блокировок)."""
+        if self.on_evict is None:
+            return
+        for game_server in evicted:
+            self.on_evict(game_server)
+
+    def __contains__(self, game_id):
+        return game_id in self.store
+
+    def __len__(self):
+        return len(self.store)
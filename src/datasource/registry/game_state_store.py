@@ -0,0 +1,287 @@
+import fcntl
+import json
+import os
+import sqlite3
+import threading
+import zlib
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from threading import Lock
+
+from domain.model.game_server import GameServer
+
+
+class _NullLock:
+    """Блокировка, которая ничего не блокирует (хранилищу в памяти хватает блокировок реестра)."""
+
+    def acquire(self, blocking=True):
+        return True
+
+    def release(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class _FileLock:
+    """Межпроцессная блокировка на файле (flock)."""
+
+    def __init__(self, path):
+        self.path = path
+        self._fd = None
+
+    def acquire(self, blocking=True):
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX if blocking else fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            os.close(fd)
+            return False
+        self._fd = fd
+        return True
+
+    def release(self):
+        fd, self._fd = self._fd, None
+        if fd is not None:
+            fcntl.flock(fd, fcntl.LOCK_UN)
+            os.close(fd)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.release()
+        return False
+
+
+class GameStateStore(ABC):
+    """
+    Абстрактное хранилище состояния активных игр, на котором работает GameRegistry.
+    Кроме самих игр хранит время последнего обращения к каждой игре для вытеснения.
+    """
+
+    # Видят ли хранилище другие процессы (воркеры)
+    shared = False
+
+    @abstractmethod
+    def get(self, game_id, last_access=None):
+        """
+        Получить игру по UUID.
+
+        :param game_id: UUID игры.
+        :param last_access: Если указано, записать это время как время последнего обращения.
+        :return: Игра или None.
+        """
+        pass
+
+    @abstractmethod
+    def put(self, game_server, last_access):
+        """Добавить или заменить игру."""
+        pass
+
+    @abstractmethod
+    def remove(self, game_id):
+        """Удалить игру, вернуть удаленную игру или None."""
+        pass
+
+    @abstractmethod
+    def idle_games(self, deadline):
+        """UUID игр, к которым не обращались с момента deadline, от самых старых."""
+        pass
+
+    @abstractmethod
+    def oldest_games(self, limit):
+        """UUID самых старых игр сверх limit."""
+        pass
+
+    @abstractmethod
+    def __contains__(self, game_id):
+        pass
+
+    @abstractmethod
+    def __len__(self):
+        pass
+
+    def lock(self, game_id):
+        """Блокировка игры между процессами (объект с acquire/release)."""
+        return _NullLock()
+
+
+class InMemoryGameStateStore(GameStateStore):
+    """
+    Хранилище игр в памяти процесса, разделенное на шарды со своими блокировками.
+    Игры хранятся как есть (без сериализации), поэтому подходит только для одного воркера.
+    """
+
+    def __init__(self, shards=16):
+        """
+        Инициализация хранилища.
+
+        :param shards: Количество шардов.
+        """
+        self._shards = [(Lock(), OrderedDict()) for _ in range(shards or 16)]
+
+    def _shard(self, game_id):
+        return self._shards[zlib.crc32(str(game_id).encode()) % len(self._shards)]
+
+    def get(self, game_id, last_access=None):
+        lock, games = self._shard(game_id)
+        with lock:
+            entry = games.get(game_id)
+            if entry is None:
+                return None
+            if last_access is not None:
+                entry[1] = last_access
+                games.move_to_end(game_id)  # Игры в шарде упорядочены по времени обращения
+            return entry[0]
+
+    def put(self, game_server, last_access):
+        lock, games = self._shard(game_server.UUID)
+        with lock:
+            games[game_server.UUID] = [game_server, last_access]
+            games.move_to_end(game_server.UUID)
+
+    def remove(self, game_id):
+        lock, games = self._shard(game_id)
+        with lock:
+            entry = games.pop(game_id, None)
+        return entry[0] if entry else None
+
+    def idle_games(self, deadline):
+        idle = []
+        for lock, games in self._shards:
+            with lock:
+                for game_id, (_, last_access) in games.items():
+                    if last_access > deadline:
+                        break
+                    idle.append((last_access, game_id))
+        return [game_id for _, game_id in sorted(idle)]
+
+    def oldest_games(self, limit):
+        overflow = len(self) - limit
+        if overflow <= 0:
+            return []
+        entries = []
+        for lock, games in self._shards:
+            with lock:
+                entries.extend((last_access, game_id) for game_id, (_, last_access) in games.items())
+        return [game_id for _, game_id in sorted(entries)[:overflow]]
+
+    def __contains__(self, game_id):
+        lock, games = self._shard(game_id)
+        with lock:
+            return game_id in games
+
+    def __len__(self):
+        return sum(len(games) for _, games in self._shards)
+
+
+class SqliteGameStateStore(GameStateStore):
+    """
+    Общее хранилище игр в файле SQLite для нескольких воркеров на одной машине
+    (локальная замена внешнего хранилища вроде Redis).
+    Игры сериализуются в JSON; изменения одной игры разными воркерами
+    упорядочиваются блокировками на файлах (flock).
+    """
+
+    shared = True
+
+    def __init__(self, path, lock_shards=64):
+        """
+        Инициализация хранилища.
+
+        :param path: Путь к файлу базы SQLite.
+        :param lock_shards: Количество файлов блокировок (игры распределяются по ним).
+        """
+        self.path = path
+        self.lock_dir = f'{path}.locks'
+        self.lock_shards = lock_shards or 64
+        os.makedirs(self.lock_dir, exist_ok=True)
+        self._local = threading.local()
+        connection = self._connection()
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('CREATE TABLE IF NOT EXISTS active_games ('
+                           'game_uuid TEXT PRIMARY KEY, state TEXT NOT NULL, last_access REAL NOT NULL)')
+        connection.execute('CREATE INDEX IF NOT EXISTS ix_active_games_last_access ON active_games (last_access)')
+
+    def _connection(self):
+        """Соединение SQLite для текущего потока."""
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            self._local.connection = connection
+        return connection
+
+    @staticmethod
+    def _dump(game_server):
+        """Сериализовать игру в JSON."""
+        board = game_server.board
+        return json.dumps({
+            'uuid': game_server.UUID, 'rows': board.rows, 'cols': board.cols,
+            'player_one_mask': board.player_one_mask, 'player_two_mask': board.player_two_mask,
+            'game_type': game_server.game_type, 'status': game_server.status,
+            'current_player1': game_server.current_player1, 'current_player2': game_server.current_player2,
+            'board_seq': game_server.board_seq,
+        })
+
+    @staticmethod
+    def _load(state):
+        """Восстановить игру из JSON."""
+        data = json.loads(state)
+        game_server = GameServer(rows=data['rows'], cols=data['cols'], game_uuid=data['uuid'],
+                                 game_type=data['game_type'], current_player1=data['current_player1'],
+                                 current_player2=data['current_player2'], status=data['status'])
+        game_server.board.player_one_mask = data['player_one_mask']
+        game_server.board.player_two_mask = data['player_two_mask']
+        game_server.board_seq = data.get('board_seq', 0)
+        return game_server
+
+    def get(self, game_id, last_access=None):
+        connection = self._connection()
+        row = connection.execute('SELECT state FROM active_games WHERE game_uuid = ?', (game_id,)).fetchone()
+        if row is None:
+            return None
+        if last_access is not None:
+            connection.execute('UPDATE active_games SET last_access = ? WHERE game_uuid = ?',
+                               (last_access, game_id))
+        return self._load(row[0])
+
+    def put(self, game_server, last_access):
+        self._connection().execute(
+            'INSERT INTO active_games (game_uuid, state, last_access) VALUES (?, ?, ?) '
+            'ON CONFLICT (game_uuid) DO UPDATE SET state = excluded.state, last_access = excluded.last_access',
+            (game_server.UUID, self._dump(game_server), last_access))
+
+    def remove(self, game_id):
+        row = self._connection().execute('DELETE FROM active_games WHERE game_uuid = ? RETURNING state',
+                                         (game_id,)).fetchone()
+        return self._load(row[0]) if row else None
+
+    def idle_games(self, deadline):
+        rows = self._connection().execute(
+            'SELECT game_uuid FROM active_games WHERE last_access <= ? ORDER BY last_access', (deadline,))
+        return [row[0] for row in rows]
+
+    def oldest_games(self, limit):
+        overflow = len(self) - limit
+        if overflow <= 0:
+            return []
+        rows = self._connection().execute(
+            'SELECT game_uuid FROM active_games ORDER BY last_access LIMIT ?', (overflow,))
+        return [row[0] for row in rows]
+
+    def lock(self, game_id):
+        shard = zlib.crc32(str(game_id).encode()) % self.lock_shards
+        return _FileLock(os.path.join(self.lock_dir, f'{shard}.lock'))
+
+    def __contains__(self, game_id):
+        return self._connection().execute(
+            'SELECT 1 FROM active_games WHERE game_uuid = ?', (game_id,)).fetchone() is not None
+
+    def __len__(self):
+        return self._connection().execute('SELECT COUNT(*) FROM active_games').fetchone()[0]
@@ -0,0 +1,42 @@
+from datasource.repository.game_repository import (existing_games_statement, merge_games, save_batches,
+                                                   upsert_games_statement)
+from monitoring.metrics import db_query_timer
+
+
+class AsyncGameRepository:
+    """
+    Асинхронный вариант GameRepository для асинхронного режима сервера (tictaktoe_async): сохранение игр
+    из обработчиков Socket.IO тем же запросом, но через асинхронную сессию SQLAlchemy (пока запрос ждет ответа БД,
+    цикл событий обслуживает других клиентов). Каждый метод открывает свою сессию (и транзакцию),
+    соединение возвращается в пул сразу после метода.
+
+    Атрибуты:
+        session_factory: Фабрика асинхронных сессий (async_sessionmaker).
+        saved_games: Модель сохраненных игр.
+    """
+
+    def __init__(self, session_factory, saved_games):
+        """
+        Инициализация репозитория.
+
+        :param session_factory: Фабрика асинхронных сессий (async_sessionmaker).
+        :param saved_games: Модель сохраненных игр.
+        """
+        self.session_factory = session_factory
+        self.saved_games = saved_games
+
+    @db_query_timer
+    async def save_games_to_db(self, game_servers):
+        """Сохранить несколько игр в БД одной транзакцией (те же запросы, что у GameRepository)."""
+        try:
+            async with self.session_factory() as session, session.begin():
+                dialect_name = session.get_bind().dialect.name
+                for batch in save_batches(game_servers):
+                    statement = upsert_games_statement(dialect_name, self.saved_games, batch)
+                    if statement is not None:
+                        await session.execute(statement)
+                    else:
+                        existing = (await session.execute(existing_games_statement(self.saved_games, batch))).scalars()
+                        session.add_all(merge_games(self.saved_games, existing, batch))
+        except Exception as e:
+            raise ValueError(f"Ошибка при сохранении игры: {str(e)}")
@@ -1,4 +1,73 @@
+from sqlalchemy import MetaData, and_, delete, inspect, or_, select, text, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.schema import CreateTable
+
 from datasource.mapper.game_data_mapper import GameDataMapper
+from datasource.model.db_params import utc_now
+from monitoring.metrics import db_query_timer
+
+# Максимальное количество игр в одном запросе пакетного сохранения
+SAVE_BATCH_SIZE = 500
+
+# Диалекты, которые поддерживают INSERT ... ON CONFLICT DO UPDATE
+UPSERT_DIALECTS = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def save_batches(game_servers):
+    """Игры частями по SAVE_BATCH_SIZE (если игра передана несколько раз, сохраняется последнее состояние)."""
+    games = list({game_server.UUID: game_server for game_server in game_servers}.values())
+    return [games[start:start + SAVE_BATCH_SIZE] for start in range(0, len(games), SAVE_BATCH_SIZE)]
+
+
+def upsert_games_statement(dialect_name, saved_games, game_servers):
+    """
+    Запрос INSERT ... ON CONFLICT (game_uuid) DO UPDATE, который вставляет или обновляет игры.
+    Общий для GameRepository и AsyncGameRepository: репозитории только выполняют его в своей сессии.
+
+    :param dialect_name: Имя диалекта БД.
+    :param saved_games: Модель сохраненных игр.
+    :param game_servers: Игры (не больше SAVE_BATCH_SIZE).
+    :return: Запрос или None, если СУБД не поддерживает ON CONFLICT (тогда используется merge_games).
+    """
+    insert = UPSERT_DIALECTS.get(dialect_name)
+    if insert is None:
+        return None
+    saved_at = utc_now()
+    rows = [{**GameDataMapper.game_to_row(game_server), 'updated_at': saved_at} for game_server in game_servers]
+    statement = insert(saved_games).values(rows)
+    return statement.on_conflict_do_update(
+        index_elements=['game_uuid'],
+        set_={column: statement.excluded[column] for column in rows[0] if column != 'game_uuid'}
+    )
+
+
+def existing_games_statement(saved_games, game_servers):
+    """Запрос уже сохраненных записей игр (для merge_games)."""
+    return select(saved_games).where(saved_games.game_uuid.in_([game_server.UUID for game_server in game_servers]))
+
+
+def merge_games(saved_games, existing, game_servers):
+    """
+    Сохранение для СУБД без ON CONFLICT: существующие записи обновляются, для остальных игр создаются новые.
+
+    :param saved_games: Модель сохраненных игр.
+    :param existing: Записи, полученные запросом existing_games_statement.
+    :param game_servers: Игры.
+    :return: Новые записи, которые нужно добавить в сессию.
+    """
+    existing = {game.game_uuid: game for game in existing}
+    created = []
+    for game_server in game_servers:
+        game_db = existing.get(game_server.UUID)
+        if game_db is None:
+            created.append(GameDataMapper.game_to_database(game_server, saved_games))
+        else:
+            GameDataMapper.update_game_in_database(game_server, game_db)
+    return created
 
 
 class GameRepository:
@@ -10,9 +79,16 @@ class GameRepository:
         db: Объект базы данных (например, SQLAlchemy или другой ORM).
         Players: Модель или таблица для работы с игроками.
         Saved_games: Модель или таблица для работы с сохраненными играми.
+        Revoked_tokens: Модель отозванных токенов обновления.
     """
 
-    def __init__(self, db, players, saved_games):
+    # Количество записей в одной транзакции миграций по умолчанию
+    SAVE_BATCH_SIZE = SAVE_BATCH_SIZE
+
+    # Количество игр, которое по умолчанию читается из БД за раз при потоковой выгрузке
+    STREAM_CHUNK_SIZE = 1000
+
+    def __init__(self, db, players, saved_games, revoked_tokens=None):
         """
         Инициализация репозитория.
 
@@ -22,30 +98,198 @@ class GameRepository:
                         Содержит информацию об игроках (например, UUID, имя и т.д.).
         :param saved_games: Модель или таблица для работы с сохраненными играми.
                            Содержит информацию о сохраненных играх (например, UUID игры, состояние доски, статус игры).
+        :param revoked_tokens: Модель отозванных токенов обновления.
         """
         self.db = db
         self.players = players
         self.saved_games = saved_games
+        self.revoked_tokens = revoked_tokens
 
     def save_game_to_db(self, game_server):
-        """Сохранить текущую игру в БД."""
+        """Сохранить текущую игру в БД (одним запросом: новая игра добавляется, существующая обновляется)."""
+        self.save_games_to_db([game_server])
+
+    @db_query_timer
+    def save_games_to_db(self, game_servers):
+        """Сохранить несколько игр в БД одной транзакцией."""
         try:
-            # Проверка, существует ли игра с указанным UUID
-            game_form_db = self.get_saved_game_by_uuid(game_server.UUID)
+            session = self.db.session
+            dialect_name = session.get_bind().dialect.name
+            for batch in save_batches(game_servers):
+                statement = upsert_games_statement(dialect_name, self.saved_games, batch)
+                if statement is not None:
+                    session.execute(statement)
+                else:
+                    existing = session.execute(existing_games_statement(self.saved_games, batch)).scalars()
+                    session.add_all(merge_games(self.saved_games, existing, batch))
+            session.commit()
+        except Exception as e:
+            # Откат транзакции в случае ошибки
+            self.db.session.rollback()
+            raise ValueError(f"Ошибка при сохранении игры: {str(e)}")
+
+    @db_query_timer
+    def migrate_board_format(self, batch_size=None):
+        """
+        Перевести поле сохраненных игр из старого формата (JSON) в текущий.
+        Записи обрабатываются частями по batch_size, каждая часть — в своей транзакции,
+        поэтому миграцию можно прервать и запустить снова.
+
+        :param batch_size: Количество записей в части (по умолчанию SAVE_BATCH_SIZE).
+        :return: Количество переведенных записей.
+        """
+        batch_size = batch_size or self.SAVE_BATCH_SIZE
+        saved_games = self.saved_games
+        migrated, last_id = 0, 0
+        while True:
+            try:
+                rows = self.db.session.execute(
+                    self.db.select(saved_games.id, saved_games.board, saved_games.board_format)
+                    .where(saved_games.board_format != GameDataMapper.CURRENT_BOARD_FORMAT, saved_games.id > last_id)
+                    .order_by(saved_games.id)
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    return migrated
+                # Обновление по первичному ключу одним запросом на часть
+                self.db.session.execute(update(saved_games), [
+                    {'id': row.id, **GameDataMapper.board_to_row(GameDataMapper.board_from_row(row))} for row in rows
+                ])
+                self.db.session.commit()
+            except Exception as e:
+                self.db.session.rollback()
+                raise e
+            migrated += len(rows)
+            last_id = rows[-1].id
+
+    @db_query_timer
+    def upgrade_schema(self):
+        """
+        Привести существующую таблицу сохраненных игр к текущей модели.
+        create_all создает только отсутствующие таблицы и не меняет существующие, поэтому недостающие столбцы
+        добавляются через ALTER TABLE ... ADD COLUMN, со столбцов, которые в модели стали необязательными,
+        снимается NOT NULL, а недостающие индексы создаются через CREATE INDEX.
+        SQLite не снимает NOT NULL и не добавляет столбцы со значением по умолчанию CURRENT_TIMESTAMP,
+        поэтому там таблица пересоздается по модели с копированием записей.
+        Повторный запуск ничего не меняет.
 
-            if game_form_db is None:
-                game_db = GameDataMapper.game_to_database(game_server, self.saved_games)
-                self.db.session.add(game_db)  # Добавление новой записи в сессию
+        :return: Список выполненных изменений.
+        """
+        table = self.saved_games.__table__
+        changes = []
+        try:
+            connection = self.db.session.connection()
+            columns = {column['name']: column for column in inspect(connection).get_columns(table.name)}
+            missing = [column for column in table.columns if column.name not in columns]
+            relaxed = [column for column in table.columns
+                       if column.name in columns and column.nullable and not columns[column.name]['nullable']]
+            changes += [f'ADD COLUMN {column.name}' for column in missing]
+            # Например, board после перехода на компактный формат поля (в формате 2 board пустой)
+            changes += [f'DROP NOT NULL {column.name}' for column in relaxed]
+            if connection.dialect.name == 'sqlite' and (missing or relaxed):
+                self._rebuild_sqlite_table(connection, table, columns)
+                changes.append(f'REBUILD TABLE {table.name}')
             else:
-                self.delete_game(game_form_db.UUID) # Удаляем старую игру и сохраняем заново
-                game_db = GameDataMapper.game_to_database(game_server, self.saved_games)
-                self.db.session.add(game_db)
+                for column in missing:
+                    connection.execute(text(self._add_column_sql(table, column, connection.dialect)))
+                for column in relaxed:
+                    connection.execute(text(self._drop_not_null_sql(table, column, connection.dialect)))
+            indexes = {index['name'] for index in inspect(connection).get_indexes(table.name)}
+            for index in sorted(table.indexes, key=lambda index: index.name):
+                if index.name not in indexes:
+                    index.create(connection)
+                    changes.append(f'CREATE INDEX {index.name}')
             self.db.session.commit()
         except Exception as e:
-            # Откат транзакции в случае ошибки
             self.db.session.rollback()
-            raise ValueError(f"Ошибка при сохранении игры: {str(e)}")
+            raise e
+        return changes
+
+    def _rebuild_sqlite_table(self, connection, table, existing_columns):
+        """
+        Пересоздать таблицу SQLite по модели: новая таблица, копирование записей, удаление старой, переименование.
+        Индексы удаляются вместе со старой таблицей и создаются заново в upgrade_schema.
+
+        :param connection: Соединение текущей транзакции.
+        :param table: Таблица модели.
+        :param existing_columns: Столбцы существующей таблицы {имя: описание из inspect}.
+        """
+        unknown = sorted(set(existing_columns) - set(table.columns.keys()))
+        if unknown:
+            # При копировании по модели данные этих столбцов были бы потеряны
+            raise ValueError(f"В таблице {table.name} есть столбцы, которых нет в модели: {', '.join(unknown)}")
+
+        metadata = MetaData()
+        for referred in {foreign_key.column.table for foreign_key in table.foreign_keys}:
+            referred.to_metadata(metadata)  # Нужны, чтобы собрать FOREIGN KEY новой таблицы
+        new_table = table.to_metadata(metadata, name=f'{table.name}_rebuild')
+        preparer = connection.dialect.identifier_preparer
+        names = ', '.join(preparer.quote(column.name) for column in table.columns if column.name in existing_columns)
 
+        connection.execute(text(f'DROP TABLE IF EXISTS {preparer.format_table(new_table)}'))
+        connection.execute(CreateTable(new_table))
+        # Новые столбцы получают значения по умолчанию из определения таблицы
+        connection.execute(text(f'INSERT INTO {preparer.format_table(new_table)} ({names}) '
+                                f'SELECT {names} FROM {preparer.format_table(table)}'))
+        connection.execute(text(f'DROP TABLE {preparer.format_table(table)}'))
+        connection.execute(text(f'ALTER TABLE {preparer.format_table(new_table)} '
+                                f'RENAME TO {preparer.format_table(table)}'))
+
+    @staticmethod
+    def _add_column_sql(table, column, dialect):
+        """Запрос ALTER TABLE ... ADD COLUMN для столбца модели (NOT NULL — только вместе со значением по умолчанию)."""
+        preparer = dialect.identifier_preparer
+        sql = (f'ALTER TABLE {preparer.format_table(table)} ADD COLUMN {preparer.format_column(column)} '
+               f'{column.type.compile(dialect=dialect)}')
+        if column.server_default is not None:
+            default = column.server_default.arg
+            default = f"'{default}'" if isinstance(default, str) else str(default.compile(dialect=dialect))
+            sql += f' DEFAULT {default}'
+            if not column.nullable:
+                sql += ' NOT NULL'
+        return sql
+
+    @staticmethod
+    def _drop_not_null_sql(table, column, dialect):
+        """Запрос, снимающий ограничение NOT NULL со столбца (в SQLite вместо него таблица пересоздается)."""
+        preparer = dialect.identifier_preparer
+        return (f'ALTER TABLE {preparer.format_table(table)} '
+                f'ALTER COLUMN {preparer.format_column(column)} DROP NOT NULL')
+
+    @db_query_timer
+    def backfill_board_signatures(self, batch_size=None):
+        """
+        Заполнить ключ позиции (board_signature) у игр, сохраненных до появления столбца.
+        Записи обрабатываются частями по batch_size, каждая часть — в своей транзакции.
+
+        :param batch_size: Количество записей в части (по умолчанию SAVE_BATCH_SIZE).
+        :return: Количество заполненных записей.
+        """
+        batch_size = batch_size or self.SAVE_BATCH_SIZE
+        saved_games = self.saved_games
+        filled, last_id = 0, 0
+        while True:
+            try:
+                rows = self.db.session.execute(
+                    self.db.select(saved_games.__table__)
+                    .where(saved_games.board_signature.is_(None), saved_games.id > last_id)
+                    .order_by(saved_games.id)
+                    .limit(batch_size)
+                ).all()
+                if not rows:
+                    return filled
+                self.db.session.execute(update(saved_games), [
+                    {'id': row.id, 'board_signature': GameDataMapper.board_signature(GameDataMapper.game_from_row(row))}
+                    for row in rows
+                ])
+                self.db.session.commit()
+            except Exception as e:
+                self.db.session.rollback()
+                raise e
+            filled += len(rows)
+            last_id = rows[-1].id
+
+    @db_query_timer
     def get_saved_game_by_uuid(self, game_uuid):
         """Получить игру по uuid."""
         try:
@@ -54,18 +298,39 @@ class GameRepository:
             self.db.session.rollback()
             raise e
 
+    @db_query_timer
     def get_all_games(self):
-        """Получить список всех игр."""
+        """Получить список всех игр (одним запросом)."""
+        try:
+            games = self.db.session.execute(self.db.select(self.saved_games.__table__)).all()
+            return [GameDataMapper.game_from_row(game) for game in games]
+        except Exception as e:
+            self.db.session.rollback()
+            raise e
+
+    def iter_all_games(self, chunk_size=None):
+        """
+        Выгрузить все игры частями, не загружая их в память целиком.
+        Записи читаются курсором на стороне сервера (где СУБД это поддерживает) и не попадают в сессию ORM.
+
+        :param chunk_size: Количество игр в одной части (по умолчанию STREAM_CHUNK_SIZE).
+        :return: Генератор списков игр (GameServer).
+        """
+        chunk_size = chunk_size or self.STREAM_CHUNK_SIZE
         try:
-            games = self.db.session.execute(self.db.select(self.saved_games)).scalars().all()
-            return [GameDataMapper.game_from_database(self.db, game.uuid, self.saved_games) for game in games]
+            result = self.db.session.execute(
+                self.db.select(self.saved_games.__table__).order_by(self.saved_games.id)
+                .execution_options(yield_per=chunk_size)
+            )
+            for rows in result.partitions():
+                yield [GameDataMapper.game_from_row(game) for game in rows]
         except Exception as e:
             self.db.session.rollback()
             raise e
 
+    @db_query_timer
     def delete_game(self, game_uuid):
         """Удалить игру по uuid."""
-        print("Start delete...")
         try:
             game = self.db.session.execute(
                 self.db.select(self.saved_games).filter_by(game_uuid=game_uuid)
@@ -77,6 +342,7 @@ class GameRepository:
             self.db.session.rollback()
             raise e
 
+    @db_query_timer
     def save_user(self, login, password):
         """Сохранить пользователя в БД."""
         try:
@@ -87,6 +353,7 @@ class GameRepository:
             self.db.session.rollback()
             raise e
 
+    @db_query_timer
     def get_user(self, login):
         """Получить пользователя из БД."""
         try:
@@ -97,37 +364,99 @@ class GameRepository:
             self.db.session.rollback()
             raise e
 
+    @db_query_timer
     def get_user_by_uuid(self, user_uuid):
         """Получить пользователя из БД."""
         try:
             return self.db.session.execute(
-                self.db.select(self.players).filter_by(uuid=user_uuid)
+                self.db.select(self.players).filter_by(uuid=GameDataMapper.str_to_uuid(user_uuid))
             ).scalar_one_or_none()
         except Exception as e:
             self.db.session.rollback()
             raise e
 
-    def get_saved_games_by_user(self, user_uuid):
-        """Получить список сохраненных игр для пользователя."""
+    @db_query_timer
+    def get_saved_games_by_user(self, user_uuid, limit=None, after=None):
+        """
+        Получить список сохраненных игр пользователя (хозяина или гостя), от последних сохраненных.
+
+        :param user_uuid: UUID пользователя.
+        :param limit: Максимальное количество игр (None — все игры).
+        :param after: Ключ (updated_at, id) последней игры предыдущей страницы; возвращаются игры после нее.
+        :return: Список строк с полями id, game_uuid, game_type, updated_at.
+        """
+        try:
+            saved_games = self.saved_games
+            user_uuid = GameDataMapper.str_to_uuid(user_uuid)
+            query = self.db.select(
+                saved_games.id, saved_games.game_uuid, saved_games.game_type, saved_games.updated_at
+            ).where(
+                or_(saved_games.player_owner_uuid == user_uuid, saved_games.player_guest_uuid == user_uuid)
+            )
+            if after is not None:
+                updated_at, game_id = after
+                query = query.where(or_(saved_games.updated_at < updated_at,
+                                        and_(saved_games.updated_at == updated_at, saved_games.id < game_id)))
+            query = query.order_by(saved_games.updated_at.desc(), saved_games.id.desc())
+            if limit is not None:
+                query = query.limit(limit)
+            return self.db.session.execute(query).all()
+        except Exception as e:
+            self.db.session.rollback()
+            raise e
+
+    @db_query_timer
+    def get_saved_games_by_position(self, game_server):
+        """Получить сохраненные игры с той же позицией (с точностью до поворотов и отражений)."""
+        try:
+            return self.db.session.execute(
+                self.db.select(self.saved_games).filter_by(
+                    board_signature=GameDataMapper.board_signature(game_server))
+            ).scalars().all()
+        except Exception as e:
+            self.db.session.rollback()
+            raise e
+
+    @db_query_timer
+    def revoke_token(self, jti, expires_at):
+        """
+        Записать отозванный токен (заодно удаляются записи токенов, срок которых истек).
+
+        :param jti: Идентификатор токена.
+        :param expires_at: Момент истечения срока токена (datetime в UTC).
+        :return: False, если токен уже был отозван.
+        """
+        revoked_tokens = self.revoked_tokens
         try:
-            # if isinstance(user_uuid, str):
-            #     user_uuid = uuid.UUID(user_uuid)
+            self.db.session.execute(delete(revoked_tokens).where(revoked_tokens.expires_at < utc_now()))
+            self.db.session.add(revoked_tokens(jti=jti, expires_at=expires_at))
+            self.db.session.commit()
+            return True
+        except IntegrityError:
+            # Уникальный jti: токен уже отозван (например, параллельным обменом в другом воркере)
+            self.db.session.rollback()
+            return False
+        except Exception as e:
+            self.db.session.rollback()
+            raise e
 
+    @db_query_timer
+    def is_token_revoked(self, jti):
+        """Отозван ли токен."""
+        try:
             return self.db.session.execute(
-                self.db.select(self.saved_games).filter_by(player_owner_uuid=user_uuid)
-                .union(
-                    self.db.select(self.saved_games).filter_by(player_guest_uuid=user_uuid)
-                )
-            ).all()
+                self.db.select(self.revoked_tokens.id).filter_by(jti=jti)
+            ).scalar_one_or_none() is not None
         except Exception as e:
             self.db.session.rollback()
             raise e
 
+    @db_query_timer
     def get_user_id_by_uuid(self, user_uuid):
         """Получить ID пользователя из БД по UUID."""
         try:
             result = self.db.session.execute(
-                self.db.select(self.players.id).filter_by(uuid=user_uuid)
+                self.db.select(self.players.id).filter_by(uuid=GameDataMapper.str_to_uuid(user_uuid))
             ).scalar_one_or_none()
             if result is None:
                 raise ValueError("Пользователь с указанным UUID не найден")
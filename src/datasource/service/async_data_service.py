@@ -0,0 +1,78 @@
+import asyncio
+from contextlib import nullcontext
+
+
+class AsyncDataService:
+    """
+    Асинхронный вариант DataService для асинхронного режима сервера (tictaktoe_async):
+    запись игр в виде корутин поверх AsyncGameRepository. После записи игра удаляется из кэша
+    сохраненных игр, общего с CachedDataService, чтобы /game/load не вернул устаревшую копию.
+
+    Ограничение: асинхронного репозитория для чтения нет. Загрузка игры, список сохраненных игр
+    и поиск игроков выполняются обычным (блокирующим) сервисом данных в потоке пула цикла событий
+    (asyncio.to_thread), каждый вызов — в sync_context (контекст приложения и сессия БД).
+    Цикл событий не блокируется, но одновременных чтений не больше, чем потоков в пуле
+    (и соединений в синхронном пуле БД), и их кэш тот же, что у CachedDataService.
+    Страницы и авторизация в асинхронном режиме по-прежнему обслуживаются приложением Flask.
+
+    Атрибуты:
+        repository: Экземпляр асинхронного репозитория (AsyncGameRepository).
+        game_cache: Кэш сохраненных игр CachedDataService (None — без кэша).
+        data_service: Блокирующий сервис данных для чтения (CachedDataService).
+        sync_context: Функция без аргументов, возвращающая контекст для вызовов data_service
+                      (задается приложением, по умолчанию — пустой контекст).
+    """
+
+    def __init__(self, repository, game_cache=None, data_service=None, sync_context=None):
+        """
+        Инициализация сервиса данных.
+
+        :param repository: Экземпляр асинхронного репозитория (AsyncGameRepository).
+        :param game_cache: Кэш сохраненных игр, общий с CachedDataService.
+        :param data_service: Блокирующий сервис данных для чтения.
+        :param sync_context: Контекст для вызовов data_service в потоке (можно задать позже).
+        """
+        self.repository = repository
+        self.game_cache = game_cache
+        self.data_service = data_service
+        self.sync_context = sync_context or nullcontext
+
+    async def save_current_game(self, game_server):
+        """Сохранить текущую игру."""
+        return await self.save_current_games([game_server])
+
+    async def save_current_games(self, game_servers):
+        """Сохранить несколько игр одной транзакцией."""
+        game_servers = list(game_servers)
+        try:
+            return await self.repository.save_games_to_db(game_servers)
+        finally:
+            if self.game_cache is not None:
+                self.game_cache.invalidate(*(str(game_server.UUID) for game_server in game_servers))
+
+    async def upload_selected_game(self, game_uuid):
+        """Получить сохраненную игру по UUID."""
+        return await self._run_sync(self.data_service.upload_selected_game, game_uuid)
+
+    async def get_saved_games_page(self, user_uuid, cursor=None, page_size=None):
+        """Получить страницу сохраненных игр игрока (см. DataService.get_saved_games_page)."""
+        return await self._run_sync(self.data_service.get_saved_games_page, user_uuid, cursor, page_size)
+
+    async def get_user(self, login):
+        """Получить игрока по логину."""
+        return await self._run_sync(self.data_service.get_user, login)
+
+    async def get_user_by_uuid(self, user_uuid):
+        """Получить игрока по UUID."""
+        return await self._run_sync(self.data_service.get_user_by_uuid, user_uuid)
+
+    async def get_user_id_by_uuid(self, user_uuid):
+        """Получить ID игрока по UUID."""
+        return await self._run_sync(self.data_service.get_user_id_by_uuid, user_uuid)
+
+    async def _run_sync(self, method, *args):
+        """Выполнить блокирующий метод сервиса данных в потоке пула, не блокируя цикл событий."""
+        def call():
+            with self.sync_context():
+                return method(*args)
+        return await asyncio.to_thread(call)
@@ -0,0 +1,124 @@
+from dataclasses import dataclass
+
+from datasource.service.data_service import DataService
+
+
+@dataclass(frozen=True)
+class CachedUser:
+    """Снимок записи игрока для кэша (не привязан к сессии ORM)."""
+    id: int
+    login: str
+    password: str
+    uuid: object
+
+    @classmethod
+    def from_model(cls, user):
+        """Снимок из модели Players (None остается None)."""
+        if user is None:
+            return None
+        return cls(id=user.id, login=user.login, password=user.password, uuid=user.uuid)
+
+
+class CachedDataService(DataService):
+    """
+    Сервис данных с кэшем чтения игроков и сохраненных игр.
+    Игрок или игра читаются из БД только при промахе кэша; записи кэша удаляются
+    при сохранении игрока, сохранении и удалении игры. Кэши общие для всех экземпляров
+    сервиса (задаются в DI-контейнере), отсутствие записи в БД не кэшируется.
+
+    Атрибуты:
+        repository: Экземпляр репозитория, который предоставляет доступ к данным в хранилище.
+        user_cache: Кэш игроков (ключи ('login', login), ('uuid', uuid) и ('id', uuid)).
+        game_cache: Кэш сохраненных игр по uuid игры.
+    """
+
+    def __init__(self, repository, user_cache, game_cache):
+        """
+        Инициализация сервиса.
+
+        :param repository: Экземпляр репозитория (например, GameRepository).
+        :param user_cache: Кэш игроков (LruTtlCache).
+        :param game_cache: Кэш сохраненных игр (LruTtlCache).
+        """
+        super().__init__(repository)
+        self.user_cache = user_cache
+        self.game_cache = game_cache
+
+    def save_current_game(self, game_server):
+        """Сохранить текущую игру."""
+        try:
+            return super().save_current_game(game_server)
+        finally:
+            self.game_cache.invalidate(str(game_server.UUID))
+
+    def save_current_games(self, game_servers):
+        """Сохранить несколько игр одной транзакцией."""
+        game_servers = list(game_servers)
+        try:
+            return super().save_current_games(game_servers)
+        finally:
+            self.game_cache.invalidate(*(str(game_server.UUID) for game_server in game_servers))
+
+    def migrate_board_format(self, batch_size=None):
+        """Перевести сохраненные игры в текущий формат хранения поля."""
+        # Поле в кэше уже восстановлено, но записи сбрасываются, чтобы кэш не пережил смену формата
+        try:
+            return super().migrate_board_format(batch_size)
+        finally:
+            self.game_cache.clear()
+
+    def upload_selected_game(self, game_uuid):
+        """Загрузить выбранную игру (копию, чтобы изменения игры не попали в кэш)."""
+        game_server = self.game_cache.get(str(game_uuid))
+        if game_server is None:
+            game_server = super().upload_selected_game(game_uuid)
+            if game_server is None:
+                return None
+            self.game_cache.put(str(game_uuid), game_server)
+        return game_server.copy()
+
+    def delete_game(self, game_uuid):
+        """Удалить сохраненную игру."""
+        try:
+            super().delete_game(game_uuid)
+        finally:
+            self.game_cache.invalidate(str(game_uuid))
+
+    def save_user(self, login, password):
+        """Сохранить игрока в БД."""
+        try:
+            return super().save_user(login, password)
+        finally:
+            self.user_cache.invalidate(('login', login))
+
+    def get_user(self, login):
+        """Получить игрока из БД."""
+        return self._cached_user(('login', login), lambda: super(CachedDataService, self).get_user(login))
+
+    def get_user_by_uuid(self, user_uuid):
+        """Получить игрока из БД."""
+        return self._cached_user(('uuid', str(user_uuid)),
+                                 lambda: super(CachedDataService, self).get_user_by_uuid(user_uuid))
+
+    def get_user_id_by_uuid(self, user_uuid):
+        """Получить игрока из БД."""
+        key = ('id', str(user_uuid))
+        user_id = self.user_cache.get(key)
+        if user_id is None:
+            user_id = super().get_user_id_by_uuid(user_uuid)
+            self.user_cache.put(key, user_id)
+        return user_id
+
+    def _cached_user(self, key, load):
+        """Игрок из кэша или из БД (найденный игрок кладется в кэш по логину и uuid)."""
+        user = self.user_cache.get(key)
+        if user is None:
+            user = CachedUser.from_model(load())
+            if user is not None:
+                self.user_cache.put(('login', user.login), user)
+                self.user_cache.put(('uuid', str(user.uuid)), user)
+        return user
+
+    def cache_stats(self):
+        """Счетчики и доля попаданий кэшей игроков и игр."""
+        return {'users': self.user_cache.stats(), 'saved_games': self.game_cache.stats()}
@@ -1,3 +1,7 @@
+import base64
+from datetime import datetime
+
+
 class DataService:
     """
     Класс, представляющий сервис данных для управления бизнес-логикой взаимодействия с хранилищем.
@@ -7,6 +11,9 @@ class DataService:
         repository: Экземпляр репозитория, который предоставляет доступ к данным в хранилище.
     """
 
+    # Количество сохраненных игр на одной странице списка
+    SAVED_GAMES_PAGE_SIZE = 20
+
     def __init__(self, repository):
         """
         Инициализация сервиса данных.
@@ -20,6 +27,30 @@ class DataService:
         """Сохранить текущую игру."""
         return self.repository.save_game_to_db(game_server)
 
+    def save_current_games(self, game_servers):
+        """Сохранить несколько игр одной транзакцией."""
+        return self.repository.save_games_to_db(game_servers)
+
+    def migrate_board_format(self, batch_size=None):
+        """Перевести сохраненные игры в текущий формат хранения поля."""
+        return self.repository.migrate_board_format(batch_size)
+
+    def upgrade_schema(self):
+        """Добавить в существующие таблицы столбцы и индексы, которых в них еще нет."""
+        return self.repository.upgrade_schema()
+
+    def backfill_board_signatures(self, batch_size=None):
+        """Заполнить ключ позиции у сохраненных игр, где он еще не задан."""
+        return self.repository.backfill_board_signatures(batch_size)
+
+    def revoke_token(self, jti, expires_at):
+        """Записать отозванный токен; False, если он уже был отозван."""
+        return self.repository.revoke_token(jti, expires_at)
+
+    def is_token_revoked(self, jti):
+        """Отозван ли токен."""
+        return self.repository.is_token_revoked(jti)
+
     def upload_selected_game(self, game_uuid):
         """Загрузить выбранную игру."""
         return self.repository.get_saved_game_by_uuid(game_uuid)
@@ -28,17 +59,57 @@ class DataService:
         """Получить список всех сохраненных игр."""
         return self.repository.get_all_games()
 
+    def iter_all_saved_games(self, chunk_size=None):
+        """Выгрузить все сохраненные игры частями (для экспорта и пакетной обработки)."""
+        return self.repository.iter_all_games(chunk_size)
+
     def get_saved_games_by_user(self, user_uuid):
         """Получить список всех сохраненных игр конкретного игрока."""
         return self.repository.get_saved_games_by_user(user_uuid)
 
+    def get_saved_games_page(self, user_uuid, cursor=None, page_size=None):
+        """
+        Получить страницу сохраненных игр игрока.
+
+        :param user_uuid: UUID игрока.
+        :param cursor: Курсор страницы из предыдущего вызова (None — первая страница).
+        :param page_size: Количество игр на странице (по умолчанию SAVED_GAMES_PAGE_SIZE).
+        :return: Кортеж (список игр, курсор следующей страницы или None, если страница последняя).
+        :raises ValueError: Если курсор некорректен.
+        """
+        page_size = page_size or self.SAVED_GAMES_PAGE_SIZE
+        after = self.decode_page_cursor(cursor) if cursor else None
+        # Одна лишняя запись показывает, есть ли следующая страница
+        games = self.repository.get_saved_games_by_user(user_uuid, limit=page_size + 1, after=after)
+        if len(games) <= page_size:
+            return games, None
+        games = games[:page_size]
+        return games, self.encode_page_cursor(games[-1].updated_at, games[-1].id)
+
+    @staticmethod
+    def encode_page_cursor(updated_at, game_id):
+        """Курсор страницы по ключу последней игры (updated_at, id)."""
+        return base64.urlsafe_b64encode(f'{updated_at.isoformat()}|{game_id}'.encode()).decode()
+
+    @staticmethod
+    def decode_page_cursor(cursor):
+        """Ключ (updated_at, id) из курсора страницы."""
+        try:
+            updated_at, game_id = base64.urlsafe_b64decode(cursor.encode()).decode().split('|')
+            return datetime.fromisoformat(updated_at), int(game_id)
+        except (ValueError, UnicodeError) as e:
+            raise ValueError("Некорректный курсор страницы") from e
+
+    def get_saved_games_by_position(self, game_server):
+        """Получить сохраненные игры с той же позицией, что и у игры (с учетом симметрий поля)."""
+        return self.repository.get_saved_games_by_position(game_server)
+
     def delete_game(self, game_uuid):
         """Удалить сохраненную игру."""
         self.repository.delete_game(game_uuid)
 
     def save_user(self, login, password):
         """Сохранить игрока в БД."""
-        print("save_user")
         return self.repository.save_user(login, password)
 
     def get_user(self, login):
@@ -0,0 +1,138 @@
+import threading
+from collections import OrderedDict
+
+
+class GameSaveQueueFull(Exception):
+    """Очередь сохранения игр переполнена."""
+
+
+class GameSaveQueue:
+    """
+    Очередь отложенного сохранения игр в БД.
+    Обработчик только ставит копию игры в очередь, а запись в БД выполняет служебный поток:
+    повторные сохранения одной игры до записи объединяются (пишется последнее состояние),
+    игры записываются пачками, каждая пачка — одной транзакцией (если транзакция не прошла,
+    игры пачки записываются по одной). Результат записи каждой игры передается в callback ее сохранений.
+
+    Атрибуты:
+        save_batch: Функция save_batch(game_servers), записывающая пачку игр одной транзакцией.
+        max_pending: Максимальное количество разных игр, ожидающих записи.
+        batch_size: Максимальное количество игр в одной транзакции.
+    """
+
+    def __init__(self, save_batch=None, max_pending=1000, batch_size=100):
+        """
+        Инициализация очереди.
+
+        :param save_batch: Функция записи пачки игр (можно задать позже, до первого сохранения).
+        :param max_pending: Максимальное количество разных игр, ожидающих записи.
+        :param batch_size: Максимальное количество игр в одной транзакции.
+        """
+        self.save_batch = save_batch
+        self.max_pending = max_pending or 1000
+        self.batch_size = batch_size or 100
+        self._pending = OrderedDict()  # game_id -> (копия игры, список callback)
+        self._in_flight = 0  # Игр в записываемой сейчас пачке
+        self._condition = threading.Condition()
+        self._worker = None
+        self._stopping = False
+
+    def submit(self, game_server, callback=None):
+        """
+        Поставить игру в очередь на сохранение.
+
+        :param game_server: Игра (в очередь ставится копия, игру можно менять дальше).
+        :param callback: Функция callback(game_id, error), вызывается из служебного потока после записи
+                         (error — None или исключение).
+        :raises GameSaveQueueFull: Если очередь переполнена.
+        :raises RuntimeError: Если очередь остановлена.
+        """
+        game_id = game_server.UUID
+        with self._condition:
+            if self._stopping:
+                raise RuntimeError("Очередь сохранения игр остановлена")
+            entry = self._pending.get(game_id)
+            if entry is None and len(self._pending) >= self.max_pending:
+                raise GameSaveQueueFull("Очередь сохранения игр переполнена")
+            callbacks = entry[1] if entry is not None else []
+            if callback is not None:
+                callbacks.append(callback)
+            self._pending[game_id] = (game_server.copy(), callbacks)
+            self._start_worker()
+            self._condition.notify()
+
+    def pending_count(self):
+        """Количество игр, ожидающих записи (включая записываемую пачку)."""
+        with self._condition:
+            return len(self._pending) + self._in_flight
+
+    def flush(self, timeout=None):
+        """
+        Дождаться записи всех поставленных в очередь игр.
+
+        :param timeout: Максимальное время ожидания в секундах (None — без ограничения).
+        :return: True, если очередь пуста.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._in_flight, timeout)
+
+    def shutdown(self, timeout=None):
+        """Перестать принимать сохранения, записать оставшиеся игры и остановить служебный поток."""
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+            worker = self._worker
+        if worker is not None:
+            worker.join(timeout)
+
+    def _start_worker(self):
+        """Служебный поток запускается при первом сохранении (вызывается под блокировкой)."""
+        if self._worker is None:
+            self._worker = threading.Thread(target=self._run, name='game-save-queue', daemon=True)
+            self._worker.start()
+
+    def _run(self):
+        """Цикл служебного потока: забрать пачку, записать, сообщить результат."""
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._stopping)
+                if not self._pending:
+                    return  # Остановка, все игры записаны
+                batch = []
+                while self._pending and len(batch) < self.batch_size:
+                    batch.append(self._pending.popitem(last=False))
+                self._in_flight = len(batch)
+
+            errors = self._save(batch)
+            for game_id, (_, callbacks) in batch:
+                for callback in callbacks:
+                    try:
+                        callback(game_id, errors.get(game_id))
+                    except Exception:
+                        pass  # Ошибка уведомления не должна останавливать запись остальных игр
+
+            with self._condition:
+                self._in_flight = 0
+                self._condition.notify_all()
+
+    def _save(self, batch):
+        """
+        Записать пачку одной транзакцией. Если транзакция не прошла, игры пачки записываются по одной,
+        чтобы ошибка одной игры не отменяла сохранение остальных.
+
+        :return: Словарь {game_id: исключение} для игр, которые записать не удалось.
+        """
+        try:
+            self.save_batch([game_server for _, (game_server, _) in batch])
+            return {}
+        except Exception as e:
+            if len(batch) == 1:
+                return {batch[0][0]: e}
+
+        errors = {}
+        for game_id, (game_server, _) in batch:
+            try:
+                self.save_batch([game_server])
+            except Exception as e:
+                errors[game_id] = e
+        return errors
@@ -1,9 +1,24 @@
 from dependency_injector import containers, providers
 from flask_sqlalchemy import SQLAlchemy
 from datasource.repository.game_repository import GameRepository
-from datasource.service.data_service import DataService
+from datasource.service.cached_data_service import CachedDataService
+from datasource.cache.lru_ttl_cache import LruTtlCache
+from datasource.cache.expiring_set import ExpiringSet
+from datasource.db_session import engine_options, create_async_session_factory
+from datasource.repository.async_game_repository import AsyncGameRepository
+from datasource.service.async_data_service import AsyncDataService
+from datasource.service.game_save_queue import GameSaveQueue
+from datasource.journal.move_journal import MoveJournal
 from web.authentication.auth_service import AuthService
+from web.authentication.password_hasher import PasswordHasher
+from web.authentication.token_service import TokenService
+from web.authentication.user_authenticator import UserAuthenticator
 from datasource.model.db_params import define_models
+from datasource.registry.game_registry import GameRegistry
+from datasource.registry.game_state_store import InMemoryGameStateStore, SqliteGameStateStore
+from domain.service.machine_move_executor import MachineMoveExecutor
+from web.events.room_event_batcher import RoomEventBatcher
+from socketio_init import socketio
 
 
 class Container(containers.DeclarativeContainer):
@@ -12,37 +27,195 @@ class Container(containers.DeclarativeContainer):
     Использует Dependency Injector для внедрения зависимостей между компонентами.
 
     Атрибуты:
-        db: Singleton для подключения к базе данных (SQLAlchemy).
+        config: Настройки приложения (заполняются при старте).
+        db: Singleton для подключения к базе данных (SQLAlchemy), пул соединений задается настройками database.
         models: Singleton для определения моделей базы данных.
-        repository: Factory для создания репозитория с зависимостью от db и моделей.
-        data_service: Factory для создания сервиса данных с зависимостью от репозитория.
-        auth_service: Factory для создания сервиса авторизации с зависимостью от сервиса данных.
+        repository: Singleton репозитория с зависимостью от db и моделей.
+        user_cache: Singleton кэша игроков, общий для всех экземпляров сервиса данных.
+        game_cache: Singleton кэша сохраненных игр.
+        data_service: Singleton сервиса данных (с кэшем чтения) с зависимостью от репозитория.
+        password_hasher: Singleton ограниченного пула потоков для хэширования паролей.
+        auth_service: Singleton сервиса авторизации с зависимостью от сервиса данных и пула хэширования.
+        token_revocations: Singleton отозванных токенов доступа воркера.
+        token_service: Singleton сервиса подписанных токенов доступа и обновления.
+        user_authenticator: Singleton проверки авторизации запросов (сессия, токен, логин и пароль).
+        game_save_queue: Singleton очереди отложенного сохранения игр в БД.
+        move_journal: Singleton журнала ходов активных игр.
+        machine_move_executor: Singleton пула процессов для поиска хода машины.
+        game_state_store: Хранилище состояния активных игр, выбирается настройкой game_registry.backend.
+        game_registry: Singleton реестра активных игр.
+        room_events: Singleton объединения исходящих событий пространства имен /game в пакеты.
+        async_session_factory: Singleton фабрики асинхронных сессий БД (асинхронный режим сервера).
+        async_repository: Singleton асинхронного репозитория.
+        async_data_service: Singleton асинхронного сервиса данных.
 
     Методы:
         Нет пользовательских методов, так как класс является декларативным контейнером.
     """
-    # Инициализация db
-    db = providers.Singleton(SQLAlchemy)
+    # Настройки приложения
+    config = providers.Configuration()
+
+    # Инициализация db с настройками пула соединений
+    db = providers.Singleton(
+        SQLAlchemy,
+        engine_options=providers.Callable(
+            engine_options,
+            url=config.database.url,
+            pool_size=config.database.pool_size,
+            max_overflow=config.database.max_overflow,
+            pool_timeout=config.database.pool_timeout,
+            pool_recycle=config.database.pool_recycle,
+            pool_pre_ping=config.database.pool_pre_ping
+        )
+    )
 
     # Определение моделей
     models = providers.Singleton(define_models, db=db)
 
+    # Сервисы не хранят состояние запроса (сессия берется из db.session в текущем контексте),
+    # поэтому создаются один раз, а не при каждом внедрении
     # Репозиторий с зависимостью от db и моделей
-    repository = providers.Factory(
+    repository = providers.Singleton(
         GameRepository,
         db=db,
         players=models.provided[0],
-        saved_games=models.provided[2]  # Передаем модель SavedGames
+        saved_games=models.provided[2],  # Передаем модель SavedGames
+        revoked_tokens=models.provided[3]
+    )
+
+    # Кэши чтения игроков и сохраненных игр (общие для всех запросов воркера)
+    user_cache = providers.Singleton(
+        LruTtlCache,
+        max_size=config.data_cache.users_max_size,
+        ttl=config.data_cache.ttl
+    )
+    game_cache = providers.Singleton(
+        LruTtlCache,
+        max_size=config.data_cache.games_max_size,
+        ttl=config.data_cache.ttl
+    )
+
+    # Сервис с зависимостью от репозитория и кэшей
+    data_service = providers.Singleton(
+        CachedDataService,
+        repository=repository,
+        user_cache=user_cache,
+        game_cache=game_cache
     )
 
-    # Сервис с зависимостью от репозитория
-    data_service = providers.Factory(
-        DataService,
-        repository=repository
+    # Пул хэширования паролей (медленный расчет хэша не занимает все ядра при волне входов)
+    password_hasher = providers.Singleton(
+        PasswordHasher,
+        method=config.password_hashing.method,
+        max_workers=config.password_hashing.workers,
+        max_pending=config.password_hashing.max_pending,
+        timeout=config.password_hashing.timeout
     )
 
     # Сервис авторизации
-    auth_service = providers.Factory(
+    auth_service = providers.Singleton(
         AuthService,
-        user_service=data_service
+        user_service=data_service,
+        password_hasher=password_hasher
+    )
+
+    # Отозванные токены доступа этого воркера, каждый хранится до истечения срока токена
+    token_revocations = providers.Singleton(
+        ExpiringSet,
+        max_size=config.tokens.revocations_max_size
+    )
+
+    # Токены доступа и обновления
+    token_service = providers.Singleton(
+        TokenService,
+        secret_key=config.tokens.secret_key,
+        revoked=token_revocations,
+        revocation_store=data_service,
+        access_ttl=config.tokens.access_ttl,
+        refresh_ttl=config.tokens.refresh_ttl
+    )
+
+    # Проверка авторизации запросов для маршрутов с requires_auth
+    user_authenticator = providers.Singleton(
+        UserAuthenticator,
+        auth_service=auth_service,
+        token_service=token_service
+    )
+
+    # Очередь отложенного сохранения игр (функция записи пачки задается при старте приложения)
+    game_save_queue = providers.Singleton(
+        GameSaveQueue,
+        max_pending=config.save_queue.max_pending,
+        batch_size=config.save_queue.batch_size
+    )
+
+    # Журнал ходов активных игр (для восстановления после падения воркера)
+    move_journal = providers.Singleton(
+        MoveJournal,
+        path=config.move_journal.path,
+        compact_every=config.move_journal.compact_every,
+        fsync=config.move_journal.fsync
+    )
+
+    # Пул процессов для хода машины
+    machine_move_executor = providers.Singleton(
+        MachineMoveExecutor,
+        max_workers=config.machine_move.workers,
+        max_pending=config.machine_move.max_pending,
+        mp_context=config.machine_move.mp_context,
+        exhaustive_search_max_cells=config.search.exhaustive_max_cells,
+        move_time_budget=config.search.move_time_budget
+    )
+
+    # Хранилище состояния активных игр: в памяти (один воркер) или общее в SQLite (несколько воркеров)
+    game_state_store = providers.Selector(
+        config.game_registry.backend,
+        memory=providers.Singleton(
+            InMemoryGameStateStore,
+            shards=config.game_registry.shards
+        ),
+        sqlite=providers.Singleton(
+            SqliteGameStateStore,
+            path=config.game_registry.sqlite_path
+        )
+    )
+
+    # Реестр активных игр
+    game_registry = providers.Singleton(
+        GameRegistry,
+        store=game_state_store,
+        shards=config.game_registry.shards,
+        idle_ttl=config.game_registry.idle_ttl,
+        max_size=config.game_registry.max_size
+    )
+
+    # Исходящие события игры, отправленные за одну обработку, уходят клиентам одним пакетом
+    room_events = providers.Singleton(
+        RoomEventBatcher,
+        socketio=providers.Object(socketio),
+        namespace='/game',
+        enabled=config.event_batching.enabled,
+        max_events=config.event_batching.max_events
+    )
+
+    # Асинхронный режим сервера (tictaktoe_async): сессии БД с асинхронным драйвером и свой пул соединений
+    async_session_factory = providers.Singleton(
+        create_async_session_factory,
+        url=config.async_mode.database_url,
+        pool_size=config.database.pool_size,
+        max_overflow=config.database.max_overflow,
+        pool_timeout=config.database.pool_timeout,
+        pool_recycle=config.database.pool_recycle,
+        pool_pre_ping=config.database.pool_pre_ping
+    )
+    async_repository = providers.Singleton(
+        AsyncGameRepository,
+        session_factory=async_session_factory,
+        saved_games=models.provided[2]
+    )
+    async_data_service = providers.Singleton(
+        AsyncDataService,
+        repository=async_repository,
+        game_cache=game_cache,
+        data_service=data_service
     )
@@ -0,0 +1,112 @@
+from functools import lru_cache
+
+from domain.model.game_matrix import GameMatrix, win_lines
+
+
+@lru_cache(maxsize=None)
+def symmetries(rows, cols):
+    """
+    Симметрии поля (повороты и отражения), которые сохраняют выигрышные линии.
+    На квадратном поле их 8, на прямоугольном — только тождественная и зеркальная по горизонтали.
+
+    :return: Кортеж перестановок, perm[index] — клетка, в которую переходит клетка index.
+             Первая перестановка всегда тождественная.
+    """
+    candidates = [lambda r, c: (r, c), lambda r, c: (r, cols - 1 - c),
+                  lambda r, c: (rows - 1 - r, c), lambda r, c: (rows - 1 - r, cols - 1 - c)]
+    if rows == cols:
+        candidates += [lambda r, c: (c, r), lambda r, c: (c, rows - 1 - r),
+                       lambda r, c: (cols - 1 - c, r), lambda r, c: (cols - 1 - c, rows - 1 - r)]
+
+    lines = {frozenset(line) for line in win_lines(rows, cols)}
+    permutations = []
+    for transform in candidates:
+        perm = tuple(r * cols + c for r, c in (transform(*divmod(index, cols)) for index in range(rows * cols)))
+        if {frozenset(perm[index] for index in line) for line in lines} == lines:
+            permutations.append(perm)
+    return tuple(permutations)
+
+
+@lru_cache(maxsize=None)
+def inverse(perm):
+    """Обратная перестановка."""
+    result = [0] * len(perm)
+    for index, target in enumerate(perm):
+        result[target] = index
+    return tuple(result)
+
+
+@lru_cache(maxsize=None)
+def _byte_tables(perm):
+    """Таблицы перестановки по байтам маски: table[номер байта][значение байта] -> маска."""
+    tables = []
+    for start in range(0, len(perm), 8):
+        table = []
+        for value in range(256):
+            mask = 0
+            for bit in range(8):
+                if value >> bit & 1 and start + bit < len(perm):
+                    mask |= 1 << perm[start + bit]
+            table.append(mask)
+        tables.append(tuple(table))
+    return tuple(tables)
+
+
+def permute_mask(mask, perm):
+    """Применить перестановку клеток к битовой маске."""
+    result = 0
+    for table in _byte_tables(perm):
+        result |= table[mask & 0xFF]
+        mask >>= 8
+    return result
+
+
+def canonical_masks(rows, cols, player_one_mask, player_two_mask):
+    """
+    Каноническая форма позиции в виде масок — минимальная среди всех симметричных.
+
+    :return: Кортеж ((маска первого игрока, маска второго игрока), перестановка к канонической форме).
+    """
+    return min(((permute_mask(player_one_mask, perm), permute_mask(player_two_mask, perm)), perm)
+               for perm in symmetries(rows, cols))
+
+
+def apply_transform(board, perm):
+    """Новое поле, полученное из board перестановкой клеток perm."""
+    result = GameMatrix(board.rows, board.cols)
+    result.player_one_mask = permute_mask(board.player_one_mask, perm)
+    result.player_two_mask = permute_mask(board.player_two_mask, perm)
+    return result
+
+
+def canonicalize(board):
+    """
+    Привести поле к канонической форме.
+
+    :param board: Игровое поле (GameMatrix).
+    :return: Кортеж (каноническое поле, перестановка), restore() возвращает исходное поле.
+    """
+    _, perm = canonical_masks(board.rows, board.cols, board.player_one_mask, board.player_two_mask)
+    return apply_transform(board, perm), perm
+
+
+def restore(board, perm):
+    """Вернуть поле из канонической формы в исходную ориентацию."""
+    return apply_transform(board, inverse(perm))
+
+
+def map_cell(row, col, perm, cols):
+    """Клетка (строка, столбец) после перестановки perm."""
+    return divmod(perm[row * cols + col], cols)
+
+
+def unmap_cell(row, col, perm, cols):
+    """Клетка (строка, столбец) до перестановки perm."""
+    return divmod(inverse(perm)[row * cols + col], cols)
+
+
+def canonical_signature(board):
+    """Строковый ключ позиции, одинаковый для всех ее поворотов и отражений."""
+    (player_one_mask, player_two_mask), _ = canonical_masks(board.rows, board.cols,
+                                                            board.player_one_mask, board.player_two_mask)
+    return f'{board.rows}x{board.cols}:{player_one_mask:x}.{player_two_mask:x}'
@@ -1,3 +1,151 @@
+from functools import lru_cache
+
+
+@lru_cache(maxsize=None)
+def win_lines(rows, cols):
+    """
+    Выигрышные линии поля: строки, столбцы и две диагонали от верхних углов.
+
+    :param rows: Количество строк.
+    :param cols: Количество столбцов.
+    :return: Кортеж линий, каждая линия — кортеж индексов клеток (row * cols + col).
+    """
+    size = min(rows, cols)
+    lines = [tuple(row * cols + col for col in range(cols)) for row in range(rows)]
+    lines += [tuple(row * cols + col for row in range(rows)) for col in range(cols)]
+    lines.append(tuple(i * cols + i for i in range(size)))
+    lines.append(tuple(i * cols + cols - i - 1 for i in range(size)))
+    return tuple(lines)
+
+
+@lru_cache(maxsize=None)
+def cell_lines(rows, cols):
+    """
+    Номера выигрышных линий (в порядке win_lines), проходящих через каждую клетку.
+
+    :return: Кортеж, в котором для каждой клетки указан кортеж номеров линий.
+    """
+    lines = win_lines(rows, cols)
+    return tuple(tuple(line_index for line_index, line in enumerate(lines) if index in line)
+                 for index in range(rows * cols))
+
+
+@lru_cache(maxsize=None)
+def line_lengths(rows, cols):
+    """
+    Длины выигрышных линий (в порядке win_lines).
+
+    :return: Кортеж длин линий.
+    """
+    return tuple(len(line) for line in win_lines(rows, cols))
+
+
+@lru_cache(maxsize=None)
+def win_masks(rows, cols):
+    """
+    Битовые маски выигрышных линий и маски линий, проходящих через каждую клетку.
+
+    :return: Кортеж (маски всех линий, маски линий для каждой клетки).
+    """
+    masks = tuple(sum(1 << index for index in line) for line in win_lines(rows, cols))
+    cell_masks = tuple(tuple(mask for mask in masks if mask >> index & 1) for index in range(rows * cols))
+    return masks, cell_masks
+
+
 class GameMatrix:
+    """
+    Игровое поле в виде двух битовых масок — по одной на каждого игрока.
+    Бит с номером row * cols + col установлен, если клетка занята игроком.
+    Победа, ничья и поиск свободных клеток сводятся к побитовым операциям;
+    для шаблонов, событий Socket.IO и БД поле доступно в виде матрицы game_matrix.
+
+    Атрибуты:
+        rows: Количество строк.
+        cols: Количество столбцов.
+        player_one_mask: Клетки первого игрока (маркер 1).
+        player_two_mask: Клетки второго игрока (маркер 2).
+    """
+
+    PLAYER_ONE_MARKER = 1
+    PLAYER_TWO_MARKER = 2
+
     def __init__(self, rows=1, cols=1):
-        self.game_matrix = [[0 for _ in range(cols)] for _ in range(rows)]
+        self._resize(rows, cols)
+
+    def _resize(self, rows, cols):
+        """Задать размеры поля и очистить его."""
+        self.rows = rows
+        self.cols = cols
+        self.full_mask = (1 << rows * cols) - 1
+        self.win_masks, self.cell_win_masks = win_masks(rows, cols)
+        self.player_one_mask = 0
+        self.player_two_mask = 0
+
+    @property
+    def game_matrix(self):
+        """Поле в виде матрицы: 0 — пустая клетка, 1 и 2 — маркеры игроков."""
+        return [[self.get_cell(row, col) for col in range(self.cols)] for row in range(self.rows)]
+
+    @game_matrix.setter
+    def game_matrix(self, matrix):
+        """Загрузить поле из матрицы (размеры поля берутся из матрицы)."""
+        self._resize(len(matrix), len(matrix[0]))
+        for row, values in enumerate(matrix):
+            for col, marker in enumerate(values):
+                if marker:
+                    self.set_cell(row, col, marker)
+
+    def get_cell(self, row, col):
+        """Значение клетки: 0, 1 или 2."""
+        bit = 1 << row * self.cols + col
+        if self.player_one_mask & bit:
+            return self.PLAYER_ONE_MARKER
+        if self.player_two_mask & bit:
+            return self.PLAYER_TWO_MARKER
+        return 0
+
+    def set_cell(self, row, col, marker):
+        """Поставить маркер в клетку (0 — очистить клетку)."""
+        bit = 1 << row * self.cols + col
+        self.player_one_mask &= ~bit
+        self.player_two_mask &= ~bit
+        if marker == self.PLAYER_ONE_MARKER:
+            self.player_one_mask |= bit
+        elif marker == self.PLAYER_TWO_MARKER:
+            self.player_two_mask |= bit
+
+    def empty_mask(self):
+        """Маска свободных клеток."""
+        return self.full_mask & ~(self.player_one_mask | self.player_two_mask)
+
+    def empty_cells(self):
+        """Свободные клетки в виде списка (строка, столбец) по порядку обхода поля."""
+        empty = self.empty_mask()
+        cells = []
+        while empty:
+            bit = empty & -empty
+            cells.append(divmod(bit.bit_length() - 1, self.cols))
+            empty ^= bit
+        return cells
+
+    def is_full(self):
+        """Все клетки заняты."""
+        return (self.player_one_mask | self.player_two_mask) == self.full_mask
+
+    def winner(self):
+        """Маркер победившего игрока или 0, если собранной линии нет."""
+        for mask in self.win_masks:
+            if self.player_one_mask & mask == mask:
+                return self.PLAYER_ONE_MARKER
+            if self.player_two_mask & mask == mask:
+                return self.PLAYER_TWO_MARKER
+        return 0
+
+    def clear(self):
+        """Очистить поле, сохранив размеры."""
+        self.player_one_mask = 0
+        self.player_two_mask = 0
+
+    def board_key(self):
+        """Неизменяемый ключ позиции для кэшей поиска (размеры поля и маски игроков)."""
+        return self.rows, self.cols, self.player_one_mask, self.player_two_mask
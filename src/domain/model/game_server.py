@@ -53,6 +53,22 @@ class GameServer:
         self.current_player2 = current_player2  # UUID второго игрока
         self.status = status  # Текущий статус игры
         self.game_type = game_type  # Тип игры (1 — против машины, 2 — против игрока)
+        self.board_seq = 0  # Номер версии поля, растет при каждом изменении поля
+        self.line_counts = None  # Счетчики линий инкрементального сервиса игры (пересчитываются при загрузке)
+
+    def copy(self):
+        """
+        Копия игры с отдельным полем: изменения копии не затрагивают оригинал.
+
+        :return: Новый объект GameServer в том же состоянии.
+        """
+        game_server = GameServer(rows=self.board.rows, cols=self.board.cols, game_uuid=self.UUID,
+                                 game_type=self.game_type, current_player1=self.current_player1,
+                                 current_player2=self.current_player2, status=self.status)
+        game_server.board.player_one_mask = self.board.player_one_mask
+        game_server.board.player_two_mask = self.board.player_two_mask
+        game_server.board_seq = self.board_seq
+        return game_server
 
     def __repr__(self):
         """
@@ -1,5 +1,8 @@
 from abc import ABC, abstractmethod
+from domain.model.game_matrix import cell_lines, line_lengths
 from domain.model.game_server import GameServer
+from domain.service.search_engine import MinimaxEngine, TranspositionTable, AlphaBetaEngine
+from domain.service.opening_book import default_opening_book
 
 from abc import ABC, abstractmethod
 from typing import Optional, Tuple
@@ -86,41 +89,72 @@ class GameService(ABC):
 
 class TicTakToeGameService(GameService):
     """Класс, который управляет игровым процессом для игры крестики-нолики"""
-    def __init__(self, game_server: GameServer):
+    # Движок поиска общий для всех игр процесса, чтобы таблица транспозиций
+    # переиспользовалась между ходами и партиями
+    search_engine = MinimaxEngine(TranspositionTable(max_size=200_000))
+    # Значения по умолчанию; в приложении их задает раздел search конфигурации (через MachineMoveExecutor)
+    EXHAUSTIVE_SEARCH_MAX_CELLS = 9  # Максимальный размер поля (в клетках) для полного перебора
+    MOVE_TIME_BUDGET = 1.0  # Время на ход машины (в секундах) на полях больше 3x3
+    USE_OPENING_BOOK = True  # Сначала искать ответ в книге дебютов
+
+    def __init__(self, game_server: GameServer, exhaustive_search_max_cells: Optional[int] = None,
+                 move_time_budget: Optional[float] = None):
+        """
+        Инициализация сервиса игры.
+
+        :param game_server: Объект, представляющий сервер игры.
+        :param exhaustive_search_max_cells: Максимальный размер поля (в клетках) для полного перебора
+                                            (None — EXHAUSTIVE_SEARCH_MAX_CELLS).
+        :param move_time_budget: Время на ход машины в секундах на больших полях (None — MOVE_TIME_BUDGET).
+        """
         super().__init__(game_server)
+        self.exhaustive_search_max_cells = self.EXHAUSTIVE_SEARCH_MAX_CELLS \
+            if exhaustive_search_max_cells is None else exhaustive_search_max_cells
+        self.move_time_budget = self.MOVE_TIME_BUDGET if move_time_budget is None else move_time_budget
+        self.search_nodes = 0  # Узлов просчитано при последнем выборе хода машины (0 — ответ из книги)
 
     def make_player_move(self, player_id, row_index, col_index):
         """Сделать ход машины."""
         if (self.game_server.status ==  self.game_server.GAME_STATE['CURRENT PLAYER1 MOVE']
                 and player_id == self.game_server.current_player1):
-            self.game_server.board.game_matrix[row_index][col_index] = self.game_server.PLAYER_ONE_MARKER
+            self.game_server.board.set_cell(row_index, col_index, self.game_server.PLAYER_ONE_MARKER)
             return True
         elif (self.game_server.status == self.game_server.GAME_STATE['CURRENT PLAYER2 MOVE']
               and player_id == self.game_server.current_player2):
-            self.game_server.board.game_matrix[row_index][col_index] = self.game_server.PLAYER_TWO_MARKER
+            self.game_server.board.set_cell(row_index, col_index, self.game_server.PLAYER_TWO_MARKER)
             return True
 
         return False
 
     def make_machine_move(self):
-        """Сделать ход машины с использованием алгоритма минимакс."""
-        best_score = float('-inf')
-        best_move = None
-
-        for row in range(len(self.game_server.board.game_matrix)):
-            for col in range(len(self.game_server.board.game_matrix[row])):
-                if self.game_server.board.game_matrix[row][col] == 0:
-                    self.game_server.board.game_matrix[row][col] = self.game_server.PLAYER_TWO_MARKER
-                    score = self.minimax(0, False)
-                    self.game_server.board.game_matrix[row][col] = 0  # Отменяем ход
-
-                    if score > best_score:
-                        best_score = score
-                        best_move = (row, col)
-
+        """Сделать ход машины: ответ из книги дебютов, иначе поиск минимакс."""
+        best_move = self.choose_machine_move()
         if best_move:
-            row_index, col_index = best_move
-            self.game_server.board.game_matrix[row_index][col_index] = self.game_server.PLAYER_TWO_MARKER
+            self.place_machine_move(*best_move)
+        return best_move
+
+    def choose_machine_move(self):
+        """Выбрать ход машины (книга дебютов, затем поиск), поле не изменяется."""
+        best_move = None
+        self.search_nodes = 0
+        if self.USE_OPENING_BOOK:
+            best_move = default_opening_book().lookup(self.game_server.board)
+        if best_move is None:
+            best_move = self.find_machine_move()
+        return best_move
+
+    def place_machine_move(self, row_index, col_index):
+        """Поставить маркер машины в выбранную клетку."""
+        self.game_server.board.set_cell(row_index, col_index, self.game_server.PLAYER_TWO_MARKER)
+
+    def find_machine_move(self):
+        """Найти ход машины поиском (без книги дебютов), поле не изменяется."""
+        board = self.game_server.board
+        # Для полей больше 3x3 полный перебор невозможен: alpha-beta с ограничением времени
+        engine = self.search_engine if board.rows * board.cols <= self.exhaustive_search_max_cells \
+            else AlphaBetaEngine(time_budget=self.move_time_budget)
+        best_move, self.search_nodes = engine.search(self)
+        return best_move
 
     def verify_board(self, row_index, col_index):
         """Проверить, что не изменены предыдущие ходы и можно делать ход"""
@@ -129,87 +163,31 @@ class TicTakToeGameService(GameService):
                                           self.game_server.GAME_STATE['CURRENT PLAYER2 MOVE']):
             return self.game_server.ERR_CODE['GAME OVER'] # Игра окончена
 
-        if self.game_server.board.game_matrix[row_index][col_index] != 0:
+        if self.game_server.board.get_cell(row_index, col_index) != 0:
             return self.game_server.ERR_CODE['CELL NOT EMPTY']  # Ход невозможен
 
         return None
 
     def check_winner(self):
         """Проверить победителя или ничью."""
-        rows = len(self.game_server.board.game_matrix)
-        cols = len(self.game_server.board.game_matrix[0])
-
-        # Проверка строк
-        for row in range(rows):
-            if len(set(self.game_server.board.game_matrix[row])) == 1 and self.game_server.board.game_matrix[row][
-                0] != 0:
-                return self.game_server.GAME_STATE['CURRENT PLAYER2 WIN'] \
-                    if self.game_server.board.game_matrix[row][0] == self.game_server.PLAYER_TWO_MARKER \
-                    else self.game_server.GAME_STATE['CURRENT PLAYER1 WIN']
-
-        # Проверка столбцов
-        for col in range(cols):
-            column_values = [self.game_server.board.game_matrix[row][col] for row in range(rows)]
-            if len(set(column_values)) == 1 and column_values[0] != 0:
-                return self.game_server.GAME_STATE['CURRENT PLAYER2 WIN'] \
-                    if column_values[0] == self.game_server.PLAYER_TWO_MARKER \
-                    else self.game_server.GAME_STATE['CURRENT PLAYER1 WIN']
-
-        # Проверка диагоналей
-        diagonal_values = [self.game_server.board.game_matrix[row][row] for row in range(rows)]
-        if len(set(diagonal_values)) == 1 and diagonal_values[0] != 0:
-            return self.game_server.GAME_STATE['CURRENT PLAYER2 WIN'] \
-                if diagonal_values[0] == self.game_server.PLAYER_TWO_MARKER \
-                else self.game_server.GAME_STATE['CURRENT PLAYER1 WIN']
+        board = self.game_server.board
 
-        diagonal_values = [self.game_server.board.game_matrix[row][cols - row - 1] for row in range(rows)]
-        if len(set(diagonal_values)) == 1 and diagonal_values[0] != 0:
+        # Проверка строк, столбцов и диагоналей по маскам выигрышных линий
+        winner = board.winner()
+        if winner:
             return self.game_server.GAME_STATE['CURRENT PLAYER2 WIN'] \
-                if diagonal_values[0] == self.game_server.PLAYER_TWO_MARKER \
+                if winner == self.game_server.PLAYER_TWO_MARKER \
                 else self.game_server.GAME_STATE['CURRENT PLAYER1 WIN']
 
         # Ничья
-        if all(cell != 0 for row in self.game_server.board.game_matrix for cell in row):
+        if board.is_full():
             return self.game_server.GAME_STATE['DRAW']
 
         # Игра продолжается
         return None
 
     def clean_board(self):
-        self.game_server.board.game_matrix = [[0 for _ in range(len(self.game_server.board.game_matrix[0]))]
-                                       for _ in range(len(self.game_server.board.game_matrix))]
-
-    def minimax(self, depth, is_maximizing):
-        """Рекурсивный алгоритм минимакс."""
-        score = self.check_winner()
-
-        # Если игра завершена, возвращаем оценку
-        if score is not None:
-            return score
-
-        # Если это ход машины (максимизация)
-        if is_maximizing:
-            best_score = float('-inf')
-            for row in range(len(self.game_server.board.game_matrix)):
-                for col in range(len(self.game_server.board.game_matrix[row])):
-                    if self.game_server.board.game_matrix[row][col] == 0:
-                        self.game_server.board.game_matrix[row][col] = self.game_server.PLAYER_TWO_MARKER
-                        score = self.minimax(depth + 1, False)
-                        self.game_server.board.game_matrix[row][col] = 0  # Отменяем ход
-                        best_score = max(best_score, score)
-            return best_score
-
-        # Если это ход игрока (минимизация)
-        else:
-            best_score = float('inf')
-            for row in range(len(self.game_server.board.game_matrix)):
-                for col in range(len(self.game_server.board.game_matrix[row])):
-                    if self.game_server.board.game_matrix[row][col] == 0:
-                        self.game_server.board.game_matrix[row][col] = self.game_server.PLAYER_ONE_MARKER
-                        score = self.minimax(depth + 1, True)
-                        self.game_server.board.game_matrix[row][col] = 0  # Отменяем ход
-                        best_score = min(best_score, score)
-            return best_score
+        self.game_server.board.clear()
 
     def switch_player(self):
         """Переключить текущего игрока, если игра активна."""
@@ -232,3 +210,124 @@ class TicTakToeGameService(GameService):
             self.switch_player()
         else:
             self.game_server.status = game_result
+
+
+class LineCounts:
+    """
+    Счетчики маркеров каждого игрока в каждой выигрышной линии поля.
+    Хранятся в игре (GameServer.line_counts), поэтому сервис, который создается на каждое событие,
+    не пересчитывает их заново. Вместе со счетчиками запоминаются маски поля, по которым они посчитаны:
+    если поле изменено в обход сервиса (загрузка, восстановление из журнала, перезапуск), счетчики пересчитываются.
+
+    Атрибуты:
+        counts: Количество маркеров игрока в каждой линии {маркер: [количество по линиям]}.
+        moves_count: Количество занятых клеток.
+        last_move: Клетка последнего хода (строка, столбец) или None.
+        last_index: Номер клетки последнего хода в порядке обхода поля или None.
+        masks: Маски игроков, которым соответствуют счетчики.
+    """
+
+    def __init__(self, board):
+        """
+        Посчитать счетчики по текущему состоянию поля.
+
+        :param board: Игровое поле (GameMatrix).
+        """
+        self.counts = {
+            board.PLAYER_ONE_MARKER: [(board.player_one_mask & mask).bit_count() for mask in board.win_masks],
+            board.PLAYER_TWO_MARKER: [(board.player_two_mask & mask).bit_count() for mask in board.win_masks],
+        }
+        self.moves_count = (board.player_one_mask | board.player_two_mask).bit_count()
+        self.last_move = None
+        self.last_index = None
+        self.masks = (board.player_one_mask, board.player_two_mask)
+
+    def matches(self, board):
+        """Счетчики соответствуют текущему состоянию поля."""
+        return self.masks == (board.player_one_mask, board.player_two_mask) \
+            and len(self.counts[board.PLAYER_ONE_MARKER]) == len(board.win_masks)
+
+
+class IncrementalTicTakToeGameService(TicTakToeGameService):
+    """
+    Сервис игры крестики-нолики с инкрементальной проверкой победителя.
+    Хранит для каждого игрока количество его маркеров в каждой выигрышной линии
+    и после хода проверяет только линии, проходящие через сыгранную клетку.
+    Счетчики лежат в самой игре (LineCounts) и пересчитываются только после загрузки или перезапуска игры;
+    сервис держит ссылки на них и на таблицы линий поля, чтобы проверка не обращалась к игре.
+    """
+    def __init__(self, game_server: GameServer, exhaustive_search_max_cells: Optional[int] = None,
+                 move_time_budget: Optional[float] = None):
+        super().__init__(game_server, exhaustive_search_max_cells, move_time_budget)
+        board = self.game_server.board
+        self._cell_lines = cell_lines(board.rows, board.cols)
+        self._line_lengths = line_lengths(board.rows, board.cols)
+        self._cells_count = board.rows * board.cols
+        self._win_states = {
+            game_server.PLAYER_ONE_MARKER: game_server.GAME_STATE['CURRENT PLAYER1 WIN'],
+            game_server.PLAYER_TWO_MARKER: game_server.GAME_STATE['CURRENT PLAYER2 WIN'],
+        }
+        self._line_counts = getattr(self.game_server, 'line_counts', None)
+        if self._line_counts is None or not self._line_counts.matches(board):
+            self._rebuild_line_counts()
+
+    @property
+    def last_move(self):
+        """Клетка последнего хода (строка, столбец) или None."""
+        return self._line_counts.last_move
+
+    def _rebuild_line_counts(self):
+        """Пересчитать счетчики линий по текущему состоянию поля."""
+        self._line_counts = self.game_server.line_counts = LineCounts(self.game_server.board)
+
+    def _record_move(self, row_index, col_index):
+        """Учесть сделанный ход в счетчиках линий."""
+        board = self.game_server.board
+        line_counts = self._line_counts
+        cell_index = row_index * board.cols + col_index
+        counts = line_counts.counts[board.get_cell(row_index, col_index)]
+        for line_index in self._cell_lines[cell_index]:
+            counts[line_index] += 1
+        line_counts.moves_count += 1
+        line_counts.last_move = (row_index, col_index)
+        line_counts.last_index = cell_index
+        line_counts.masks = (board.player_one_mask, board.player_two_mask)
+
+    def make_player_move(self, player_id, row_index, col_index):
+        """Сделать ход человека и обновить счетчики линий."""
+        if super().make_player_move(player_id, row_index, col_index):
+            self._record_move(row_index, col_index)
+            return True
+        return False
+
+    def place_machine_move(self, row_index, col_index):
+        """Поставить маркер машины и обновить счетчики линий."""
+        super().place_machine_move(row_index, col_index)
+        self._record_move(row_index, col_index)
+
+    def check_winner(self):
+        """Проверить победителя по линиям, проходящим через клетку последнего хода."""
+        line_counts = self._line_counts
+        cell_index = line_counts.last_index
+        if cell_index is None:
+            return super().check_winner()  # Ходов через этот сервис еще не было
+
+        board = self.game_server.board
+        marker = board.PLAYER_ONE_MARKER if board.player_one_mask >> cell_index & 1 else board.PLAYER_TWO_MARKER
+        counts = line_counts.counts[marker]
+        line_lengths = self._line_lengths
+        for line_index in self._cell_lines[cell_index]:
+            if counts[line_index] == line_lengths[line_index]:
+                return self._win_states[marker]
+
+        # Ничья
+        if line_counts.moves_count == self._cells_count:
+            return self.game_server.GAME_STATE['DRAW']
+
+        # Игра продолжается
+        return None
+
+    def clean_board(self):
+        """Очистить игровое поле и счетчики линий."""
+        super().clean_board()
+        self._rebuild_line_counts()
@@ -0,0 +1,162 @@
+import itertools
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from threading import Lock
+
+from domain.service.game_service import TicTakToeGameService
+from monitoring.metrics import MACHINE_MOVE_SEARCH_SECONDS, MACHINE_MOVE_NODES
+
+
+def compute_machine_move(game_server, exhaustive_search_max_cells=None, move_time_budget=None):
+    """
+    Выбрать ход машины в процессе пула (поле копии игры не изменяется).
+
+    :param game_server: Копия игры, переданная в процесс пула.
+    :param exhaustive_search_max_cells: Максимальный размер поля (в клетках) для полного перебора.
+    :param move_time_budget: Время на ход машины в секундах на больших полях.
+    :return: Кортеж (ход, количество просчитанных узлов, время поиска в секундах),
+             ход — (строка, столбец) или None, если ходов нет.
+    """
+    started = time.perf_counter()
+    game_service = TicTakToeGameService(game_server, exhaustive_search_max_cells, move_time_budget)
+    move = game_service.choose_machine_move()
+    return move, game_service.search_nodes, time.perf_counter() - started
+
+
+class MachineMoveQueueFull(Exception):
+    """Очередь ходов машины переполнена."""
+
+
+class MachineMoveExecutor:
+    """
+    Выполняет поиск хода машины в пуле процессов, чтобы тяжелый поиск
+    не блокировал обработчики Socket.IO остальных игроков.
+    Для каждой игры одновременно считается не больше одного хода;
+    ход можно отменить (перезапуск или уход из игры), тогда его результат отбрасывается.
+
+    Атрибуты:
+        max_workers: Количество процессов пула (None — по числу ядер).
+        max_pending: Максимальное количество ходов в очереди и в работе.
+        exhaustive_search_max_cells: Максимальный размер поля (в клетках) для полного перебора.
+        move_time_budget: Время на ход машины в секундах на больших полях.
+    """
+
+    def __init__(self, max_workers=None, max_pending=1000, mp_context=None,
+                 exhaustive_search_max_cells=None, move_time_budget=None):
+        """
+        Инициализация исполнителя.
+
+        :param max_workers: Количество процессов пула (None — по числу ядер).
+        :param max_pending: Максимальное количество ходов в очереди и в работе.
+        :param mp_context: Способ запуска процессов ('fork', 'spawn', 'forkserver', None — по умолчанию).
+        :param exhaustive_search_max_cells: Максимальный размер поля (в клетках) для полного перебора
+                                            (None — значение TicTakToeGameService по умолчанию).
+        :param move_time_budget: Время на ход машины в секундах на больших полях (None — по умолчанию).
+        """
+        self.max_workers = max_workers
+        self.max_pending = max_pending if max_pending else 1000
+        self.mp_context = mp_context
+        self.exhaustive_search_max_cells = exhaustive_search_max_cells
+        self.move_time_budget = move_time_budget
+        self._executor = None
+        self._jobs = {}  # game_id -> (номер задачи, future)
+        self._counter = itertools.count()
+        self._lock = Lock()
+
+    def _get_executor(self):
+        """Пул процессов создается при первом ходе."""
+        if self._executor is None:
+            context = multiprocessing.get_context(self.mp_context) if self.mp_context else None
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers or None, mp_context=context)
+        return self._executor
+
+    def submit(self, game_server, callback):
+        """
+        Поставить ход машины в очередь.
+
+        :param game_server: Игра, для которой нужен ход (в пул передается копия).
+        :param callback: Функция callback(game_id, move, error), вызывается из служебного потока пула,
+                         если ход не был отменен.
+        :return: False, если для этой игры ход уже считается.
+        :raises MachineMoveQueueFull: Если очередь переполнена.
+        """
+        game_id = game_server.UUID
+        with self._lock:
+            if game_id in self._jobs:
+                return False
+            if len(self._jobs) >= self.max_pending:
+                raise MachineMoveQueueFull("Очередь ходов машины переполнена")
+            token = next(self._counter)
+            # Пул сериализует задачу позже, в своем служебном потоке, когда обработчик уже отпустил игру,
+            # поэтому передается снимок игры на момент хода, а не сама игра из реестра
+            future = self._get_executor().submit(compute_machine_move, game_server.copy(),
+                                                 self.exhaustive_search_max_cells, self.move_time_budget)
+            self._jobs[game_id] = (token, future)
+
+        submitter = threading.get_ident()
+        future.add_done_callback(lambda done: self._dispatch(submitter, game_id, token, done, callback))
+        return True
+
+    def _dispatch(self, submitter, game_id, token, future, callback):
+        """
+        Передать результат в служебном потоке.
+        Если ход посчитан раньше, чем добавлен callback, add_done_callback вызывает его сразу
+        в потоке обработчика, который еще держит игру (checkout), — тогда результат передается в новом потоке.
+        """
+        if threading.get_ident() == submitter:
+            threading.Thread(target=self._on_done, args=(game_id, token, future, callback), daemon=True).start()
+        else:
+            self._on_done(game_id, token, future, callback)
+
+    def cancel(self, game_id):
+        """
+        Отменить ход машины для игры (если он в очереди или считается).
+
+        :return: True, если для игры была задача.
+        """
+        with self._lock:
+            job = self._jobs.pop(game_id, None)
+        if job is None:
+            return False
+        job[1].cancel()  # Считающийся ход не прервать, но его результат будет отброшен
+        return True
+
+    def is_pending(self, game_id):
+        """Считается ли сейчас ход машины для игры."""
+        with self._lock:
+            return game_id in self._jobs
+
+    def pending_count(self):
+        """Количество ходов в очереди и в работе."""
+        with self._lock:
+            return len(self._jobs)
+
+    def _on_done(self, game_id, token, future, callback):
+        """Передать результат, если задача не была отменена или заменена."""
+        with self._lock:
+            job = self._jobs.get(game_id)
+            if job is None or job[0] != token:
+                return
+            del self._jobs[game_id]
+
+        if future.cancelled():
+            return
+        error = future.exception()
+        move = None
+        if error is None:
+            move, nodes, seconds = future.result()
+            MACHINE_MOVE_SEARCH_SECONDS.observe(seconds)
+            MACHINE_MOVE_NODES.observe(nodes)
+        callback(game_id, move, error)
+
+    def shutdown(self, wait=True):
+        """Остановить пул процессов."""
+        with self._lock:
+            jobs, self._jobs = self._jobs, {}
+        for _, future in jobs.values():
+            future.cancel()
+        if self._executor is not None:
+            self._executor.shutdown(wait=wait, cancel_futures=True)
+            self._executor = None
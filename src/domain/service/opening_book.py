@@ -0,0 +1,149 @@
+import argparse
+import json
+import os
+from functools import lru_cache
+
+from domain.model.board_symmetry import canonical_masks, inverse
+from domain.model.game_server import GameServer
+from domain.service.search_engine import AlphaBetaEngine, MinimaxEngine
+
+
+DEFAULT_BOOK_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'data', 'opening_book.json')
+
+
+class OpeningBook:
+    """
+    Книга дебютов: лучший ответ машины для позиций, которые часто встречаются в начале игры.
+    Позиции хранятся с точностью до симметрий поля, поэтому одна запись покрывает
+    все повороты и отражения позиции. Ответы посчитаны поиском до конца партии
+    (без ограничения глубины и времени), поэтому это точные ответы, а не эвристика.
+
+    Атрибуты:
+        books: Словарь {(строки, столбцы): {(маска первого игрока, маска второго игрока): клетка ответа}}.
+    """
+
+    def __init__(self, books=None):
+        """
+        Инициализация книги дебютов.
+
+        :param books: Позиции и ответы для каждого размера поля.
+        """
+        self.books = books if books is not None else {}
+
+    def lookup(self, board):
+        """
+        Найти ответ машины для позиции.
+
+        :param board: Игровое поле (GameMatrix).
+        :return: Кортеж (строка, столбец) или None, если позиции нет в книге.
+        """
+        book = self.books.get((board.rows, board.cols))
+        if not book:
+            return None
+
+        key, perm = canonical_masks(board.rows, board.cols, board.player_one_mask, board.player_two_mask)
+        move = book.get(key)
+        if move is None:
+            return None
+        return divmod(inverse(perm)[move], board.cols)  # Переводим ответ обратно в исходную ориентацию
+
+    def save(self, path):
+        """Сохранить книгу в JSON-файл."""
+        data = {f'{rows}x{cols}': {f'{player_one:x}.{player_two:x}': move
+                                   for (player_one, player_two), move in sorted(book.items())}
+                for (rows, cols), book in sorted(self.books.items())}
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(data, file, separators=(',', ':'))
+
+    @classmethod
+    def load(cls, path):
+        """Загрузить книгу из JSON-файла (пустая книга, если файла нет)."""
+        if not os.path.exists(path):
+            return cls()
+        with open(path, encoding='utf-8') as file:
+            data = json.load(file)
+
+        books = {}
+        for size, positions in data.items():
+            rows, cols = (int(value) for value in size.split('x'))
+            books[(rows, cols)] = {tuple(int(mask, 16) for mask in key.split('.')): move
+                                   for key, move in positions.items()}
+        return cls(books)
+
+    @classmethod
+    def generate(cls, rows, cols, max_ply=None, game_service_class=None, books=None):
+        """
+        Перебрать позиции с ходом машины, достижимые при игре машины по книге, и записать для каждой лучший ответ.
+
+        :param rows: Количество строк.
+        :param cols: Количество столбцов.
+        :param max_ply: Максимальное число занятых клеток в позиции с ходом машины (None — все позиции).
+        :param game_service_class: Сервис игры, на котором считается ответ (по умолчанию TicTakToeGameService).
+        :param books: Существующие записи, к которым добавляется новый размер поля.
+        :return: Книга дебютов.
+        """
+        if game_service_class is None:
+            from domain.service.game_service import TicTakToeGameService
+            game_service_class = TicTakToeGameService
+
+        max_ply = rows * cols if max_ply is None else max_ply
+        game_server = GameServer(rows, cols, status=GameServer.GAME_STATE['CURRENT PLAYER2 MOVE'])
+        board = game_server.board
+        service = game_service_class(game_server)
+        # Ход машины в игре на больших полях ограничен по времени; для книги нужен точный ответ,
+        # поэтому там поиск идет до заполнения поля без ограничения времени
+        engine = MinimaxEngine() if rows * cols <= game_service_class.EXHAUSTIVE_SEARCH_MAX_CELLS \
+            else AlphaBetaEngine(time_budget=None)
+        book = {}
+
+        # Позиции с ходом игрока; машина ходит детерминированно, поэтому после хода
+        # игрока перебираем все варианты, а за машину — только ее ответ из книги
+        frontier = {(0, 0)}
+        for ply in range(0, max_ply, 2):
+            next_frontier = set()
+            for player_one, player_two in frontier:
+                empty = board.full_mask & ~(player_one | player_two)
+                while empty:
+                    bit = empty & -empty
+                    empty ^= bit
+                    board.player_one_mask, board.player_two_mask = player_one | bit, player_two
+                    if service.check_winner() is not None:
+                        continue  # Игра закончена, ответ не нужен
+
+                    position = canonical_masks(rows, cols, board.player_one_mask, board.player_two_mask)[0]
+                    if position not in book:
+                        # Ответ машины считаем в канонической ориентации
+                        board.player_one_mask, board.player_two_mask = position
+                        row, col = engine.find_best_move(service)
+                        book[position] = row * cols + col
+
+                    board.player_one_mask, board.player_two_mask = position[0], position[1] | 1 << book[position]
+                    if service.check_winner() is None:
+                        next_frontier.add(canonical_masks(rows, cols, board.player_one_mask, board.player_two_mask)[0])
+            frontier = next_frontier
+
+        books = dict(books) if books is not None else {}
+        books[(rows, cols)] = book
+        return cls(books)
+
+
+@lru_cache(maxsize=None)
+def default_opening_book():
+    """Книга дебютов из DEFAULT_BOOK_PATH, загружается один раз на процесс."""
+    return OpeningBook.load(DEFAULT_BOOK_PATH)
+
+
+if __name__ == '__main__':
+    # Генерация книги: python -m domain.service.opening_book --rows 3 --cols 3
+    parser = argparse.ArgumentParser(description='Генерация книги дебютов для игры с машиной')
+    parser.add_argument('--rows', type=int, default=3)
+    parser.add_argument('--cols', type=int, default=3)
+    parser.add_argument('--max-ply', type=int, default=None,
+                        help='Максимальное число занятых клеток в позиции с ходом машины (по умолчанию все позиции)')
+    parser.add_argument('--output', default=DEFAULT_BOOK_PATH)
+    args = parser.parse_args()
+
+    existing = OpeningBook.load(args.output)
+    opening_book = OpeningBook.generate(args.rows, args.cols, args.max_ply, books=existing.books)
+    opening_book.save(args.output)
+    print(f'{args.rows}x{args.cols}: {len(opening_book.books[(args.rows, args.cols)])} позиций -> {args.output}')
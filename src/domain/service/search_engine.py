@@ -0,0 +1,423 @@
+import random
+import time
+from collections import OrderedDict
+from functools import lru_cache
+from threading import Lock
+
+from domain.model.board_symmetry import canonical_masks
+from domain.model.game_matrix import win_lines, cell_lines
+
+
+class TranspositionTable:
+    """
+    Таблица транспозиций для поиска хода машины.
+    Хранит оценки уже просчитанных позиций, ограничена по размеру и вытесняет
+    давно не использованные записи (LRU).
+
+    Атрибуты:
+        max_size: Максимальное количество позиций в таблице.
+        hits: Количество найденных в таблице позиций.
+        misses: Количество позиций, которых не было в таблице.
+        evictions: Количество вытесненных записей.
+    """
+
+    def __init__(self, max_size=200_000):
+        """
+        Инициализация таблицы транспозиций.
+
+        :param max_size: Максимальное количество позиций в таблице.
+        """
+        self.max_size = max_size
+        self._entries = OrderedDict()
+        self._lock = Lock()  # Таблица общая для всех игр, которые обслуживает процесс
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key):
+        """Получить оценку позиции или None, если позиция еще не просчитана."""
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        """Сохранить оценку позиции, вытеснив самую старую запись при переполнении."""
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            if len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        """Очистить таблицу и счетчики."""
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def stats(self) -> dict:
+        """Статистика использования таблицы."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+            }
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class _SearchStats:
+    """Счетчики одного поиска (у каждого вызова свои, движок их не хранит)."""
+
+    __slots__ = ('nodes',)
+
+    def __init__(self):
+        self.nodes = 0
+
+
+class MinimaxEngine:
+    """
+    Полный перебор минимакс с таблицей транспозиций.
+    Повторяющиеся позиции (в том числе полученные разным порядком ходов,
+    а также повороты и отражения одной позиции) оцениваются один раз,
+    дальше берутся из таблицы.
+
+    Один движок может искать ходы из нескольких потоков одновременно: общей остается
+    только таблица транспозиций (у нее своя блокировка), счетчик узлов у каждого поиска свой.
+
+    Атрибуты:
+        table: Таблица транспозиций (может быть общей для нескольких движков).
+        use_symmetry: Хранить позиции в канонической форме с учетом симметрий поля.
+    """
+
+    def __init__(self, table=None, use_symmetry=True):
+        """
+        Инициализация движка.
+
+        :param table: Таблица транспозиций (по умолчанию создается новая).
+        :param use_symmetry: Хранить позиции в канонической форме с учетом симметрий поля.
+        """
+        self.table = table if table is not None else TranspositionTable()
+        self.use_symmetry = use_symmetry
+
+    def find_best_move(self, game_service):
+        """
+        Найти лучший ход машины для текущей позиции.
+
+        :param game_service: Сервис игры, позиция которого анализируется.
+        :return: Кортеж (строка, столбец) или None, если ходов нет.
+        """
+        return self.search(game_service)[0]
+
+    def search(self, game_service):
+        """
+        Найти лучший ход машины и посчитать просчитанные узлы.
+
+        :param game_service: Сервис игры, позиция которого анализируется.
+        :return: Кортеж (ход, количество узлов); ход — (строка, столбец) или None, если ходов нет.
+        """
+        board = game_service.game_server.board
+        stats = _SearchStats()
+        best_score = float('-inf')
+        best_move = None
+
+        empty = board.empty_mask()
+        while empty:
+            bit = empty & -empty
+            empty ^= bit
+            board.player_two_mask |= bit
+            score = self._minimax(game_service, False, bit, stats)
+            board.player_two_mask ^= bit  # Отменяем ход
+
+            if score > best_score:
+                best_score = score
+                best_move = divmod(bit.bit_length() - 1, board.cols)
+
+        return best_move, stats.nodes
+
+    def _minimax(self, game_service, is_maximizing, last_bit, stats):
+        """
+        Рекурсивный минимакс с проверкой таблицы транспозиций, last_bit — клетка последнего хода,
+        stats — счетчики текущего поиска.
+        """
+        board = game_service.game_server.board
+        if self.use_symmetry:
+            # Оценка позиции не меняется при повороте или отражении поля
+            key = (board.rows, board.cols, canonical_masks(board.rows, board.cols, board.player_one_mask,
+                                                           board.player_two_mask)[0], is_maximizing)
+        else:
+            key = (board.board_key(), is_maximizing)
+        cached = self.table.get(key)
+        if cached is not None:
+            return cached
+
+        stats.nodes += 1
+        score = self._terminal_score(game_service.game_server, is_maximizing, last_bit)
+
+        # Если игра не завершена, перебираем ходы
+        if score is None:
+            best_score = float('-inf') if is_maximizing else float('inf')
+            empty = board.empty_mask()
+            while empty:
+                bit = empty & -empty
+                empty ^= bit
+                if is_maximizing:
+                    board.player_two_mask |= bit
+                    best_score = max(best_score, self._minimax(game_service, False, bit, stats))
+                    board.player_two_mask ^= bit  # Отменяем ход
+                else:
+                    board.player_one_mask |= bit
+                    best_score = min(best_score, self._minimax(game_service, True, bit, stats))
+                    board.player_one_mask ^= bit  # Отменяем ход
+            score = best_score
+
+        self.table.put(key, score)
+        return score
+
+    @staticmethod
+    def _terminal_score(game_server, is_maximizing, last_bit):
+        """Результат игры после хода last_bit: проверяются только линии через эту клетку."""
+        board = game_server.board
+        # Последний ход сделал соперник того, кто ходит сейчас
+        mover_mask = board.player_one_mask if is_maximizing else board.player_two_mask
+        for mask in board.cell_win_masks[last_bit.bit_length() - 1]:
+            if mover_mask & mask == mask:
+                return game_server.GAME_STATE['CURRENT PLAYER1 WIN'] if is_maximizing \
+                    else game_server.GAME_STATE['CURRENT PLAYER2 WIN']
+
+        if board.is_full():
+            return game_server.GAME_STATE['DRAW']
+        return None
+
+
+class _SearchTimeout(Exception):
+    """Исчерпан бюджет времени на ход."""
+
+
+class AlphaBetaEngine:
+    """
+    Поиск alpha-beta с итеративным углублением и ограничением времени на ход.
+    Используется для полей, на которых полный перебор невозможен (4x4 и больше).
+    Хранит состояние одного поиска, поэтому на каждый ход создается свой экземпляр.
+    Ходы упорядочиваются по лучшему ходу из таблицы транспозиций, killer-ходам
+    и истории отсечений; по истечении времени возвращается лучший ход последней
+    полностью просчитанной глубины.
+
+    Атрибуты:
+        time_budget: Время на один ход машины в секундах (None — без ограничения, поиск до заполнения поля).
+        max_depth: Ограничение глубины поиска (None — до заполнения поля).
+        nodes: Количество узлов, просчитанных при последнем поиске.
+        completed_depth: Глубина последней полностью просчитанной итерации.
+    """
+
+    WIN_SCORE = 1_000_000  # Оценка выигранной позиции (за вычетом числа ходов до победы)
+    TIME_CHECK_INTERVAL = 256  # Как часто (в узлах) проверять время
+
+    def __init__(self, time_budget=1.0, max_depth=None):
+        """
+        Инициализация движка.
+
+        :param time_budget: Время на один ход машины в секундах (None — без ограничения).
+        :param max_depth: Ограничение глубины поиска (None — без ограничения).
+        """
+        self.time_budget = time_budget
+        self.max_depth = max_depth
+        self.nodes = 0
+        self.completed_depth = 0
+
+    def find_best_move(self, game_service, time_budget=None):
+        """
+        Найти лучший ход машины за отведенное время.
+
+        :param game_service: Сервис игры, позиция которого анализируется.
+        :param time_budget: Время на ход в секундах (по умолчанию self.time_budget).
+        :return: Кортеж (строка, столбец) или None, если ходов нет.
+        """
+        game_server = game_service.game_server
+        matrix = game_server.board.game_matrix
+        rows, cols = len(matrix), len(matrix[0])
+        cells = [cell for row in matrix for cell in row]
+        empty = [index for index, cell in enumerate(cells) if cell == 0]
+        if not empty:
+            return None
+
+        self._markers = {1: game_server.PLAYER_TWO_MARKER, -1: game_server.PLAYER_ONE_MARKER}
+        self._lines, self._cell_lines = win_lines(rows, cols), cell_lines(rows, cols)
+        self._keys = _zobrist_keys(len(cells))
+        self._killers = [[None, None] for _ in range(len(cells) + 1)]
+        self._history = [0] * len(cells)
+        self._table = {}
+        time_budget = self.time_budget if time_budget is None else time_budget
+        self._deadline = float('inf') if time_budget is None else time.perf_counter() + time_budget
+        self.nodes = 0
+        self.completed_depth = 0
+
+        position_hash = 0
+        for index, cell in enumerate(cells):
+            if cell:
+                position_hash ^= self._keys[index][cell]
+
+        best_move = empty[0]
+        max_depth = len(empty) if self.max_depth is None else min(len(empty), self.max_depth)
+        for depth in range(1, max_depth + 1):
+            try:
+                move, score = self._search_root(cells, empty, depth, position_hash, best_move)
+            except _SearchTimeout:
+                break
+            best_move = move
+            self.completed_depth = depth
+            if abs(score) >= self.WIN_SCORE - len(cells):
+                break  # Найден форсированный результат, углубляться дальше незачем
+
+        return divmod(best_move, cols)
+
+    def search(self, game_service, time_budget=None):
+        """
+        Найти лучший ход машины и посчитать просчитанные узлы (интерфейс как у MinimaxEngine.search).
+
+        :param game_service: Сервис игры, позиция которого анализируется.
+        :param time_budget: Время на ход в секундах (по умолчанию self.time_budget).
+        :return: Кортеж (ход, количество узлов).
+        """
+        best_move = self.find_best_move(game_service, time_budget)
+        return best_move, self.nodes
+
+    def _search_root(self, cells, empty, depth, position_hash, previous_best):
+        """Итерация поиска на заданную глубину из корня (ход машины)."""
+        alpha, beta = -self.WIN_SCORE - 1, self.WIN_SCORE + 1
+        moves = sorted(empty, key=lambda move: (move != previous_best, -self._history[move]))
+        best_move, best_score = moves[0], -self.WIN_SCORE - 1
+        marker = self._markers[1]
+
+        for move in moves:
+            cells[move] = marker
+            score = -self._negamax(cells, depth - 1, -beta, -alpha, 1, -1, move,
+                                   position_hash ^ self._keys[move][marker], len(empty) - 1)
+            cells[move] = 0
+            if score > best_score:
+                best_score, best_move = score, move
+            alpha = max(alpha, score)
+
+        return best_move, best_score
+
+    def _negamax(self, cells, depth, alpha, beta, ply, side, last_move, position_hash, empty_count):
+        """Рекурсивный negamax с alpha-beta отсечениями, side — знак игрока, который ходит."""
+        self.nodes += 1
+        if self.nodes % self.TIME_CHECK_INTERVAL == 0 and time.perf_counter() > self._deadline:
+            raise _SearchTimeout()
+
+        # Последний ход сделал соперник: если он выиграл, позиция проиграна
+        if self._is_winning_move(cells, last_move):
+            return -(self.WIN_SCORE - ply)
+        if empty_count == 0:
+            return 0
+        if depth == 0:
+            return side * self._evaluate(cells)
+
+        original_alpha = alpha
+        entry = self._table.get(position_hash)
+        table_move = None
+        if entry is not None:
+            entry_depth, entry_score, entry_flag, table_move = entry
+            if entry_depth >= depth:
+                entry_score = self._score_from_table(entry_score, ply)
+                if entry_flag == 0:
+                    return entry_score
+                if entry_flag < 0:
+                    beta = min(beta, entry_score)
+                else:
+                    alpha = max(alpha, entry_score)
+                if alpha >= beta:
+                    return entry_score
+
+        killers = self._killers[ply]
+        moves = sorted((index for index, cell in enumerate(cells) if cell == 0),
+                       key=lambda move: (move != table_move, move not in killers, -self._history[move]))
+        marker = self._markers[side]
+        best_score, best_move = -self.WIN_SCORE - 1, moves[0]
+
+        for move in moves:
+            cells[move] = marker
+            score = -self._negamax(cells, depth - 1, -beta, -alpha, ply + 1, -side, move,
+                                   position_hash ^ self._keys[move][marker], empty_count - 1)
+            cells[move] = 0
+            if score > best_score:
+                best_score, best_move = score, move
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                # Ход вызвал отсечение: запоминаем его как killer и в истории
+                if move not in killers:
+                    killers[1] = killers[0]
+                    killers[0] = move
+                self._history[move] += depth * depth
+                break
+
+        if best_score <= original_alpha:
+            flag = -1  # Верхняя граница
+        elif best_score >= beta:
+            flag = 1  # Нижняя граница
+        else:
+            flag = 0  # Точная оценка
+        self._table[position_hash] = (depth, self._score_to_table(best_score, ply), flag, best_move)
+        return best_score
+
+    def _is_winning_move(self, cells, move):
+        """Проверить линии, проходящие через клетку последнего хода."""
+        marker = cells[move]
+        for line_index in self._cell_lines[move]:
+            if all(cells[index] == marker for index in self._lines[line_index]):
+                return True
+        return False
+
+    def _evaluate(self, cells):
+        """Эвристическая оценка позиции с точки зрения машины по открытым линиям."""
+        machine_marker, player_marker = self._markers[1], self._markers[-1]
+        score = 0
+        for line in self._lines:
+            machine = player = 0
+            for index in line:
+                if cells[index] == machine_marker:
+                    machine += 1
+                elif cells[index] == player_marker:
+                    player += 1
+            if machine and not player:
+                score += 4 ** machine
+            elif player and not machine:
+                score -= 4 ** player
+        return score
+
+    def _score_to_table(self, score, ply):
+        """Перевести оценку выигрыша в независимую от глубины узла форму."""
+        if score > self.WIN_SCORE // 2:
+            return score + ply
+        if score < -self.WIN_SCORE // 2:
+            return score - ply
+        return score
+
+    def _score_from_table(self, score, ply):
+        """Обратное преобразование к _score_to_table."""
+        if score > self.WIN_SCORE // 2:
+            return score - ply
+        if score < -self.WIN_SCORE // 2:
+            return score + ply
+        return score
+
+
+@lru_cache(maxsize=None)
+def _zobrist_keys(size):
+    """Случайные ключи Zobrist для хеширования позиций."""
+    generator = random.Random(size)
+    return [{marker: generator.getrandbits(64) for marker in (1, 2)} for _ in range(size)]
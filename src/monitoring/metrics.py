@@ -0,0 +1,246 @@
+import bisect
+import inspect
+import time
+from functools import wraps
+from threading import Lock
+
+# Границы корзин гистограмм времени по умолчанию (в секундах)
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _timed(func, registry, record, on_error=None):
+    """
+    Обертка, которая передает время выполнения func в record(seconds), а при исключении вызывает on_error().
+    Для корутин обертка тоже корутина (замеряется время до завершения, а не до создания корутины).
+    """
+    if inspect.iscoroutinefunction(func):
+        @wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            if not registry.enabled:
+                return await func(*args, **kwargs)
+            started = time.perf_counter()
+            try:
+                return await func(*args, **kwargs)
+            except Exception:
+                if on_error is not None:
+                    on_error()
+                raise
+            finally:
+                record(time.perf_counter() - started)
+        return async_wrapper
+
+    @wraps(func)
+    def wrapper(*args, **kwargs):
+        if not registry.enabled:
+            return func(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        except Exception:
+            if on_error is not None:
+                on_error()
+            raise
+        finally:
+            record(time.perf_counter() - started)
+    return wrapper
+
+
+def _format_labels(names, values, extra=()):
+    """Метки в формате Prometheus: {name="value",...}."""
+    pairs = list(zip(names, values)) + list(extra)
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    """Число в формате Prometheus."""
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """Общая часть метрик: имя, описание, метки и значения по наборам меток."""
+
+    TYPE = None
+
+    def __init__(self, registry, name, documentation, labels=()):
+        self.registry = registry
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._values = {}  # кортеж значений меток -> значение
+        self._lock = Lock()
+
+    def _key(self, labels):
+        return tuple(str(labels[name]) for name in self.label_names)
+
+    def render(self):
+        """Строки метрики в текстовом формате Prometheus."""
+        lines = [f'# HELP {self.name} {self.documentation}', f'# TYPE {self.name} {self.TYPE}']
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines.extend(self._render_value(key, value))
+        return lines
+
+    def _render_value(self, key, value):
+        return [f'{self.name}{_format_labels(self.label_names, key)} {_format_value(value)}']
+
+
+class Counter(_Metric):
+    """Счетчик, который только растет."""
+
+    TYPE = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    """Текущее значение; можно задать функцию, которая вычисляет значение при выгрузке метрик."""
+
+    TYPE = 'gauge'
+
+    def __init__(self, registry, name, documentation, labels=(), function=None):
+        super().__init__(registry, name, documentation, labels)
+        self.function = function
+
+    def set(self, value, **labels):
+        if not self.registry.enabled:
+            return
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def set_function(self, function):
+        """Вычислять значение функцией function() при выгрузке метрик (для метрики без меток)."""
+        self.function = function
+
+    def render(self):
+        if self.function is not None:
+            try:
+                value = self.function()
+            except Exception:
+                value = float('nan')
+            with self._lock:
+                self._values[()] = value
+        return super().render()
+
+
+class Histogram(_Metric):
+    """Распределение значений по корзинам (например, время обработки)."""
+
+    TYPE = 'histogram'
+
+    def __init__(self, registry, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(registry, name, documentation, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        if not self.registry.enabled:
+            return
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * len(self.buckets), 0, 0.0]  # корзины, количество, сумма
+            if index < len(self.buckets):
+                state[0][index] += 1
+            state[1] += 1
+            state[2] += value
+
+    def time(self, **labels):
+        """Декоратор: записывать время выполнения функции (или корутины)."""
+        def decorator(func):
+            return _timed(func, self.registry, lambda seconds: self.observe(seconds, **labels))
+        return decorator
+
+    def _render_value(self, key, state):
+        buckets, count, total = state
+        lines, cumulative = [], 0
+        for bound, bucket_count in zip(self.buckets, buckets):
+            cumulative += bucket_count
+            lines.append(f'{self.name}_bucket{_format_labels(self.label_names, key, [("le", _format_value(bound))])} '
+                         f'{cumulative}')
+        lines.append(f'{self.name}_bucket{_format_labels(self.label_names, key, [("le", "+Inf")])} {count}')
+        lines.append(f'{self.name}_count{_format_labels(self.label_names, key)} {count}')
+        lines.append(f'{self.name}_sum{_format_labels(self.label_names, key)} {_format_value(total)}')
+        return lines
+
+
+class MetricsRegistry:
+    """
+    Набор метрик приложения с выгрузкой в текстовом формате Prometheus.
+    Пока сбор выключен (enabled=False), метрики ничего не записывают, а декораторы времени
+    сразу вызывают функцию, поэтому инструментирование почти ничего не стоит.
+
+    Атрибуты:
+        enabled: Включен ли сбор метрик.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._metrics = {}
+        self._lock = Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labels=()):
+        return self._register(Counter(self, name, documentation, labels))
+
+    def gauge(self, name, documentation, labels=(), function=None):
+        return self._register(Gauge(self, name, documentation, labels, function))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(self, name, documentation, labels, buckets))
+
+    def method_timer(self, histogram, label='method'):
+        """
+        Декоратор методов (и корутин): время выполнения в histogram с меткой label, равной имени метода.
+        Исключения считаются отдельно в счетчике <имя гистограммы>_errors_total.
+        """
+        errors = self.counter(f'{histogram.name.removesuffix("_seconds")}_errors_total',
+                              f'Количество ошибок ({histogram.documentation})', (label,))
+
+        def decorator(func):
+            labels = {label: func.__name__}
+            return _timed(func, self, lambda seconds: histogram.observe(seconds, **labels),
+                          lambda: errors.inc(**labels))
+        return decorator
+
+    def render(self):
+        """Все метрики в текстовом формате Prometheus."""
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+# Метрики приложения (сбор включается настройкой metrics.enabled при старте)
+metrics = MetricsRegistry()
+
+SOCKETIO_HANDLER_SECONDS = metrics.histogram(
+    'socketio_handler_seconds', 'Время обработки событий Socket.IO', ('event',))
+DB_QUERY_SECONDS = metrics.histogram(
+    'db_query_seconds', 'Время запросов GameRepository', ('method',))
+MACHINE_MOVE_SEARCH_SECONDS = metrics.histogram(
+    'machine_move_search_seconds', 'Время поиска хода машины в процессе пула')
+MACHINE_MOVE_NODES = metrics.histogram(
+    'machine_move_nodes', 'Количество просчитанных узлов за ход машины',
+    buckets=(0, 10, 100, 1_000, 10_000, 100_000, 1_000_000, 10_000_000))
+ACTIVE_GAMES = metrics.gauge('active_games', 'Количество активных игр в реестре')
+CONNECTED_ROOMS = metrics.gauge('socketio_rooms', 'Количество комнат (игр) с подключенными клиентами в /game')
+
+# Декоратор методов GameRepository
+db_query_timer = metrics.method_timer(DB_QUERY_SECONDS)
@@ -5,5 +5,9 @@ from flask_socketio import SocketIO
 socketio = SocketIO()
 
 def init_socketio(app: Flask):
-    """Инициализация Socket.IO."""
-    socketio.init_app(app, cors_allowed_origins="*")
+    """
+    Инициализация Socket.IO.
+    Если в настройках задан SOCKETIO_MESSAGE_QUEUE, события рассылаются через очередь сообщений,
+    и клиенты, подключенные к разным воркерам, получают события друг друга.
+    """
+    socketio.init_app(app, cors_allowed_origins="*", message_queue=app.config.get('SOCKETIO_MESSAGE_QUEUE'))
@@ -0,0 +1,85 @@
+"""
+Асинхронный режим сервера: Socket.IO /game обслуживает асинхронный сервер (python-socketio, ASGI),
+БД — асинхронные сессии SQLAlchemy, страницы и авторизация — то же приложение Flask (в пуле потоков ASGI-сервера).
+Простаивающее подключение к игре занимает только объекты в цикле событий, а не поток,
+поэтому один процесс держит десятки тысяч подключений.
+
+Дополнительные зависимости: ASGI-сервер (uvicorn), asgiref и асинхронный драйвер БД
+(asyncpg для PostgreSQL, aiosqlite для SQLite):
+    pip install -r requirements-async.txt  (из корня репозитория)
+
+Реестр активных игр должен храниться в памяти (game_registry.backend = 'memory'): обработчики
+берут игру из реестра (checkout) прямо в цикле событий, а хранилище 'sqlite' блокировало бы его
+файловой блокировкой и запросами к SQLite.
+
+Запуск из каталога src:
+    uvicorn tictaktoe_async:asgi_app --host 0.0.0.0 --port 5000
+"""
+import asyncio
+import contextvars
+from contextlib import contextmanager
+
+import socketio
+from asgiref.wsgi import WsgiToAsgi
+
+from datasource.db_session import dispose_async_session_factory, session_scope
+from monitoring.metrics import CONNECTED_ROOMS
+from tictaktoe import app, container, count_game_rooms, db
+from web.route.game.async_game_namespace import AsyncGameNamespace
+
+if container.config.game_registry.backend() != 'memory':
+    raise RuntimeError("Асинхронный режим поддерживает только реестр игр в памяти (game_registry.backend = 'memory')")
+
+
+@contextmanager
+def data_service_context():
+    """Контекст приложения и сессия БД для блокирующих чтений асинхронного сервиса данных (в потоке пула)."""
+    with app.app_context(), session_scope(db):
+        yield
+
+
+container.async_data_service().sync_context = data_service_context
+
+# Асинхронный сервер Socket.IO; при нескольких воркерах события рассылаются через очередь сообщений
+message_queue = app.config.get('SOCKETIO_MESSAGE_QUEUE')
+sio = socketio.AsyncServer(
+    async_mode='asgi',
+    cors_allowed_origins='*',
+    client_manager=socketio.AsyncRedisManager(message_queue) if message_queue else None
+)
+sio.register_namespace(AsyncGameNamespace(
+    '/game',
+    games=container.game_registry(),
+    executor=container.machine_move_executor(),
+    journal=container.move_journal(),
+    data_service=container.async_data_service(),
+    batch_events=container.config.event_batching.enabled()
+))
+
+# Комнаты игр считаются по менеджеру асинхронного сервера (сервер Flask-SocketIO в этом режиме не используется)
+CONNECTED_ROOMS.set_function(lambda: count_game_rooms(sio.manager))
+
+
+def isolated_context(asgi_app):
+    """
+    Выполнять каждый запрос ASGI-приложения в новом пустом контексте (contextvars).
+    Следующий запрос того же keep-alive соединения uvicorn запускает в контексте предыдущего,
+    и WsgiToAsgi получает из него уже завершенный исполнитель asgiref
+    ("CurrentThreadExecutor already quit or is broken").
+
+    :param asgi_app: ASGI-приложение.
+    :return: ASGI-приложение, каждый вызов которого выполняется в отдельной задаче с пустым контекстом.
+    """
+    async def app_in_context(scope, receive, send):
+        await contextvars.Context().run(asyncio.create_task, asgi_app(scope, receive, send))
+
+    return app_in_context
+
+
+async def shutdown():
+    """Закрыть соединения асинхронного пула БД, иначе потоки драйвера не дают процессу завершиться."""
+    await dispose_async_session_factory(container.async_session_factory())
+
+
+# Запросы /socket.io обрабатывает асинхронный сервер, остальные — приложение Flask
+asgi_app = socketio.ASGIApp(sio, other_asgi_app=isolated_context(WsgiToAsgi(app)), on_shutdown=shutdown)
@@ -1,4 +1,3 @@
-from werkzeug.security import generate_password_hash, check_password_hash
 from base64 import b64decode
 from pydantic import BaseModel, validator
 
@@ -26,20 +25,22 @@ class SignUpRequest(BaseModel):
         return v
 
 class AuthService:
-    def __init__(self, user_service):
+    def __init__(self, user_service, password_hasher):
         self.user_service = user_service
+        self.password_hasher = password_hasher  # Пул хэширования паролей (PasswordHasher)
 
     def register(self, sign_up_request: SignUpRequest) -> bool:
         """
         Регистрация пользователя.
         :param sign_up_request: Данные для регистрации (логин и пароль).
         :return: True, если регистрация успешна, иначе False.
+        :raises PasswordHasherBusy: Если очередь хэширования паролей переполнена.
         """
         if sign_up_request.password != sign_up_request.confirm_password:
             raise ValueError("The passwords do not match")
         if self.user_service.get_user(sign_up_request.login):
             return False  # Пользователь уже существует
-        hashed_password = generate_password_hash(sign_up_request.password)
+        hashed_password = self.password_hasher.hash(sign_up_request.password)
         self.user_service.save_user(login=sign_up_request.login, password=hashed_password)
         return True
 
@@ -49,6 +50,7 @@ class AuthService:
         :param auth_header: Заголовок Authorization в формате "Basic base64(login:password)".
         :return: UUID пользователя, если авторизация успешна.
         :raises ValueError: Если авторизация не удалась.
+        :raises PasswordHasherBusy: Если очередь хэширования паролей переполнена.
         """
         if not auth_header or not auth_header.startswith("Basic "):
             raise ValueError("Invalid authorization header")
@@ -62,7 +64,7 @@ class AuthService:
 
         # Поиск пользователя
         user = self.user_service.get_user(login)
-        if not user or not check_password_hash(user.password, password):
+        if not user or not self.password_hasher.verify(user.password, password):
             raise ValueError("Invalid login or password")
 
         return user.uuid
@@ -0,0 +1,77 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from threading import BoundedSemaphore
+
+from werkzeug.security import generate_password_hash, check_password_hash
+
+
+class PasswordHasherBusy(Exception):
+    """Очередь хэширования паролей переполнена, запрос нужно повторить позже."""
+
+
+class PasswordHasher:
+    """
+    Хэширование и проверка паролей в отдельном ограниченном пуле потоков.
+    Функции формирования ключа (scrypt, pbkdf2) специально медленные; hashlib отпускает GIL на время
+    расчета, поэтому пул ограничивает, сколько ядер может занять волна входов, а остальные обработчики
+    (события игр) продолжают выполняться. Если в очереди и в работе уже max_pending паролей,
+    новый запрос сразу отклоняется исключением PasswordHasherBusy.
+
+    Атрибуты:
+        method: Метод и стоимость хэширования в формате werkzeug
+                (например, 'scrypt:32768:8:1' или 'pbkdf2:sha256:600000').
+        max_workers: Количество потоков пула.
+        max_pending: Максимальное количество паролей в очереди и в работе.
+        timeout: Сколько секунд ждать результат (None — без ограничения), после этого запрос
+                 отклоняется исключением PasswordHasherBusy.
+    """
+
+    def __init__(self, method='scrypt', max_workers=2, max_pending=32, timeout=None):
+        """
+        Инициализация пула хэширования.
+
+        :param method: Метод и стоимость хэширования в формате werkzeug.
+        :param max_workers: Количество потоков пула.
+        :param max_pending: Максимальное количество паролей в очереди и в работе.
+        :param timeout: Сколько секунд ждать результат (None — без ограничения).
+        """
+        self.method = method or 'scrypt'
+        self.max_workers = max_workers or 2
+        self.max_pending = max_pending or 32
+        self.timeout = timeout
+        self._slots = BoundedSemaphore(self.max_pending)
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='password-hasher')
+
+    def hash(self, password):
+        """
+        Хэш пароля для сохранения в БД.
+
+        :raises PasswordHasherBusy: Если очередь хэширования переполнена.
+        """
+        return self._run(generate_password_hash, password, method=self.method)
+
+    def verify(self, password_hash, password):
+        """
+        Проверить пароль по сохраненному хэшу (метод берется из самого хэша).
+
+        :raises PasswordHasherBusy: Если очередь хэширования переполнена.
+        """
+        return self._run(check_password_hash, password_hash, password)
+
+    def _run(self, func, *args, **kwargs):
+        """Выполнить func в пуле и дождаться результата."""
+        if not self._slots.acquire(blocking=False):
+            raise PasswordHasherBusy("Очередь хэширования паролей переполнена")
+        try:
+            future = self._executor.submit(func, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        future.add_done_callback(lambda done: self._slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except FutureTimeoutError:
+            raise PasswordHasherBusy("Хэширование пароля не закончилось вовремя")
+
+    def shutdown(self, wait=True):
+        """Остановить пул потоков."""
+        self._executor.shutdown(wait=wait, cancel_futures=True)
@@ -0,0 +1,151 @@
+import hashlib
+import secrets
+from datetime import timedelta
+
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+
+from datasource.cache.expiring_set import ExpiringSetFull
+
+
+class TokenRevocationFull(Exception):
+    """Нет места для отозванного токена: отзыв нужно повторить позже."""
+
+
+class TokenService:
+    """
+    Подписанные токены доступа без хранения на сервере.
+    Токен доступа живет недолго (access_ttl) и проверяется одной проверкой HMAC — без запроса к БД
+    и без хэширования пароля; токен обновления живет дольше (refresh_ttl) и обменивается
+    на новую пару токенов, при этом старый токен обновления отзывается.
+    Отозванный токен (его jti) хранится до истечения срока этого токена и не вытесняется раньше.
+    Отозванные токены обновления пишутся в revocation_store (таблица БД, общая для всех воркеров),
+    и обмен токена обновления одноразовый во всех воркерах. Отозванные токены доступа хранятся в памяти
+    воркера (revoked, множество ограниченного размера): в воркере, который отозвал токен, отзыв действует сразу,
+    в остальных токен доступа остается действительным до конца своего срока (не дольше access_ttl).
+
+    Атрибуты:
+        access_ttl: Время жизни токена доступа в секундах.
+        refresh_ttl: Время жизни токена обновления в секундах.
+        revoked: Отозванные токены доступа воркера (ExpiringSet, jti до истечения срока токена).
+        revocation_store: Общее хранилище отозванных токенов обновления (revoke_token, is_token_revoked),
+                          None — токены обновления тоже хранятся в revoked.
+    """
+
+    ACCESS = 'access'
+    REFRESH = 'refresh'
+
+    def __init__(self, secret_key, revoked, revocation_store=None, access_ttl=900, refresh_ttl=1209600):
+        """
+        Инициализация сервиса токенов.
+
+        :param secret_key: Секретный ключ для подписи токенов.
+        :param revoked: Отозванные токены доступа (ExpiringSet).
+        :param revocation_store: Общее хранилище отозванных токенов обновления (например, DataService).
+        :param access_ttl: Время жизни токена доступа в секундах.
+        :param refresh_ttl: Время жизни токена обновления в секундах.
+        """
+        self.access_ttl = access_ttl or 900
+        self.refresh_ttl = refresh_ttl or 1209600
+        self.revoked = revoked
+        self.revocation_store = revocation_store
+        # Для токенов доступа и обновления разные соли: один нельзя выдать за другой
+        self._serializers = {
+            kind: URLSafeTimedSerializer(secret_key, salt=f'{kind}-token',
+                                         signer_kwargs={'digest_method': hashlib.sha256})
+            for kind in (self.ACCESS, self.REFRESH)
+        }
+
+    def issue(self, user_uuid):
+        """
+        Выдать пару токенов пользователю.
+
+        :return: Словарь access_token, refresh_token, token_type, expires_in.
+        """
+        return {
+            'access_token': self._dumps(self.ACCESS, user_uuid),
+            'refresh_token': self._dumps(self.REFRESH, user_uuid),
+            'token_type': 'Bearer',
+            'expires_in': self.access_ttl,
+        }
+
+    def verify_access(self, token):
+        """
+        Проверить токен доступа.
+
+        :return: UUID пользователя.
+        :raises ValueError: Если токен поддельный, просрочен или отозван.
+        """
+        return self._loads(self.ACCESS, token)[0]['sub']
+
+    def refresh(self, refresh_token):
+        """
+        Обменять токен обновления на новую пару токенов (старый токен обновления отзывается).
+
+        :raises ValueError: Если токен поддельный, просрочен или отозван (в том числе уже обменян).
+        :raises TokenRevocationFull: Если отозванный токен некуда записать.
+        """
+        payload, expires_at = self._loads(self.REFRESH, refresh_token)
+        # Отзыв атомарен: из двух одновременных обменов одного токена проходит только первый
+        if not self._revoke(self.REFRESH, payload['jti'], expires_at):
+            raise ValueError("Token revoked")
+        return self.issue(payload['sub'])
+
+    def revoke(self, token):
+        """
+        Отозвать токен доступа или обновления.
+
+        :return: True, если токен был действителен и отозван.
+        :raises TokenRevocationFull: Если отозванный токен некуда записать.
+        """
+        for kind in (self.ACCESS, self.REFRESH):
+            try:
+                payload, expires_at = self._loads(kind, token)
+            except ValueError:
+                continue
+            self._revoke(kind, payload['jti'], expires_at)
+            return True
+        return False
+
+    def _dumps(self, kind, user_uuid):
+        """Подписанный токен вида kind для пользователя."""
+        return self._serializers[kind].dumps({'sub': str(user_uuid), 'jti': secrets.token_urlsafe(12)})
+
+    def _loads(self, kind, token):
+        """
+        Проверить подпись, срок жизни и отзыв токена вида kind.
+
+        :return: Кортеж (содержимое токена, момент, с которого токен не принимается, — datetime в UTC).
+        """
+        max_age = self.access_ttl if kind == self.ACCESS else self.refresh_ttl
+        try:
+            payload, issued_at = self._serializers[kind].loads(token or '', max_age=max_age, return_timestamp=True)
+        except SignatureExpired:
+            raise ValueError("Token expired")
+        except BadSignature:
+            raise ValueError("Invalid token")
+        if not isinstance(payload, dict) or 'sub' not in payload or 'jti' not in payload:
+            raise ValueError("Invalid token")
+        if self._is_revoked(kind, payload['jti']):
+            raise ValueError("Token revoked")
+        # Токен принимается, пока его возраст в целых секундах не больше max_age, то есть и в секунду
+        # issued_at + max_age: отзыв должен действовать до следующей секунды
+        return payload, issued_at + timedelta(seconds=max_age + 1)
+
+    def _is_revoked(self, kind, jti):
+        """Отозван ли токен вида kind."""
+        if kind == self.REFRESH and self.revocation_store is not None:
+            return self.revocation_store.is_token_revoked(jti)
+        return jti in self.revoked
+
+    def _revoke(self, kind, jti, expires_at):
+        """
+        Отозвать токен до момента expires_at (оставшийся срок жизни токена).
+
+        :return: False, если токен уже был отозван.
+        """
+        if kind == self.REFRESH and self.revocation_store is not None:
+            return self.revocation_store.revoke_token(jti, expires_at)
+        try:
+            return self.revoked.add(jti, expires_at.timestamp())
+        except ExpiringSetFull:
+            raise TokenRevocationFull("Слишком много отозванных токенов, повторите позже")
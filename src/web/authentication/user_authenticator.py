@@ -1,42 +1,80 @@
 from functools import wraps
 from flask import redirect, url_for, request, jsonify, g, Response, session
+from dependency_injector.wiring import inject, Provide
+
+from web.authentication.password_hasher import PasswordHasherBusy
+
+# Через сколько секунд повторить запрос, если сервер перегружен (очередь хэширования паролей переполнена)
+BUSY_RETRY_AFTER = 2
+
+
+def busy_response():
+    """Ответ 503, если запрос нельзя обработать сейчас (например, очередь хэширования паролей переполнена)."""
+    response = jsonify({'error': 'Сервер перегружен, повторите попытку позже'})
+    response.status_code = 503
+    response.headers['Retry-After'] = str(BUSY_RETRY_AFTER)
+    return response
 
 
 class UserAuthenticator:
-    def __init__(self, auth_service):
+    def __init__(self, auth_service, token_service):
         self.auth_service = auth_service
+        self.token_service = token_service
 
     def authenticate_request(self):
         """
-        Проверяет авторизацию запроса.
-        :return: UUID пользователя, если авторизация успешна.
-        :raises ValueError: Если авторизация не удалась.
+        Проверяет авторизацию запроса: сессия, затем токен доступа (Bearer), затем логин и пароль (Basic).
+        Сессия и токен проверяются только по подписи, без запроса к БД и хэширования пароля.
+        :return: UUID пользователя или ответ (перенаправление на вход, 401, 503 при перегрузке).
         """
+        # UUID пользователя в сессии (подписанный cookie)
+        user_uuid = session.get('user_uuid')
+        if user_uuid:
+            return user_uuid
+
         auth_header = request.headers.get("Authorization")
         if not auth_header:
             # Перенаправление на страницу входа с параметром next
             return redirect(url_for('auth.login', next=request.url, error='Пожалуйста, авторизуйтесь'))
 
+        if auth_header.startswith("Bearer "):
+            try:
+                return self.token_service.verify_access(auth_header[len("Bearer "):])
+            except ValueError as e:
+                return self._unauthorized(str(e))
+
+        # Логин и пароль проверяются один раз, дальше используется сессия
         try:
             user_uuid = self.auth_service.authenticate(auth_header)
-            return user_uuid
         except ValueError as e:
-            raise ValueError(str(e))
-
-def requires_auth(authenticator):
-    def decorator(f):
-        @wraps(f)
-        def decorated_function(*args, **kwargs):
-            # Проверяем, есть ли UUID пользователя в сессии
-            user_uuid = session.get('user_uuid')
-            if not user_uuid:
-                result = authenticator.authenticate_request()
-                if isinstance(result, Response) and result.status_code == 302:
-                    return result
-                user_uuid = result
-                session['user_uuid'] = str(user_uuid)  # Сохраняем UUID в сессии
-
-            g.user_uuid = user_uuid
-            return f(*args, **kwargs)
-        return decorated_function
-    return decorator
+            return self._unauthorized(str(e))
+        except PasswordHasherBusy:
+            return busy_response()
+        session['user_uuid'] = str(user_uuid)  # Сохраняем UUID в сессии
+        return user_uuid
+
+    @staticmethod
+    def _unauthorized(message):
+        """Ответ 401 для неверных учетных данных или токена."""
+        response = jsonify({'error': message})
+        response.status_code = 401
+        return response
+
+
+@inject
+def authenticate_current_request(authenticator: UserAuthenticator = Provide['user_authenticator']):
+    """Проверить авторизацию текущего запроса (аутентификатор внедряется из контейнера)."""
+    return authenticator.authenticate_request()
+
+
+def requires_auth(f):
+    """Декоратор маршрутов: UUID авторизованного пользователя записывается в g.user_uuid."""
+    @wraps(f)
+    def decorated_function(*args, **kwargs):
+        result = authenticate_current_request()
+        if isinstance(result, Response):
+            return result
+
+        g.user_uuid = str(result)
+        return f(*args, **kwargs)
+    return decorated_function
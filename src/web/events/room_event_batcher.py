@@ -0,0 +1,91 @@
+import threading
+from contextlib import contextmanager
+
+from flask import request
+
+
+class RoomEventBatcher:
+    """
+    Объединяет исходящие события Socket.IO, которые отправляются за одну обработку входящего события
+    (или за одно применение хода машины), в один пакет для каждого получателя.
+    Внутри batch() события копятся в текущем потоке, при выходе из batch() подряд идущие события
+    для одного получателя (комнаты или клиента) отправляются одним событием 'batch' {'events': [[имя, данные], ...]};
+    одиночное событие отправляется как обычно. Порядок событий сохраняется.
+
+    Атрибуты:
+        socketio: Сервер Socket.IO.
+        namespace: Пространство имен, в которое отправляются события.
+        enabled: Объединять ли события (False — каждое событие отправляется сразу).
+        max_events: Сколько событий можно накопить, после этого накопленное отправляется досрочно.
+    """
+
+    BATCH_EVENT = 'batch'
+
+    def __init__(self, socketio, namespace, enabled=True, max_events=32):
+        """
+        Инициализация.
+
+        :param socketio: Сервер Socket.IO.
+        :param namespace: Пространство имен, в которое отправляются события.
+        :param enabled: Объединять ли события.
+        :param max_events: Сколько событий можно накопить до досрочной отправки.
+        """
+        self.socketio = socketio
+        self.namespace = namespace
+        self.enabled = enabled
+        self.max_events = max_events or 32
+        self._local = threading.local()
+
+    @contextmanager
+    def batch(self):
+        """Копить события до выхода из блока (вложенные блоки отправляют события при выходе из внешнего)."""
+        depth = getattr(self._local, 'depth', 0)
+        if depth == 0:
+            self._local.pending = []  # (получатель, имя события, данные)
+        self._local.depth = depth + 1
+        try:
+            yield self
+        finally:
+            self._local.depth = depth
+            if depth == 0:
+                self.flush()
+
+    def emit(self, event, data, room=None):
+        """
+        Отправить событие в комнату room или (если комната не указана) клиенту, который прислал текущее событие.
+        """
+        target = room if room is not None else request.sid
+        if not self.enabled or not getattr(self._local, 'depth', 0):
+            self.socketio.emit(event, data, namespace=self.namespace, to=target)
+            return
+        self._local.pending.append((target, event, data))
+        if len(self._local.pending) >= self.max_events:
+            self.flush()
+
+    def flush(self):
+        """Отправить накопленные события: подряд идущие события одному получателю — одним пакетом."""
+        pending, self._local.pending = getattr(self._local, 'pending', []), []
+        for target, event, data in self.coalesce(pending):
+            self.socketio.emit(event, data, namespace=self.namespace, to=target)
+
+    @classmethod
+    def coalesce(cls, pending):
+        """
+        Объединить подряд идущие события одному получателю в пакеты.
+
+        :param pending: Список (получатель, имя события, данные).
+        :return: Список (получатель, имя события, данные) для отправки, одиночные события не меняются.
+        """
+        packets, start = [], 0
+        while start < len(pending):
+            target = pending[start][0]
+            end = start + 1
+            while end < len(pending) and pending[end][0] == target:
+                end += 1
+            if end - start == 1:
+                packets.append(pending[start])
+            else:
+                events = [[event, data] for _, event, data in pending[start:end]]
+                packets.append((target, cls.BATCH_EVENT, {'events': events}))
+            start = end
+        return packets
@@ -1,15 +1,20 @@
+import uuid
+
 from domain.model.game_server import GameServer
-from domain.service.game_service import TicTakToeGameService
+from domain.service.game_service import IncrementalTicTakToeGameService
 from web.model.game import Game
 
 class DomainMapper:
     GAME_ERROR_MESSAGES = {101: 'Игра окончена, обновите игру', 102: 'Клетка занята, повторите ход'}
     GAME_STATE = {'DRAW': 0, 'CURRENT PLAYER1 WIN': -1, 'CURRENT PLAYER2 WIN': 1, 'WAIT PLAYERS': 200,
                   'CURRENT PLAYER1 MOVE': 201, 'CURRENT PLAYER2 MOVE': 202}
+    # Реализация GameService, которая используется по умолчанию
+    GAME_SERVICE_CLASS = IncrementalTicTakToeGameService
 
-    def __init__(self, game_server: GameServer):
+    def __init__(self, game_server: GameServer, game_service_class=None):
         self.game_server = game_server
-        self.game_service = TicTakToeGameService(game_server=self.game_server)
+        service_class = game_service_class if game_service_class is not None else self.GAME_SERVICE_CLASS
+        self.game_service = service_class(game_server=self.game_server)
         self.game = Game(uuid=self.game_server.UUID)
 
     def make_player_move(self, player_id, row_index, col_index):
@@ -20,6 +25,14 @@ class DomainMapper:
         """Сделать ход компьютера."""
         return self.game_service.make_machine_move()
 
+    def choose_machine_move(self):
+        """Выбрать ход компьютера, не изменяя поле."""
+        return self.game_service.choose_machine_move()
+
+    def apply_machine_move(self, row_index, col_index):
+        """Поставить ход компьютера, посчитанный заранее (например, в пуле процессов)."""
+        return self.game_service.place_machine_move(row_index, col_index)
+
     def verify_board(self, row_index, col_index):
         """Проверить, что не изменены предыдущие ходы"""
         return self.game_service.verify_board(row_index, col_index)
@@ -50,9 +63,34 @@ class DomainMapper:
         return self.game_service.check_game_state()
 
     def restart_game(self):
-        """Обновить игру, очистить игровое поле"""
+        """Обновить игру, очистить игровое поле. Возвращает клетки, которые были заняты."""
+        board = self.game_server.board
+        cleared = [(row, col) for row in range(board.rows) for col in range(board.cols) if board.get_cell(row, col)]
         self.game_service.clean_board()
         self.game_server.status = self.game_server.GAME_STATE['CURRENT PLAYER1 MOVE']
+        return cleared
+
+    def make_board_delta(self, cells):
+        """Изменение поля для клиентов: новый номер версии поля и клетки [строка, столбец, маркер]."""
+        self.game_server.board_seq += 1
+        board = self.game_server.board
+        return {'seq': self.game_server.board_seq, 'cells': [[row, col, board.get_cell(row, col)] for row, col in cells]}
+
+    def make_board_snapshot(self):
+        """Полное поле и номер его версии (при подключении и по запросу клиента, пропустившего изменения)."""
+        return {'board': self.game_server.board.game_matrix, 'seq': self.game_server.board_seq}
+
+    @staticmethod
+    def parse_player_id(player_id):
+        """
+        Проверить UUID игрока, присланный клиентом (игроки хранятся в БД по UUID).
+
+        :return: UUID в виде строки или None, если клиент его не прислал.
+        :raises ValueError: Если значение не UUID.
+        """
+        if player_id is None or player_id == '':
+            return None
+        return str(uuid.UUID(str(player_id)))
 
     @staticmethod
     def convert_index(index):
@@ -5,7 +5,9 @@ from datasource.service.data_service import DataService
 from dependency_injector.wiring import inject, Provide
 from di.container import Container
 from web.authentication.auth_service import AuthService, SignUpRequest
-from web.authentication.user_authenticator import UserAuthenticator, requires_auth
+from web.authentication.password_hasher import PasswordHasherBusy
+from web.authentication.token_service import TokenService, TokenRevocationFull
+from web.authentication.user_authenticator import UserAuthenticator, requires_auth, busy_response
 
 
 auth_bp = Blueprint('auth', __name__, template_folder='templates')
@@ -37,9 +39,11 @@ def validate_csrf_token(token, secret_key, max_age=3600):
 
 @auth_bp.route('/login', methods=['GET', 'POST'])
 @inject
-def login(auth_service: AuthService = Provide[Container.auth_service]):
+def login(auth_service: AuthService = Provide[Container.auth_service],
+          token_service: TokenService = Provide[Container.token_service]):
     """
     Обработчик авторизации пользователя через AJAX.
+    Кроме сессии выдает токены доступа и обновления для клиентов без cookie.
     """
     if request.method == 'POST':
         try:
@@ -53,11 +57,13 @@ def login(auth_service: AuthService = Provide[Container.auth_service]):
 
             # Перенаправление на нужный ресурс после успешной авторизации
             # return redirect(next_url or url_for('home'))  # Переход на главную страницу по умолчанию
-            return jsonify({'redirect_url': next_url}), 200
+            return jsonify({'redirect_url': next_url, **token_service.issue(user_uuid)}), 200
             # return jsonify({'message': 'Login successful', 'user_uuid': user_uuid}), 200
         except ValueError:
             # Возврат формы с сообщением об ошибке
             return jsonify({'error': 'Неверный логин или пароль'}), 401
+        except PasswordHasherBusy:
+            return busy_response()
         except Exception as e:
             return jsonify({'error': f'Internal server error, {e}'}), 500
     else:
@@ -101,6 +107,8 @@ def register(auth_service: AuthService = Provide[Container.auth_service]):
             else:
                 return jsonify({'error': f'Пользователь {user_login} уже зарегистрирован!'}), 409
 
+        except PasswordHasherBusy:
+            return busy_response()
         except Exception as e:
             # Обработка ошибок валидации
             if hasattr(e, 'errors') and callable(e.errors):
@@ -113,6 +121,35 @@ def register(auth_service: AuthService = Provide[Container.auth_service]):
     else:
         return render_template('auth/register.html', error=None)
 
+@auth_bp.route('/token/refresh', methods=['POST'])
+@inject
+def refresh_token(token_service: TokenService = Provide[Container.token_service]):
+    """
+    Обмен токена обновления на новую пару токенов (JSON: refresh_token).
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        return jsonify(token_service.refresh(data.get('refresh_token'))), 200
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 401
+    except TokenRevocationFull:
+        return busy_response()
+
+@auth_bp.route('/token/revoke', methods=['POST'])
+@inject
+def revoke_token(token_service: TokenService = Provide[Container.token_service]):
+    """
+    Отзыв токена доступа или обновления (JSON: token), например при выходе из приложения.
+    """
+    data = request.get_json(silent=True) or {}
+    try:
+        revoked = token_service.revoke(data.get('token'))
+    except TokenRevocationFull:
+        return busy_response()
+    if not revoked:
+        return jsonify({'error': 'Invalid token'}), 400
+    return jsonify({'revoked': True}), 200
+
 @auth_bp.route('/logout', methods=['GET'])
 def logout():
     """Выход из системы."""
@@ -0,0 +1,203 @@
+import asyncio
+
+import socketio
+
+from domain.service.machine_move_executor import MachineMoveQueueFull
+from monitoring.metrics import SOCKETIO_HANDLER_SECONDS
+from web.events.room_event_batcher import RoomEventBatcher
+from web.mapper.domain_mapper import DomainMapper
+
+
+class AsyncGameNamespace(socketio.AsyncNamespace):
+    """
+    Пространство имен /game для асинхронного режима сервера (tictaktoe_async): те же события и тот же протокол,
+    что у обработчиков Flask-SocketIO в game_routes, но обработчики — корутины в одном цикле событий,
+    поэтому подключенный клиент не занимает поток.
+    Игра берется из реестра (checkout) только на время изменения в памяти, без ожидания внутри блока;
+    события, собранные за обработку, отправляются после него (подряд идущие одному получателю — одним пакетом).
+    Ход машины считается в пуле процессов, запись в БД идет через асинхронный сервис данных.
+
+    Атрибуты:
+        games: Реестр активных игр.
+        executor: Пул процессов для хода машины.
+        journal: Журнал ходов активных игр.
+        data_service: Асинхронный сервис данных (AsyncDataService).
+        batch_events: Объединять ли события одной обработки в пакеты.
+    """
+
+    def __init__(self, namespace, games, executor, journal, data_service, batch_events=True):
+        """
+        Инициализация пространства имен.
+
+        :param namespace: Имя пространства имен ('/game').
+        :param games: Реестр активных игр.
+        :param executor: Пул процессов для хода машины.
+        :param journal: Журнал ходов активных игр.
+        :param data_service: Асинхронный сервис данных.
+        :param batch_events: Объединять ли события одной обработки в пакеты.
+        """
+        super().__init__(namespace)
+        self.games = games
+        self.executor = executor
+        self.journal = journal
+        self.data_service = data_service
+        self.batch_events = batch_events
+        self._loop = None
+
+    async def on_connect(self, sid, *args):
+        """Цикл событий запоминается для передачи в него результатов пула процессов."""
+        self._loop = asyncio.get_running_loop()
+
+    async def _send(self, pending):
+        """Отправить события (получатель, имя события, данные)."""
+        packets = RoomEventBatcher.coalesce(pending) if self.batch_events else pending
+        for target, event, data in packets:
+            await self.emit(event, data, to=target)
+
+    @SOCKETIO_HANDLER_SECONDS.time(event='join_game')
+    async def on_join_game(self, sid, data):
+        """Обработка подключения игрока к игре."""
+        game_id = data['game_id']
+        try:
+            guest_id = DomainMapper.parse_player_id(data.get('guest'))  # ID гостя (может быть None для хозяина)
+        except ValueError:
+            await self.emit('error', {'message': 'Некорректный идентификатор игрока'}, to=sid)
+            return
+        outbox = []
+
+        with self.games.checkout(game_id) as game_server:
+            if game_server:
+                domain_mapper = DomainMapper(game_server)
+                outbox.append((game_id, 'game_process', {'result': domain_mapper.make_info_message()}))
+                # Второй игрок (гость)
+                if game_server.current_player2 is None and game_server.game_type == 2 and guest_id:
+                    game_server.current_player2 = guest_id  # Устанавливаем гостя
+                    game_server.status = 201  # Игра начинается
+                    self.journal.record_snapshot(game_server)
+                    outbox.append((game_id, 'game_started', {'message': 'Игра началась!'}))
+                else:
+                    # Полное поле получает только подключившийся клиент
+                    outbox.append((sid, 'update_board', domain_mapper.make_board_snapshot()))
+
+        if not game_server:
+            await self.emit('error', {'message': 'Игра не найдена'}, to=sid)
+            return
+        await self.enter_room(sid, game_id)
+        await self._send(outbox)
+
+    @SOCKETIO_HANDLER_SECONDS.time(event='make_move')
+    async def on_make_move(self, sid, data):
+        """Обработка хода игрока."""
+        game_id = data['game_id']
+        player_id = data['player_id']
+        row, col = data['row'], data['col']
+        outbox = []
+
+        with self.games.checkout(game_id) as game_server:
+            if not game_server:
+                outbox.append((game_id, 'error', {'message': 'Игра не найдена'}))
+            else:
+                domain_mapper = DomainMapper(game_server)
+                # Проверка корректности хода
+                error_code = domain_mapper.verify_board(row, col)
+                if error_code:
+                    outbox.append((game_id, 'error', {'message': domain_mapper.make_error_message(error_code)}))
+                else:
+                    # Ход игрока
+                    if domain_mapper.make_player_move(player_id, row, col):
+                        domain_mapper.check_game_state()
+                        self.journal.record_move(game_server, row, col)
+                        outbox.append((game_id, 'board_delta', domain_mapper.make_board_delta([(row, col)])))
+                        outbox.append((game_id, 'game_process', {'result': domain_mapper.make_info_message()}))
+                    # Если игра с машиной, ставим ход машины в очередь пула процессов
+                    if game_server.game_type == 1 and game_server.status == 202:
+                        outbox.append((game_id, 'block_input', {}))
+                        try:
+                            submitted = self.executor.submit(game_server, self._machine_move_done)
+                        except MachineMoveQueueFull:
+                            outbox.append((game_id, 'error', {'message': 'Сервер перегружен, повторите ход позже'}))
+                            outbox.append((game_id, 'unblock_input', {}))
+                        else:
+                            if not submitted:
+                                # Ход машины для этой игры уже считается: ввод разблокирует его результат
+                                outbox.append((game_id, 'error',
+                                               {'message': 'Машина уже делает ход, дождитесь ответа'}))
+
+        await self._send(outbox)
+
+    def _machine_move_done(self, game_id, move, error):
+        """Результат пула процессов (служебный поток) передается в цикл событий."""
+        asyncio.run_coroutine_threadsafe(self._finish_machine_move(game_id, move, error), self._loop)
+
+    async def _finish_machine_move(self, game_id, move, error):
+        """Применить посчитанный ход машины и разослать результат участникам игры."""
+        outbox = []
+        with self.games.checkout(game_id) as game_server:
+            if not game_server or game_server.status != 202:
+                return  # Игра закрыта или перезапущена, пока считался ход
+            if error or move is None:
+                outbox.append((game_id, 'error', {'message': 'Ошибка при ходе машины'}))
+            else:
+                domain_mapper = DomainMapper(game_server)
+                if domain_mapper.verify_board(*move) is None:
+                    domain_mapper.apply_machine_move(*move)
+                    domain_mapper.check_game_state()
+                    self.journal.record_move(game_server, *move)
+                    outbox.append((game_id, 'board_delta', domain_mapper.make_board_delta([move])))
+                outbox.append((game_id, 'game_process', {'result': domain_mapper.make_info_message()}))
+            outbox.append((game_id, 'unblock_input', {}))  # Разблокировка ввода
+
+        await self._send(outbox)
+
+    @SOCKETIO_HANDLER_SECONDS.time(event='restart_game')
+    async def on_restart_game(self, sid, data):
+        """Начать игру заново."""
+        game_id = data.get('game_id')
+        outbox = []
+        with self.games.checkout(game_id) as game_server:
+            if not game_server:
+                outbox.append((sid, 'error', {'message': 'Игра не найдена'}))
+            else:
+                # Ход машины для старой партии больше не нужен
+                if self.executor.cancel(game_id):
+                    outbox.append((game_id, 'unblock_input', {}))
+                domain_mapper = DomainMapper(game_server)
+                delta = domain_mapper.make_board_delta(domain_mapper.restart_game())
+                self.journal.record_snapshot(game_server)
+                outbox.append((game_id, 'game_process', {'result': domain_mapper.make_info_message()}))
+                outbox.append((game_id, 'board_delta', delta))
+
+        await self._send(outbox)
+
+    @SOCKETIO_HANDLER_SECONDS.time(event='resync_board')
+    async def on_resync_board(self, sid, data):
+        """Отправить полное поле клиенту, который пропустил изменения поля (разрыв в номерах версий)."""
+        with self.games.checkout(data['game_id']) as game_server:
+            snapshot = DomainMapper(game_server).make_board_snapshot() if game_server else None
+        if snapshot is None:
+            await self.emit('error', {'message': 'Игра не найдена'}, to=sid)
+        else:
+            await self.emit('update_board', snapshot, to=sid)
+
+    @SOCKETIO_HANDLER_SECONDS.time(event='save_game')
+    async def on_save_game(self, sid, data):
+        """Сохранить игру (запись в БД не блокирует цикл событий)."""
+        with self.games.checkout(data.get('game_id')) as game_server:
+            game_copy = game_server.copy() if game_server else None
+        if game_copy is None:
+            await self.emit('error', {'message': 'Игра не найдена'}, to=sid)
+            return
+        try:
+            await self.data_service.save_current_game(game_copy)
+        except Exception as e:
+            await self.emit('error', {'message': f'Ошибка при сохранении игры: {str(e)}'}, to=sid)
+            return
+        await self.emit('success', {'message': 'Игра сохранена'}, to=sid)
+
+    @SOCKETIO_HANDLER_SECONDS.time(event='disconnect')
+    async def on_disconnect(self, sid, *args):
+        """Отменить ход машины в играх, которые покинул игрок."""
+        for room in self.rooms(sid):
+            game_server = self.games.get(room)
+            if game_server and game_server.game_type == 1:
+                self.executor.cancel(room)
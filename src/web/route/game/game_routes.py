@@ -2,28 +2,33 @@ from flask import Blueprint, request, redirect, url_for, render_template, flash,
 from dependency_injector.wiring import inject, Provide
 from flask_socketio import emit, join_room, rooms
 from socketio_init import socketio
-import asyncio
 
 from domain.model.game_server import GameServer
+from domain.service.machine_move_executor import MachineMoveExecutor, MachineMoveQueueFull
 from web.model.game import Game
 from web.mapper.domain_mapper import DomainMapper
 from datasource.service.data_service import DataService
+from datasource.service.game_save_queue import GameSaveQueue, GameSaveQueueFull
+from datasource.registry.game_registry import GameRegistry
+from datasource.journal.move_journal import MoveJournal
 from di.container import Container
-from web.authentication.user_authenticator import UserAuthenticator, requires_auth
+from monitoring.metrics import SOCKETIO_HANDLER_SECONDS
+from web.events.room_event_batcher import RoomEventBatcher
+from web.authentication.user_authenticator import requires_auth
 
 game_bp = Blueprint('game', __name__, template_folder='templates')
-active_games = {}
 
 @game_bp.route('/start-game', methods=['GET'])
-@requires_auth(UserAuthenticator(Provide[Container.auth_service]))
+@requires_auth
 @inject
-def start_game():
+def start_game(games: GameRegistry = Provide[Container.game_registry],
+               journal: MoveJournal = Provide[Container.move_journal]):
     """Стартовая страница с созданием новой игры."""
     game_type = request.args.get('game_type', default=1, type=int)
     rows = request.args.get('rows', default=3, type=int)
     cols = request.args.get('cols', default=3, type=int)
 
-    user_uuid = session.get('user_uuid')
+    user_uuid = g.user_uuid
 
     # Создание новой игры
     game_server = GameServer(
@@ -33,16 +38,17 @@ def start_game():
         current_player1=user_uuid,
         status=200 if game_type != 1 else 201
     )
-    active_games[game_server.UUID] = game_server
+    games.put(game_server)
+    journal.record_snapshot(game_server)
 
     # Перенаправление на страницу игры
     return redirect(url_for('.game_page', game_id=game_server.UUID))
 
 @game_bp.route('/join-game', methods=['GET'])
-@requires_auth(UserAuthenticator(Provide[Container.auth_service]))
+@requires_auth
 def join_game_page():
     """Страница присоединения к игре."""
-    current_player_id = session.get('user_uuid')  # Получение ID текущего игрока
+    current_player_id = g.user_uuid  # Получение ID текущего игрока
     return render_template(
         'game/join_game.html',
         current_player_id=current_player_id
@@ -50,10 +56,10 @@ def join_game_page():
 
 @game_bp.route('/<game_id>', methods=['GET'])
 @inject
-def game_page(game_id):
+def game_page(game_id, games: GameRegistry = Provide[Container.game_registry]):
     """Страница игрового поля."""
     # Получение игры из активных игр
-    game_server = active_games.get(game_id)
+    game_server = games.get(game_id)
     if not game_server:
         return "Игра не найдена", 404
     # ID текущего пользователя
@@ -72,121 +78,190 @@ def game_page(game_id):
 
 @game_bp.route('/load/<uuid>', methods=['GET'])
 @inject
-def load_game(uuid, service: DataService = Provide[Container.data_service]):
+def load_game(uuid, service: DataService = Provide[Container.data_service],
+              games: GameRegistry = Provide[Container.game_registry],
+              journal: MoveJournal = Provide[Container.move_journal]):
     """Загрузить игру из списка сохраненных."""
     game_server = service.upload_selected_game(uuid)
     if game_server:
-        active_games[game_server.UUID] = game_server  # Сохраняем игру в словаре
+        games.put(game_server)  # Сохраняем игру в реестре активных игр
+        journal.record_snapshot(game_server)
         return redirect(url_for('.game_page', game_id=game_server.UUID))  # Перенаправление на страницу игры
     return "Игра не найдена", 404
 
 @game_bp.route('/saved-games', methods=['GET'])
-@requires_auth(UserAuthenticator(Provide[Container.auth_service]))
+@requires_auth
 @inject
 def saved_games(service: DataService = Provide[Container.data_service]):
     """Показать список сохраненных игр для авторизованного пользователя."""
     # Получение UUID пользователя из контекста запроса
-    user_uuid = session.get('user_uuid')
+    user_uuid = g.user_uuid
 
-    # Получение списка сохраненных игр для данного пользователя
-    saved_games_list = service.get_saved_games_by_user(user_uuid)
-    return render_template('game/saved_games.html', saved_games=saved_games_list)
+    # Получение страницы сохраненных игр для данного пользователя
+    try:
+        saved_games_list, next_cursor = service.get_saved_games_page(user_uuid, request.args.get('cursor'))
+    except ValueError:
+        return "Некорректная страница", 400
+    return render_template('game/saved_games.html', saved_games=saved_games_list, next_cursor=next_cursor)
 
 @socketio.on('join_game', namespace='/game')
-def handle_join_game(data):
+@SOCKETIO_HANDLER_SECONDS.time(event='join_game')
+@inject
+def handle_join_game(data, games: GameRegistry = Provide[Container.game_registry],
+                     journal: MoveJournal = Provide[Container.move_journal],
+                     events: RoomEventBatcher = Provide[Container.room_events]):
     """Обработка подключения игрока к игре."""
     game_id = data['game_id']
-    guest_id = data.get('guest')  # ID гостя (может быть None для хозяина)
-
-    # Проверка существования игры
-    if game_id not in active_games:
-        emit('error', {'message': 'Игра не найдена'})
+    try:
+        guest_id = DomainMapper.parse_player_id(data.get('guest'))  # ID гостя (может быть None для хозяина)
+    except ValueError:
+        emit('error', {'message': 'Некорректный идентификатор игрока'})
         return
 
-    join_room(game_id)
+    with games.checkout(game_id) as game_server, events.batch():
+        # Проверка существования игры
+        if not game_server:
+            events.emit('error', {'message': 'Игра не найдена'})
+            return
 
-    # Создание класса управляющего логикой
-    game_server = active_games[game_id]
-    domain_mapper = DomainMapper(game_server)
+        join_room(game_id)
 
-    # Отправка текущего состояния игры
-    message = domain_mapper.make_info_message()
-    emit('game_process', {'result': message}, room=game_id)
+        # Создание класса управляющего логикой
+        domain_mapper = DomainMapper(game_server)
 
-    # Второй игрок (гость)
-    if game_server.current_player2 is None and game_server.game_type == 2:
-        game_server.current_player2 = guest_id  # Устанавливаем гостя
-        if game_server.current_player2:
-            game_server.status = 201  # Игра начинается
-            emit('game_started', {'message': 'Игра началась!'}, room=game_id)
-            return
+        # Отправка текущего состояния игры
+        message = domain_mapper.make_info_message()
+        events.emit('game_process', {'result': message}, room=game_id)
 
-    # Рассылка обновленного состояния доски всем участникам
-    emit('update_board', {'board': game_server.board.game_matrix}, room=game_id)
+        # Второй игрок (гость)
+        if game_server.current_player2 is None and game_server.game_type == 2:
+            game_server.current_player2 = guest_id  # Устанавливаем гостя
+            if game_server.current_player2:
+                game_server.status = 201  # Игра начинается
+                journal.record_snapshot(game_server)
+                events.emit('game_started', {'message': 'Игра началась!'}, room=game_id)
+                return
+
+        # Полное поле получает только подключившийся клиент, остальным приходят изменения поля
+        events.emit('update_board', domain_mapper.make_board_snapshot())
 
 @socketio.on('make_move', namespace='/game')
-def handle_make_move(data):
+@SOCKETIO_HANDLER_SECONDS.time(event='make_move')
+@inject
+def handle_make_move(data, executor: MachineMoveExecutor = Provide[Container.machine_move_executor],
+                     games: GameRegistry = Provide[Container.game_registry],
+                     journal: MoveJournal = Provide[Container.move_journal],
+                     events: RoomEventBatcher = Provide[Container.room_events]):
     """Обработка хода игрока."""
     game_id = data['game_id']
     player_id = data['player_id']
     row, col = data['row'], data['col']
 
-    # Проверка существования игры
-    if game_id not in active_games:
-        emit('error', {'message': 'Игра не найдена'}, room=game_id)
-        return
+    with games.checkout(game_id) as game_server, events.batch():
+        # Проверка существования игры
+        if not game_server:
+            events.emit('error', {'message': 'Игра не найдена'}, room=game_id)
+            return
 
-    # Создание класса управляющего логикой
-    game_server = active_games[game_id]
-    domain_mapper = DomainMapper(game_server)
+        # Создание класса управляющего логикой
+        domain_mapper = DomainMapper(game_server)
 
-    # Проверка корректности хода
-    error_code = domain_mapper.verify_board(row, col)  # Переводим координаты в индекс
-    if error_code:
-        emit('error', {'message': domain_mapper.make_error_message(error_code)}, room=game_id)
-        return
+        # Проверка корректности хода
+        error_code = domain_mapper.verify_board(row, col)  # Переводим координаты в индекс
+        if error_code:
+            events.emit('error', {'message': domain_mapper.make_error_message(error_code)}, room=game_id)
+            return
 
-    # Ход игрока
-    if domain_mapper.make_player_move(player_id, row, col):
-        domain_mapper.check_game_state()
-        emit('update_board', {'board': game_server.board.game_matrix}, room=game_id)
-        # Сообщение о статусе игры
-        message = domain_mapper.make_info_message()
-        emit('game_process', {'result': message}, room=game_id)
-
-    # Если игра с машиной, выполняем ход машины
-    if game_server.game_type == 1 and game_server.status == 202:
-        emit('block_input', {}, room=game_id) # Блокировка ввода
-        socketio.start_background_task(machine_move_task())
-        domain_mapper.make_machine_move()
-        domain_mapper.check_game_state()
-        emit('update_board', {'board': game_server.board.game_matrix}, room=game_id)
+        # Ход игрока
+        if domain_mapper.make_player_move(player_id, row, col):
+            domain_mapper.check_game_state()
+            journal.record_move(game_server, row, col)
+            events.emit('board_delta', domain_mapper.make_board_delta([(row, col)]), room=game_id)
+            # Сообщение о статусе игры
+            message = domain_mapper.make_info_message()
+            events.emit('game_process', {'result': message}, room=game_id)
+
+        # Если игра с машиной, ставим ход машины в очередь пула процессов
+        if game_server.game_type == 1 and game_server.status == 202:
+            events.emit('block_input', {}, room=game_id) # Блокировка ввода
+            try:
+                submitted = executor.submit(game_server, finish_machine_move)
+            except MachineMoveQueueFull:
+                events.emit('error', {'message': 'Сервер перегружен, повторите ход позже'}, room=game_id)
+                events.emit('unblock_input', {}, room=game_id)
+                return
+            if not submitted:
+                # Ход машины для этой игры уже считается: ввод разблокирует его результат
+                events.emit('error', {'message': 'Машина уже делает ход, дождитесь ответа'}, room=game_id)
+
+@inject
+def finish_machine_move(game_id, move, error, games: GameRegistry = Provide[Container.game_registry],
+                        journal: MoveJournal = Provide[Container.move_journal],
+                        events: RoomEventBatcher = Provide[Container.room_events]):
+    """Применить посчитанный ход машины и разослать результат участникам игры."""
+    with games.checkout(game_id) as game_server, events.batch():
+        if not game_server or game_server.status != 202:
+            return  # Игра закрыта или перезапущена, пока считался ход
+
+        if error or move is None:
+            events.emit('error', {'message': 'Ошибка при ходе машины'}, room=game_id)
+            events.emit('unblock_input', {}, room=game_id)
+            return
+
+        domain_mapper = DomainMapper(game_server)
+        if domain_mapper.verify_board(*move) is None:
+            domain_mapper.apply_machine_move(*move)
+            domain_mapper.check_game_state()
+            journal.record_move(game_server, *move)
+            events.emit('board_delta', domain_mapper.make_board_delta([move]), room=game_id)
         # Сообщение о статусе игры
         message = domain_mapper.make_info_message()
-        emit('game_process', {'result': message}, room=game_id)
-        emit('unblock_input', {}, room=game_id)  # Разблокировка ввода
+        events.emit('game_process', {'result': message}, room=game_id)
+        events.emit('unblock_input', {}, room=game_id)  # Разблокировка ввода
 
 @socketio.on('restart_game', namespace='/game')
-def handle_restart_game(data):
+@SOCKETIO_HANDLER_SECONDS.time(event='restart_game')
+@inject
+def handle_restart_game(data, executor: MachineMoveExecutor = Provide[Container.machine_move_executor],
+                        games: GameRegistry = Provide[Container.game_registry],
+                        journal: MoveJournal = Provide[Container.move_journal],
+                        events: RoomEventBatcher = Provide[Container.room_events]):
     """Начать игру заново."""
     game_id = data['game_id']
     if not game_id:
         emit('error', {'message': 'Игра не найдена'})
         return
 
-    game_server = active_games.get(game_id)
-    if not game_server:
-        emit('error', {'message': 'Игра не найдена'})
-        return
-    domain_mapper = DomainMapper(game_server)
-    domain_mapper.restart_game()
-    message = domain_mapper.make_info_message()
-    emit('game_process', {'result': message}, room=game_id)
-    emit('update_board', {'board': game_server.board.game_matrix}, room=game_id)
+    with games.checkout(game_id) as game_server, events.batch():
+        if not game_server:
+            events.emit('error', {'message': 'Игра не найдена'})
+            return
+        # Ход машины для старой партии больше не нужен
+        if executor.cancel(game_id):
+            events.emit('unblock_input', {}, room=game_id)
+        domain_mapper = DomainMapper(game_server)
+        delta = domain_mapper.make_board_delta(domain_mapper.restart_game())
+        journal.record_snapshot(game_server)
+        message = domain_mapper.make_info_message()
+        events.emit('game_process', {'result': message}, room=game_id)
+        events.emit('board_delta', delta, room=game_id)
+
+@socketio.on('resync_board', namespace='/game')
+@SOCKETIO_HANDLER_SECONDS.time(event='resync_board')
+@inject
+def handle_resync_board(data, games: GameRegistry = Provide[Container.game_registry]):
+    """Отправить полное поле клиенту, который пропустил изменения поля (разрыв в номерах версий)."""
+    with games.checkout(data['game_id']) as game_server:
+        if not game_server:
+            emit('error', {'message': 'Игра не найдена'})
+            return
+        emit('update_board', DomainMapper(game_server).make_board_snapshot())
 
 @socketio.on('save_game', namespace='/game')
+@SOCKETIO_HANDLER_SECONDS.time(event='save_game')
 @inject
-def handle_save_game(data, service: DataService = Provide[Container.data_service]):
+def handle_save_game(data, save_queue: GameSaveQueue = Provide[Container.game_save_queue],
+                     games: GameRegistry = Provide[Container.game_registry]):
     """Сохранить игру."""
     # Получаем game_id из формы
     game_id = data['game_id']
@@ -194,22 +269,35 @@ def handle_save_game(data, service: DataService = Provide[Container.data_service
         emit('error', {'message': 'Игра не найдена'})
         return
 
-    game_server = active_games.get(game_id)
-    if not game_server:
-        emit('error', {'message': 'Игра не найдена'})
-        return
+    with games.checkout(game_id) as game_server:
+        if not game_server:
+            emit('error', {'message': 'Игра не найдена'})
+            return
 
-    try:
-        service.save_current_game(game_server)
-        emit('success', {'message': 'Игра сохранена'})
-    except Exception as e:
-        emit('error', {'message': f'Ошибка при сохранении игры: {str(e)}'})
-
-def machine_move_task():
-    """Асинхронная задача для хода машины."""
-    import asyncio
-    asyncio.run(async_machine_move())
-
-async def async_machine_move():
-    """Логика хода машины с задержкой."""
-    await asyncio.sleep(1)  # Задержка 1 секунду
+        # Запись в БД выполняет очередь сохранения, ответ клиенту отправляется, когда игра записана
+        sid = request.sid
+        try:
+            save_queue.submit(game_server, lambda saved_game_id, error: report_game_saved(sid, error))
+        except GameSaveQueueFull:
+            emit('error', {'message': 'Сервер перегружен, повторите сохранение позже'})
+        except RuntimeError:
+            # Очередь остановлена: воркер завершает работу
+            emit('error', {'message': 'Сервер перезапускается, повторите сохранение позже'})
+
+def report_game_saved(sid, error):
+    """Сообщить клиенту результат записи игры в БД (вызывается из потока очереди сохранения)."""
+    if error is None:
+        socketio.emit('success', {'message': 'Игра сохранена'}, namespace='/game', to=sid)
+    else:
+        socketio.emit('error', {'message': f'Ошибка при сохранении игры: {str(error)}'}, namespace='/game', to=sid)
+
+@socketio.on('disconnect', namespace='/game')
+@SOCKETIO_HANDLER_SECONDS.time(event='disconnect')
+@inject
+def handle_disconnect(*args, executor: MachineMoveExecutor = Provide[Container.machine_move_executor],
+                      games: GameRegistry = Provide[Container.game_registry]):
+    """Отменить ход машины в играх, которые покинул игрок."""
+    for room in rooms(namespace='/game'):
+        game_server = games.get(room)
+        if game_server and game_server.game_type == 1:
+            executor.cancel(room)
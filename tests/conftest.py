@@ -0,0 +1,5 @@
+import os
+import sys
+
+# Модули приложения импортируются из каталога src, как при запуске сервера
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
@@ -0,0 +1,59 @@
+"""Независимый полный перебор крестиков-ноликов 3x3 для проверки ходов движка и книги дебютов."""
+from functools import lru_cache
+
+from domain.model.game_server import GameServer
+from domain.service.game_service import TicTakToeGameService
+
+LINES = [(0, 1, 2), (3, 4, 5), (6, 7, 8), (0, 3, 6), (1, 4, 7), (2, 5, 8), (0, 4, 8), (2, 4, 6)]
+
+
+def winner(cells):
+    """Маркер игрока, собравшего линию, или 0."""
+    for a, b, c in LINES:
+        if cells[a] and cells[a] == cells[b] == cells[c]:
+            return cells[a]
+    return 0
+
+
+def is_over(cells):
+    return bool(winner(cells)) or all(cells)
+
+
+@lru_cache(maxsize=None)
+def value(cells, marker):
+    """Исход партии при лучшей игре обеих сторон с точки зрения машины (маркер 2): 1, 0 или -1."""
+    won = winner(cells)
+    if won:
+        return 1 if won == 2 else -1
+    if all(cells):
+        return 0
+    values = [value(play(cells, index, marker), 3 - marker) for index, cell in enumerate(cells) if cell == 0]
+    return max(values) if marker == 2 else min(values)
+
+
+def play(cells, index, marker):
+    """Позиция после хода marker в клетку index."""
+    assert cells[index] == 0
+    return cells[:index] + (marker,) + cells[index + 1:]
+
+
+def machine_positions():
+    """Все достижимые незавершенные позиции, в которых ходит машина (второй игрок)."""
+    positions, stack = set(), [((0,) * 9, 1)]
+    while stack:
+        cells, marker = stack.pop()
+        if is_over(cells):
+            continue
+        if marker == 2:
+            positions.add(cells)
+        stack.extend((play(cells, index, marker), 3 - marker) for index, cell in enumerate(cells) if cell == 0)
+    return sorted(positions)
+
+
+def make_service(cells):
+    """Сервис игры с позицией cells, ход за машиной."""
+    game_server = GameServer(rows=3, cols=3, current_player1='player', status=202)
+    for index, cell in enumerate(cells):
+        if cell:
+            game_server.board.set_cell(*divmod(index, 3), cell)
+    return TicTakToeGameService(game_server)
@@ -0,0 +1,101 @@
+import asyncio
+import threading
+
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+
+from datasource import db_session
+from datasource.cache.lru_ttl_cache import LruTtlCache
+from datasource.model.db_params import define_models
+from datasource.repository import game_repository
+from datasource.repository.async_game_repository import AsyncGameRepository
+from datasource.repository.game_repository import GameRepository
+from datasource.service.async_data_service import AsyncDataService
+from datasource.service.cached_data_service import CachedDataService
+from domain.model.game_server import GameServer
+
+
+def make_game(game_id, moves=()):
+    game_server = GameServer(rows=3, cols=3, game_uuid=game_id, game_type=1,
+                             status=GameServer.GAME_STATE['CURRENT PLAYER1 MOVE'])
+    for row, col, marker in moves:
+        game_server.board.set_cell(row, col, marker)
+    return game_server
+
+
+@pytest.fixture
+def app_db(tmp_path):
+    path = tmp_path / 'games.db'
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{path}'
+    db = SQLAlchemy(app)
+    players, _, saved_games, revoked_tokens = define_models(db)
+    with app.app_context():
+        saved_games.__table__.create(db.engine)
+    repository = GameRepository(db, players, saved_games, revoked_tokens)
+    return app, repository, f'sqlite+aiosqlite:///{path}'
+
+
+def saved_boards(app, repository):
+    with app.app_context():
+        return {game.UUID: game.board.game_matrix for game in repository.get_all_games()}
+
+
+def test_async_and_blocking_repositories_save_the_same_rows(app_db):
+    app, repository, async_url = app_db
+    with app.app_context():
+        repository.save_games_to_db([make_game('blocking', [(0, 0, 1)])])
+    session_factory = db_session.create_async_session_factory(async_url)
+    async_repository = AsyncGameRepository(session_factory, repository.saved_games)
+
+    async def save():
+        try:
+            await async_repository.save_games_to_db([make_game('async', [(1, 1, 2)]),
+                                                     make_game('blocking', [(0, 0, 1), (2, 2, 2)])])
+        finally:
+            await db_session.dispose_async_session_factory(session_factory)
+
+    asyncio.run(save())
+
+    assert saved_boards(app, repository) == {
+        'async': [[0, 0, 0], [0, 2, 0], [0, 0, 0]],
+        'blocking': [[1, 0, 0], [0, 0, 0], [0, 0, 2]],
+    }
+
+
+def test_save_without_upsert_dialect_merges_rows(app_db, monkeypatch):
+    app, repository, _ = app_db
+    with app.app_context():
+        repository.save_games_to_db([make_game('existing')])
+    monkeypatch.setattr(game_repository, 'UPSERT_DIALECTS', {})
+
+    with app.app_context():
+        repository.save_games_to_db([make_game('existing', [(0, 1, 1)]), make_game('new', [(1, 0, 2)])])
+
+    assert saved_boards(app, repository) == {
+        'existing': [[0, 1, 0], [0, 0, 0], [0, 0, 0]],
+        'new': [[0, 0, 0], [2, 0, 0], [0, 0, 0]],
+    }
+
+
+def test_reads_run_blocking_service_in_worker_thread(app_db):
+    app, repository, _ = app_db
+    with app.app_context():
+        repository.save_games_to_db([make_game('saved', [(2, 0, 1)])])
+    game_cache = LruTtlCache()
+    threads = []
+
+    def sync_context():
+        threads.append(threading.current_thread())
+        return app.app_context()
+
+    service = AsyncDataService(repository=None, game_cache=game_cache,
+                               data_service=CachedDataService(repository, LruTtlCache(), game_cache),
+                               sync_context=sync_context)
+
+    game_server = asyncio.run(service.upload_selected_game('saved'))
+
+    assert game_server.board.game_matrix == [[0, 0, 0], [0, 0, 0], [1, 0, 0]]
+    assert threads and threads[0] is not threading.main_thread()
+    assert asyncio.run(service.upload_selected_game('missing')) is None
@@ -0,0 +1,36 @@
+import random
+
+import pytest
+
+from datasource.mapper.game_data_mapper import GameDataMapper
+from domain.model.game_matrix import GameMatrix
+
+
+@pytest.mark.parametrize('rows, cols', [(3, 3), (4, 4), (5, 7), (8, 8), (10, 10)])
+def test_pack_unpack_round_trip(rows, cols):
+    rng = random.Random(rows * 100 + cols)
+    board = GameMatrix(rows, cols)
+    board.game_matrix = [[rng.choice((0, 1, 2)) for _ in range(cols)] for _ in range(rows)]
+
+    data = GameDataMapper.pack_board(board)
+    restored = GameDataMapper.unpack_board(rows, cols, data)
+
+    assert len(data) == 2 * ((rows * cols + 7) // 8)
+    assert restored.game_matrix == board.game_matrix
+    assert (restored.player_one_mask, restored.player_two_mask) == (board.player_one_mask, board.player_two_mask)
+
+
+def test_board_from_row_reads_both_formats():
+    board = GameMatrix(3, 3)
+    board.game_matrix = [[1, 2, 0], [0, 1, 0], [0, 0, 2]]
+
+    class Row:
+        pass
+
+    packed = Row()
+    packed.__dict__.update(GameDataMapper.board_to_row(board))
+    legacy = Row()
+    legacy.board_format, legacy.board = GameDataMapper.BOARD_FORMAT_JSON, '[[1, 2, 0], [0, 1, 0], [0, 0, 2]]'
+
+    assert GameDataMapper.board_from_row(packed).game_matrix == board.game_matrix
+    assert GameDataMapper.board_from_row(legacy).game_matrix == board.game_matrix
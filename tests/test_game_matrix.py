@@ -0,0 +1,67 @@
+import random
+
+import pytest
+
+from domain.model.game_matrix import GameMatrix
+
+
+def _random_matrix(rows, cols, seed):
+    rng = random.Random(seed)
+    return [[rng.choice((0, 1, 2)) for _ in range(cols)] for _ in range(rows)]
+
+
+@pytest.mark.parametrize('rows, cols', [(1, 1), (3, 3), (4, 4), (5, 7), (9, 9)])
+def test_game_matrix_round_trip(rows, cols):
+    """Матрица, загруженная в битовые маски, читается обратно без изменений."""
+    for seed in range(20):
+        matrix = _random_matrix(rows, cols, seed)
+        board = GameMatrix(rows, cols)
+        board.game_matrix = matrix
+
+        assert board.game_matrix == matrix
+        assert board.player_one_mask & board.player_two_mask == 0
+        assert [board.get_cell(row, col) for row in range(rows) for col in range(cols)] == \
+            [cell for row in matrix for cell in row]
+        assert board.empty_cells() == [(row, col) for row in range(rows) for col in range(cols)
+                                       if matrix[row][col] == 0]
+
+
+def test_game_matrix_setter_takes_size_from_matrix():
+    board = GameMatrix(3, 3)
+    board.game_matrix = [[1, 0, 2, 0], [0, 0, 0, 1]]
+
+    assert (board.rows, board.cols) == (2, 4)
+    assert board.game_matrix == [[1, 0, 2, 0], [0, 0, 0, 1]]
+
+
+def test_set_cell_replaces_and_clears_marker():
+    board = GameMatrix(3, 3)
+    board.set_cell(1, 1, 1)
+    board.set_cell(1, 1, 2)
+    assert board.get_cell(1, 1) == 2 and board.player_one_mask == 0
+
+    board.set_cell(1, 1, 0)
+    assert board.get_cell(1, 1) == 0 and board.empty_mask() == board.full_mask
+
+
+@pytest.mark.parametrize('cells, expected', [
+    ([(0, 0), (0, 1), (0, 2)], 1),
+    ([(0, 0), (1, 0), (2, 0)], 1),
+    ([(0, 0), (1, 1), (2, 2)], 1),
+    ([(0, 2), (1, 1), (2, 0)], 1),
+    ([(0, 0), (0, 1), (1, 2)], 0),
+])
+def test_winner_matches_lines(cells, expected):
+    board = GameMatrix(3, 3)
+    for row, col in cells:
+        board.set_cell(row, col, 1)
+    assert board.winner() == expected
+
+
+def test_is_full_and_clear():
+    board = GameMatrix(3, 3)
+    board.game_matrix = [[1, 2, 1], [1, 2, 2], [2, 1, 1]]
+    assert board.is_full() and board.winner() == 0
+
+    board.clear()
+    assert board.empty_mask() == board.full_mask and (board.rows, board.cols) == (3, 3)
@@ -0,0 +1,99 @@
+import json
+import uuid
+
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import inspect, text
+
+from datasource.mapper.game_data_mapper import GameDataMapper
+from datasource.model.db_params import define_models
+from datasource.repository.game_repository import GameRepository
+
+# Таблицы в том виде, в каком их создавала первая версия приложения
+BASELINE_SCHEMA = (
+    """
+    CREATE TABLE players (
+        id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+        login VARCHAR NOT NULL UNIQUE,
+        password VARCHAR NOT NULL,
+        uuid CHAR(32) NOT NULL UNIQUE
+    )
+    """,
+    """
+    CREATE TABLE saved_games (
+        id INTEGER NOT NULL PRIMARY KEY AUTOINCREMENT,
+        game_uuid VARCHAR NOT NULL UNIQUE,
+        board VARCHAR NOT NULL,
+        game_status INTEGER,
+        player_owner_uuid CHAR(32) REFERENCES players (uuid),
+        player_guest_uuid CHAR(32) REFERENCES players (uuid),
+        game_type INTEGER
+    )
+    """,
+)
+
+OWNER_UUID = uuid.UUID('0f8e5c2a-6b1d-4e3f-9a7c-d2b4e6f8a0c1')
+BOARD = [[1, 0, 2], [0, 1, 0], [2, 0, 0]]
+
+
+@pytest.fixture
+def repository(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'baseline.db'}"
+    db = SQLAlchemy(app)
+    players, _, saved_games, revoked_tokens = define_models(db)
+    with app.app_context():
+        for statement in BASELINE_SCHEMA:
+            db.session.execute(text(statement))
+        db.session.execute(text("INSERT INTO players (login, password, uuid) VALUES ('owner', 'x', :uuid)"),
+                           {'uuid': OWNER_UUID.hex})
+        db.session.execute(text("INSERT INTO saved_games (game_uuid, board, game_status, player_owner_uuid, game_type) "
+                                "VALUES ('game-1', :board, 0, :owner, 1)"),
+                           {'board': json.dumps(BOARD), 'owner': OWNER_UUID.hex})
+        db.session.commit()
+        yield GameRepository(db, players, saved_games, revoked_tokens)
+
+
+def test_upgrade_schema_rebuilds_baseline_sqlite_table(repository):
+    changes = repository.upgrade_schema()
+
+    assert 'REBUILD TABLE saved_games' in changes
+    assert 'DROP NOT NULL board' in changes
+    assert {'ADD COLUMN board_format', 'ADD COLUMN board_signature', 'ADD COLUMN created_at',
+            'ADD COLUMN updated_at'} <= set(changes)
+    inspector = inspect(repository.db.session.connection())
+    columns = {column['name']: column for column in inspector.get_columns('saved_games')}
+    assert set(columns) == set(repository.saved_games.__table__.columns.keys())
+    assert columns['board']['nullable']
+    assert not columns['updated_at']['nullable']
+    indexes = {index['name'] for index in inspector.get_indexes('saved_games')}
+    assert {index.name for index in repository.saved_games.__table__.indexes} <= indexes
+    assert 'saved_games_rebuild' not in inspector.get_table_names()
+
+
+def test_upgrade_schema_keeps_saved_games_and_is_idempotent(repository):
+    repository.upgrade_schema()
+
+    assert repository.upgrade_schema() == []
+    assert repository.migrate_board_format() == 1
+    assert repository.backfill_board_signatures() == 1
+    game = repository.get_saved_game_by_uuid('game-1')
+    assert game.board.game_matrix == BOARD
+    assert game.current_player1 == str(OWNER_UUID)
+    assert game.game_type == 1
+    row = repository.db.session.execute(
+        repository.db.select(repository.saved_games).filter_by(game_uuid='game-1')).scalar_one()
+    assert row.board is None
+    assert row.board_format == GameDataMapper.BOARD_FORMAT_PACKED
+    assert row.created_at is not None and row.updated_at is not None
+
+
+def test_upgrade_schema_refuses_to_drop_unknown_columns(repository):
+    repository.db.session.execute(text('ALTER TABLE saved_games ADD COLUMN legacy_note VARCHAR'))
+    repository.db.session.commit()
+
+    with pytest.raises(ValueError, match='legacy_note'):
+        repository.upgrade_schema()
+    columns = {column['name'] for column in inspect(repository.db.session.connection()).get_columns('saved_games')}
+    assert 'legacy_note' in columns
@@ -0,0 +1,66 @@
+import pytest
+
+from datasource.registry.game_registry import GameRegistry
+from domain.model.game_server import GameServer
+from domain.service.machine_move_executor import MachineMoveQueueFull
+from web.events.room_event_batcher import RoomEventBatcher
+from web.route.game.game_routes import handle_make_move
+
+
+class _RecordingSocketIO:
+    def __init__(self):
+        self.events = []
+
+    def emit(self, event, data, namespace=None, to=None):
+        self.events.append((event, to))
+
+
+class _Journal:
+    def record_move(self, game_server, row, col):
+        pass
+
+    def record_snapshot(self, game_server):
+        pass
+
+
+class _Executor:
+    def __init__(self, result=True, error=None):
+        self.result, self.error = result, error
+
+    def submit(self, game_server, callback):
+        if self.error:
+            raise self.error
+        return self.result
+
+
+@pytest.fixture
+def game():
+    games = GameRegistry()
+    game_server = GameServer(rows=3, cols=3, game_type=1, current_player1='player', status=201)
+    games.put(game_server)
+    return games, game_server.UUID
+
+
+def _make_move(game, executor):
+    games, game_id = game
+    socketio = _RecordingSocketIO()
+    handle_make_move({'game_id': game_id, 'player_id': 'player', 'row': 1, 'col': 1}, executor=executor,
+                     games=games, journal=_Journal(), events=RoomEventBatcher(socketio, '/game', enabled=False))
+    return [event for event, _ in socketio.events]
+
+
+def test_make_move_blocks_input_while_machine_move_is_computed(game):
+    assert _make_move(game, _Executor(result=True))[-1] == 'block_input'
+
+
+def test_make_move_reports_machine_move_already_pending(game):
+    """Ход машины уже считается: клиент получает ошибку, ввод разблокирует результат того хода."""
+    events = _make_move(game, _Executor(result=False))
+
+    assert events[-2:] == ['block_input', 'error']
+
+
+def test_make_move_unblocks_input_when_queue_is_full(game):
+    events = _make_move(game, _Executor(error=MachineMoveQueueFull('full')))
+
+    assert events[-3:] == ['block_input', 'error', 'unblock_input']
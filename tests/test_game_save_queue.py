@@ -0,0 +1,131 @@
+import threading
+
+import pytest
+
+from datasource.service.game_save_queue import GameSaveQueue, GameSaveQueueFull
+from domain.model.game_server import GameServer
+
+
+def make_game(game_id):
+    return GameServer(rows=3, cols=3, game_uuid=game_id, game_type=1, current_player1='owner',
+                      status=GameServer.GAME_STATE['CURRENT PLAYER1 MOVE'])
+
+
+class BlockingSaver:
+    """Записывает пачки игр; первая пачка ждет release, чтобы следующие сохранения успели накопиться."""
+
+    def __init__(self, fail=()):
+        self.batches = []
+        self.fail = set(fail)
+        self.started = threading.Event()
+        self.release = threading.Event()
+
+    def __call__(self, game_servers):
+        self.started.set()
+        self.release.wait(5)
+        self.batches.append([(game_server.UUID, game_server.board.game_matrix) for game_server in game_servers])
+        failed = self.fail & {game_server.UUID for game_server in game_servers}
+        if failed:
+            raise RuntimeError(f'не удалось записать {sorted(failed)}')
+
+
+def collect(results):
+    return lambda game_id, error: results.append((game_id, error))
+
+
+def test_repeated_saves_are_coalesced_to_latest_state():
+    saver = BlockingSaver()
+    save_queue = GameSaveQueue(saver, batch_size=10)
+    results = []
+    save_queue.submit(make_game('busy'))
+    assert saver.started.wait(5)
+
+    game_server = make_game('game')
+    for col in range(3):
+        game_server.board.set_cell(0, col, 1)
+        save_queue.submit(game_server, collect(results))
+    assert save_queue.pending_count() == 2
+    saver.release.set()
+    assert save_queue.flush(5)
+    save_queue.shutdown(5)
+
+    assert saver.batches[1] == [('game', [[1, 1, 1], [0, 0, 0], [0, 0, 0]])]
+    assert results == [('game', None)] * 3
+
+
+def test_queued_copy_is_not_affected_by_later_moves():
+    saver = BlockingSaver()
+    save_queue = GameSaveQueue(saver)
+    save_queue.submit(make_game('busy'))
+    assert saver.started.wait(5)
+    game_server = make_game('game')
+    save_queue.submit(game_server)
+    game_server.board.set_cell(1, 1, 2)
+
+    saver.release.set()
+    save_queue.shutdown(5)
+
+    assert saver.batches[1] == [('game', [[0, 0, 0], [0, 0, 0], [0, 0, 0]])]
+
+
+def test_failed_batch_is_retried_game_by_game():
+    saver = BlockingSaver(fail={'bad'})
+    save_queue = GameSaveQueue(saver, batch_size=10)
+    results = []
+    save_queue.submit(make_game('busy'))
+    assert saver.started.wait(5)
+    for game_id in ('first', 'bad', 'last'):
+        save_queue.submit(make_game(game_id), collect(results))
+
+    saver.release.set()
+    save_queue.shutdown(5)
+
+    assert [[game_id for game_id, _ in batch] for batch in saver.batches[1:]] == [
+        ['first', 'bad', 'last'], ['first'], ['bad'], ['last']]
+    errors = dict(results)
+    assert errors['first'] is None and errors['last'] is None
+    assert isinstance(errors['bad'], RuntimeError)
+
+
+def test_batches_are_limited_by_batch_size():
+    saver = BlockingSaver()
+    save_queue = GameSaveQueue(saver, batch_size=2)
+    save_queue.submit(make_game('busy'))
+    assert saver.started.wait(5)
+    for index in range(5):
+        save_queue.submit(make_game(f'game-{index}'))
+
+    saver.release.set()
+    save_queue.shutdown(5)
+
+    assert [len(batch) for batch in saver.batches] == [1, 2, 2, 1]
+
+
+def test_full_queue_rejects_new_games_but_accepts_pending_ones():
+    saver = BlockingSaver()
+    save_queue = GameSaveQueue(saver, max_pending=1)
+    save_queue.submit(make_game('busy'))
+    assert saver.started.wait(5)
+    save_queue.submit(make_game('pending'))
+
+    with pytest.raises(GameSaveQueueFull):
+        save_queue.submit(make_game('other'))
+    save_queue.submit(make_game('pending'))
+    saver.release.set()
+    save_queue.shutdown(5)
+
+
+def test_shutdown_writes_pending_games_and_rejects_new_ones():
+    saver = BlockingSaver()
+    save_queue = GameSaveQueue(saver)
+    save_queue.submit(make_game('busy'))
+    assert saver.started.wait(5)
+    save_queue.submit(make_game('pending'))
+    saver.release.set()
+
+    save_queue.shutdown(5)
+
+    assert [batch[0][0] for batch in saver.batches] == ['busy', 'pending']
+    assert save_queue.pending_count() == 0
+    with pytest.raises(RuntimeError):
+        save_queue.submit(make_game('late'))
@@ -0,0 +1,59 @@
+import random
+
+import pytest
+
+from domain.model.game_server import GameServer
+from domain.service.game_service import TicTakToeGameService, IncrementalTicTakToeGameService
+
+
+def _play_random_game(rows, cols, seed, new_service_every_move):
+    """Сыграть случайную партию, сравнивая инкрементальную проверку победителя с полной после каждого хода."""
+    rng = random.Random(seed)
+    game_server = GameServer(rows=rows, cols=cols, current_player1='player', status=201)
+    service = IncrementalTicTakToeGameService(game_server)
+    marker = game_server.PLAYER_ONE_MARKER
+    while True:
+        if new_service_every_move:
+            # Как в обработчиках: сервис создается на каждое событие, счетчики берутся из игры
+            service = IncrementalTicTakToeGameService(game_server)
+        row, col = rng.choice(game_server.board.empty_cells())
+        if marker == game_server.PLAYER_ONE_MARKER:
+            assert service.make_player_move('player', row, col)
+        else:
+            service.place_machine_move(row, col)
+        result = service.check_winner()
+        assert result == TicTakToeGameService(game_server).check_winner()
+        if result is not None:
+            return result
+        game_server.status = 202 if game_server.status == 201 else 201
+        marker = 3 - marker
+
+
+@pytest.mark.parametrize('rows, cols', [(3, 3), (4, 4), (3, 5)])
+@pytest.mark.parametrize('new_service_every_move', [False, True])
+def test_incremental_winner_matches_full_scan(rows, cols, new_service_every_move):
+    results = {_play_random_game(rows, cols, seed, new_service_every_move) for seed in range(100)}
+    assert results <= {-1, 0, 1}
+
+
+def test_line_counts_are_rebuilt_when_board_changes_outside_service():
+    game_server = GameServer(rows=3, cols=3, current_player1='player', status=201)
+    IncrementalTicTakToeGameService(game_server).make_player_move('player', 0, 0)
+    # Поле заменено в обход сервиса (например, загрузка из БД): первая строка у первого игрока
+    game_server.board.game_matrix = [[1, 1, 1], [2, 2, 0], [0, 0, 0]]
+
+    service = IncrementalTicTakToeGameService(game_server)
+
+    assert service.last_move is None
+    assert service.check_winner() == game_server.GAME_STATE['CURRENT PLAYER1 WIN']
+
+
+def test_clean_board_resets_line_counts():
+    game_server = GameServer(rows=3, cols=3, current_player1='player', status=201)
+    service = IncrementalTicTakToeGameService(game_server)
+    service.make_player_move('player', 1, 1)
+
+    service.clean_board()
+
+    assert service.last_move is None and game_server.line_counts.moves_count == 0
+    assert service.check_winner() is None
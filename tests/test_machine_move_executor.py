@@ -0,0 +1,67 @@
+import threading
+
+import pytest
+
+from domain.model.game_server import GameServer
+from domain.service.machine_move_executor import MachineMoveExecutor, MachineMoveQueueFull, compute_machine_move
+
+
+def _game(rows=3, cols=3):
+    game_server = GameServer(rows=rows, cols=cols, current_player1='player', status=202)
+    game_server.board.set_cell(0, 0, game_server.PLAYER_ONE_MARKER)
+    return game_server
+
+
+@pytest.fixture
+def executor():
+    executor = MachineMoveExecutor(max_workers=1, max_pending=2)
+    yield executor
+    executor.shutdown()
+
+
+def test_submit_computes_move_and_calls_back(executor):
+    done, results = threading.Event(), []
+    game_server = _game()
+
+    assert executor.submit(game_server, lambda *result: (results.append(result), done.set()))
+    assert done.wait(30)
+
+    game_id, move, error = results[0]
+    assert game_id == game_server.UUID and error is None
+    assert game_server.board.get_cell(*move) == 0  # Игра в реестре не изменяется
+    assert not executor.is_pending(game_server.UUID)
+
+
+def test_submit_rejects_second_move_for_same_game_and_full_queue(executor):
+    release = threading.Event()
+    first, second, third = _game(), _game(), _game()
+
+    assert executor.submit(first, lambda *result: release.wait(30))
+    assert executor.submit(first, lambda *result: None) is False
+    assert executor.submit(second, lambda *result: None)
+    with pytest.raises(MachineMoveQueueFull):
+        executor.submit(third, lambda *result: None)
+    release.set()
+
+
+def test_cancelled_move_is_not_delivered(executor):
+    results = []
+    game_server = _game()
+    executor.submit(game_server, lambda *result: results.append(result))
+
+    assert executor.cancel(game_server.UUID)
+    executor.shutdown()
+
+    assert results == []
+
+
+def test_compute_machine_move_uses_search_settings():
+    # Позиции 4x4 нет в книге дебютов: ход ищет alpha-beta с заданным временем на ход
+    game_server = _game(4, 4)
+    game_server.board.set_cell(0, 1, game_server.PLAYER_TWO_MARKER)
+    game_server.board.set_cell(3, 3, game_server.PLAYER_ONE_MARKER)
+
+    move, nodes, seconds = compute_machine_move(game_server, exhaustive_search_max_cells=9, move_time_budget=0.05)
+
+    assert move is not None and nodes > 0
+    assert seconds < 0.5
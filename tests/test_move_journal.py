@@ -0,0 +1,111 @@
+import json
+import threading
+
+from datasource.journal.move_journal import MoveJournal
+from domain.model.game_server import GameServer
+
+
+def make_game(game_id, moves=()):
+    game_server = GameServer(rows=3, cols=3, game_uuid=game_id, game_type=1, current_player1='owner',
+                             current_player2=None, status=GameServer.GAME_STATE['CURRENT PLAYER1 MOVE'])
+    for row, col, marker in moves:
+        game_server.board.set_cell(row, col, marker)
+    return game_server
+
+
+def play(journal, game_server, row, col, marker):
+    game_server.board.set_cell(row, col, marker)
+    game_server.board_seq += 1
+    journal.record_move(game_server, row, col)
+
+
+def test_recover_replays_snapshot_moves_and_drops(tmp_path):
+    journal = MoveJournal(str(tmp_path / 'games.journal'))
+    first, second = make_game('first'), make_game('second', [(1, 1, 1)])
+    journal.record_snapshot(first)
+    journal.record_snapshot(second)
+    play(journal, first, 0, 0, 1)
+    play(journal, first, 2, 2, 2)
+    journal.record_drop('second')
+    journal.shutdown()
+
+    recovered = MoveJournal(str(tmp_path / 'games.journal')).recover()
+
+    assert set(recovered) == {'first'}
+    assert recovered['first'].board.game_matrix == first.board.game_matrix
+    assert recovered['first'].board_seq == first.board_seq
+    assert recovered['first'].current_player1 == 'owner'
+
+
+def test_recover_skips_torn_last_record(tmp_path):
+    path = tmp_path / 'games.journal'
+    journal = MoveJournal(str(path))
+    game_server = make_game('game')
+    journal.record_snapshot(game_server)
+    play(journal, game_server, 0, 1, 1)
+    journal.shutdown()
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write('{"t": "m", "g": "game", "r": 2')
+
+    recovered = MoveJournal(str(path)).recover()
+
+    assert recovered['game'].board.game_matrix == game_server.board.game_matrix
+
+
+def test_compact_rewrites_journal_with_snapshots(tmp_path):
+    path = tmp_path / 'games.journal'
+    journal = MoveJournal(str(path), compact_every=None)
+    kept, dropped = make_game('kept'), make_game('dropped')
+    journal.record_snapshot(kept)
+    journal.record_snapshot(dropped)
+    for row, col, marker in [(0, 0, 1), (1, 1, 2), (2, 2, 1)]:
+        play(journal, kept, row, col, marker)
+    journal.record_drop('dropped')
+    journal.flush()
+    before = journal.recover()
+
+    journal.compact()
+    journal.shutdown()
+
+    records = [json.loads(line) for line in path.read_text(encoding='utf-8').splitlines()]
+    assert [(record['t'], record['g']) for record in records] == [(MoveJournal.SNAPSHOT, 'kept')]
+    after = MoveJournal(str(path)).recover()
+    assert after['kept'].board.game_matrix == before['kept'].board.game_matrix
+    assert after['kept'].board_seq == before['kept'].board_seq == 3
+
+
+def test_journal_compacts_after_compact_every_records(tmp_path):
+    path = tmp_path / 'games.journal'
+    journal = MoveJournal(str(path), compact_every=3)
+    game_server = make_game('game')
+    journal.record_snapshot(game_server)
+    journal.flush()
+    for row, col, marker in [(0, 0, 1), (0, 1, 2)]:
+        play(journal, game_server, row, col, marker)
+        journal.flush()
+    journal.shutdown()
+
+    # Снимок и два хода — три записи: журнал переписан одним снимком
+    assert len(path.read_text(encoding='utf-8').splitlines()) == 1
+    assert MoveJournal(str(path)).recover()['game'].board.game_matrix == game_server.board.game_matrix
+
+
+def test_records_after_shutdown_are_written_without_worker(tmp_path):
+    journal = MoveJournal(str(tmp_path / 'games.journal'))
+    journal.record_snapshot(make_game('before'))
+    journal.shutdown()
+    threads = threading.active_count()
+
+    journal.record_snapshot(make_game('after'))
+
+    assert journal._worker is None
+    assert threading.active_count() == threads
+    assert set(MoveJournal(str(tmp_path / 'games.journal')).recover()) == {'before', 'after'}
+
+
+def test_slot_path_is_claimed_per_journal(tmp_path):
+    template = str(tmp_path / 'games.{slot}.journal')
+    first, second = MoveJournal(template), MoveJournal(template)
+
+    assert first.path == str(tmp_path / 'games.0.journal')
+    assert second.path == str(tmp_path / 'games.1.journal')
@@ -0,0 +1,56 @@
+from domain.service.opening_book import OpeningBook, default_opening_book
+from perfect_play import is_over, make_service, play, value
+
+
+def _book_lines(book):
+    """Позиции с ходом машины во всех партиях, где игрок ходит как угодно, а машина — по книге."""
+    positions, stack = set(), [(0,) * 9]
+    while stack:
+        cells = stack.pop()
+        for index, cell in enumerate(cells):
+            if cell:
+                continue
+            after_player = play(cells, index, 1)
+            if is_over(after_player) or after_player in positions:
+                continue
+            positions.add(after_player)
+            move = book.lookup(make_service(after_player).game_server.board)
+            assert move is not None, after_player
+            after_machine = play(after_player, move[0] * 3 + move[1], 2)
+            if not is_over(after_machine):
+                stack.append(after_machine)
+    return positions
+
+
+def test_default_3x3_book_is_complete_and_optimal():
+    """Книга отвечает в каждой позиции партии по книге, и каждый ответ сохраняет лучший исход."""
+    book = default_opening_book()
+    positions = _book_lines(book)
+
+    assert positions
+    for cells in positions:
+        row, col = book.lookup(make_service(cells).game_server.board)
+        assert value(play(cells, row * 3 + col, 2), 1) == value(cells, 2), cells
+    # При игре по книге машина не проигрывает
+    assert min(value(cells, 2) for cells in positions) >= 0
+
+
+def test_default_3x3_book_matches_generated_book():
+    """Книга в репозитории совпадает с заново сгенерированной (не устарела после изменений поиска)."""
+    assert OpeningBook.generate(3, 3).books[(3, 3)] == default_opening_book().books[(3, 3)]
+
+
+def test_book_save_load_round_trip(tmp_path):
+    book = OpeningBook.generate(3, 3, max_ply=3)
+    path = tmp_path / 'book.json'
+
+    book.save(path)
+
+    assert OpeningBook.load(path).books == book.books
+
+
+def test_missing_book_file_loads_empty_book(tmp_path):
+    book = OpeningBook.load(tmp_path / 'missing.json')
+
+    assert book.books == {}
+    assert book.lookup(make_service((1, 0, 0, 0, 0, 0, 0, 0, 0)).game_server.board) is None
@@ -0,0 +1,56 @@
+import threading
+
+import pytest
+
+from domain.service.search_engine import MinimaxEngine, TranspositionTable, AlphaBetaEngine
+from perfect_play import machine_positions, make_service, play, value
+
+
+@pytest.mark.parametrize('use_symmetry', [True, False])
+def test_minimax_plays_optimally_on_every_3x3_position(use_symmetry):
+    """Ход движка сохраняет лучший достижимый исход во всех позициях 3x3."""
+    engine = MinimaxEngine(TranspositionTable(), use_symmetry=use_symmetry)
+    for cells in machine_positions():
+        row, col = engine.find_best_move(make_service(cells))
+        assert value(play(cells, row * 3 + col, 2), 1) == value(cells, 2), cells
+
+
+def test_minimax_search_leaves_board_unchanged_and_counts_nodes():
+    service = make_service((1, 0, 0, 0, 0, 0, 0, 0, 0))
+    masks = (service.game_server.board.player_one_mask, service.game_server.board.player_two_mask)
+
+    move, nodes = MinimaxEngine(TranspositionTable()).search(service)
+
+    assert move is not None and nodes > 0
+    assert (service.game_server.board.player_one_mask, service.game_server.board.player_two_mask) == masks
+
+
+def test_minimax_node_counts_are_per_search_with_shared_engine():
+    """Параллельные поиски на общем движке не смешивают счетчики узлов."""
+    cells = (1, 0, 0, 0, 0, 0, 0, 0, 0)
+    expected = MinimaxEngine(TranspositionTable(), use_symmetry=False).search(make_service(cells))[1]
+    # Таблица без записей и без вытеснения, чтобы каждый поиск считал узлы заново
+    engine = MinimaxEngine(TranspositionTable(max_size=0), use_symmetry=False)
+    results, barrier = [], threading.Barrier(4)
+
+    def search():
+        barrier.wait()
+        results.append(engine.search(make_service(cells))[1])
+
+    threads = [threading.Thread(target=search) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert results and all(nodes >= expected for nodes in results)
+    assert len(set(results)) == 1
+
+
+def test_alphabeta_takes_immediate_win_and_blocks_loss():
+    # Машина (2) выигрывает в строке 1
+    win = make_service((1, 1, 0, 2, 2, 0, 1, 0, 0))
+    assert AlphaBetaEngine(time_budget=None).find_best_move(win) == (1, 2)
+    # Игрок (1) угрожает по диагонали, у машины выигрыша нет
+    block = make_service((1, 0, 0, 0, 1, 0, 2, 0, 0))
+    assert AlphaBetaEngine(time_budget=None).find_best_move(block) == (2, 2)
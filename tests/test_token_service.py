@@ -0,0 +1,127 @@
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from flask import Flask
+from flask_sqlalchemy import SQLAlchemy
+from itsdangerous import TimestampSigner
+
+from datasource.cache.expiring_set import ExpiringSet, ExpiringSetFull
+from datasource.model.db_params import define_models
+from datasource.repository.game_repository import GameRepository
+from web.authentication.token_service import TokenRevocationFull, TokenService
+
+
+class FakeClock:
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def signing_clock(monkeypatch):
+    """Время подписи и проверки токенов itsdangerous."""
+    clock = FakeClock(1_700_000_000)
+    monkeypatch.setattr(TimestampSigner, 'get_timestamp', lambda self: int(clock.now))
+    return clock
+
+
+def test_expiring_set_forgets_keys_after_expiry():
+    clock = FakeClock()
+    revoked = ExpiringSet(clock=clock)
+
+    assert revoked.add('jti', clock.now + 10)
+    assert not revoked.add('jti', clock.now + 10)
+    assert 'jti' in revoked
+    clock.now += 10
+    assert 'jti' not in revoked
+    assert revoked.add('jti', clock.now + 5)
+
+
+def test_expiring_set_purges_expired_keys_instead_of_evicting_live_ones():
+    clock = FakeClock()
+    revoked = ExpiringSet(max_size=2, clock=clock)
+    revoked.add('short', clock.now + 1)
+    revoked.add('long', clock.now + 100)
+
+    with pytest.raises(ExpiringSetFull):
+        revoked.add('new', clock.now + 100)
+    clock.now += 1
+    assert revoked.add('new', clock.now + 100)
+    assert 'long' in revoked and 'new' in revoked and 'short' not in revoked
+    assert len(revoked) == 2
+
+
+def test_revoked_access_token_stays_revoked_until_it_expires(signing_clock):
+    revoked = ExpiringSet(clock=signing_clock)
+    tokens = TokenService('secret', revoked, access_ttl=60)
+    access_token = tokens.issue('user')['access_token']
+
+    assert tokens.revoke(access_token)
+    with pytest.raises(ValueError, match='revoked'):
+        tokens.verify_access(access_token)
+    signing_clock.now += 60  # Последняя секунда срока токена: отзыв еще действует
+    with pytest.raises(ValueError, match='revoked'):
+        tokens.verify_access(access_token)
+    signing_clock.now += 1
+    with pytest.raises(ValueError, match='expired'):
+        tokens.verify_access(access_token)
+
+
+def test_refresh_token_is_single_use(signing_clock):
+    tokens = TokenService('secret', ExpiringSet(clock=signing_clock))
+    refresh_token = tokens.issue('user')['refresh_token']
+
+    renewed = tokens.refresh(refresh_token)
+    assert tokens.verify_access(renewed['access_token']) == 'user'
+    with pytest.raises(ValueError, match='revoked'):
+        tokens.refresh(refresh_token)
+    assert tokens.refresh(renewed['refresh_token'])['token_type'] == 'Bearer'
+
+
+def test_access_and_refresh_tokens_are_not_interchangeable(signing_clock):
+    tokens = TokenService('secret', ExpiringSet(clock=signing_clock))
+    issued = tokens.issue('user')
+
+    with pytest.raises(ValueError, match='Invalid'):
+        tokens.verify_access(issued['refresh_token'])
+    with pytest.raises(ValueError, match='Invalid'):
+        tokens.refresh(issued['access_token'])
+
+
+def test_full_revocation_set_is_reported(signing_clock):
+    tokens = TokenService('secret', ExpiringSet(max_size=1, clock=signing_clock))
+    tokens.revoke(tokens.issue('first')['access_token'])
+
+    with pytest.raises(TokenRevocationFull):
+        tokens.revoke(tokens.issue('second')['access_token'])
+
+
+@pytest.fixture
+def repository(tmp_path):
+    app = Flask(__name__)
+    app.config['SQLALCHEMY_DATABASE_URI'] = f"sqlite:///{tmp_path / 'tokens.db'}"
+    db = SQLAlchemy(app)
+    players, _, saved_games, revoked_tokens = define_models(db)
+    with app.app_context():
+        revoked_tokens.__table__.create(db.engine)
+        yield GameRepository(db, players, saved_games, revoked_tokens)
+
+
+def test_revoked_refresh_tokens_are_shared_and_purged_after_expiry(repository, signing_clock):
+    tokens = TokenService('secret', ExpiringSet(clock=signing_clock), revocation_store=repository)
+    other_worker = TokenService('secret', ExpiringSet(clock=signing_clock), revocation_store=repository)
+    refresh_token = tokens.issue('user')['refresh_token']
+
+    tokens.refresh(refresh_token)
+    with pytest.raises(ValueError, match='revoked'):
+        other_worker.refresh(refresh_token)
+
+    now = datetime.now(timezone.utc)
+    assert repository.revoke_token('expired', now - timedelta(seconds=1))
+    assert repository.revoke_token('fresh', now + timedelta(hours=1))
+    # Следующий отзыв удаляет записи, срок которых истек
+    assert not repository.is_token_revoked('expired')
+    assert repository.is_token_revoked('fresh')
+    assert not repository.revoke_token('fresh', now + timedelta(hours=1))